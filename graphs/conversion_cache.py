@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+# On-disk cache for graph conversions, so re-running over unchanged inputs only costs hashing them.
+# Entries are keyed by a SHA-256 of the converter name and version, its options, and the input file's bytes.
+# Each entry is one file in the cache directory; reading an entry touches its mtime, and when the directory grows past
+# its size limit the least recently used entries are deleted.
+# Several processes can share one cache directory: writes are atomic renames, and entries that vanish mid-read count as misses.
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def default_cache_dir():
+    """Returns the default cache directory, under $XDG_CACHE_HOME (or ~/.cache)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "factorio-mod-scripts", "graphs")
+
+
+def cache_key(input_path, converter, version, options=None):
+    """
+    Hashes an input file together with everything that affects its converted output.
+
+    Args:
+        input_path (str): File to hash; read in chunks so huge files don't need to fit in memory.
+        converter (str): Name of the conversion, e.g. "graphml_to_text".
+        version (int): The converter's version; bump it whenever its output changes.
+        options (dict): Options that affect the output, e.g. {"format": "graphml"}.
+
+    Returns:
+        str: Hex digest to use as the cache key.
+    """
+    digest = hashlib.sha256()
+    header = json.dumps([converter, version, options or {}], sort_keys=True)
+    digest.update(header.encode("utf-8"))
+    digest.update(b"\0")
+    with open(input_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """Size-bounded LRU cache of converted outputs, stored as one file per entry."""
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        """Returns the cached bytes for key, or None. Hits are marked as recently used."""
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """Stores bytes under key, then evicts old entries if the cache is over its size limit."""
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self._entry_path(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.startswith(".tmp-") or not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def report(self, file=sys.stderr):
+        """Prints hit/miss counts."""
+        print(f"Cache: {self.hits} hit(s), {self.misses} miss(es) in {self.cache_dir}", file=file)
@@ -7,320 +7,136 @@
 # Suggested prompt for AI: Write a code block with a graph of all these recipes, in the DOT language for GraphViz, where you have a node colored "#FFCC99" for every recipe, and a node colored "#CCFFFF" for every substance (item/fluid), with arrows from each item/fluid node to all the recipes that use it, and arrows from each recipe node to all the items/fluids that are produced by it. Do not use the "class=" attribute in your DOT code.
 
 # When you run this script, it will ask you to paste a graph in DOT format.
-# The DOT graph is converted to GML by running `gv2gml`. Both DOT and GML files are saved in /tmp.
-# The GML graph is then fixed up a bit (ensuring all nodes have labels, making all labels lowercase, fixing basic issues) then saved in /tmp.
-# Then the GML file can be imported into yEd.
-# You need to install gv2gml before running.
+# The DOT graph is parsed in-process (see dot_parser.py) and converted to GML, or to GraphML with --format graphml.
+# GraphML output is laid out already (see graph_layout.py): nodes are sized to their labels and arranged in layers, so
+# the "fit node to label" and auto-layout steps in yEd can be skipped. Use --no-layout to leave every node at the origin.
+# The graph is fixed up a bit on the way (ensuring all nodes have labels, making all labels lowercase, fixing basic issues) then saved in /tmp, or to the path given with --output.
+# Then the GML/GraphML file can be imported into yEd.
+# Existing GML files (e.g. from gv2gml) can still be fixed up with modify_gml_content.
+
+# Batch mode: pass DOT/GML files or directories as arguments instead of pasting on stdin, e.g.
+#   python dot_gml_import.py designs/ extra.dot --format graphml --output-dir out/
+# Files are converted in parallel, each output written next to its input (or into --output-dir), and a timing summary is printed at the end.
+# Directories are searched recursively for DOT and GML files; GML files are fixed up to a "<name>_fixed.gml" file. GML files that
+# look like this script's outputs ("<name>_fixed.gml", or "<name>.gml" next to "<name>.dot") are skipped with a warning.
+# With --cache, converted outputs are cached by input content (see conversion_cache.py), so unchanged files are only hashed.
+# With --watch, the inputs are converted once and then watched (see file_watcher.py); each time DOT/GML files are saved,
+# just those files are converted again.
 
 import sys
 import os
+import argparse
 import datetime
-import subprocess
-import re
-import shutil
+import time
+import hashlib
 import traceback # Added for better error reporting
+from concurrent.futures import ProcessPoolExecutor
+
+from gml_parser import parse_gml, write_gml, find_last, iter_graph_items, quote, unquote
+from dot_parser import parse_dot, DotSyntaxError
+from graphml_writer import write_graphml
+from graph_layout import label_size, layered_layout
+from conversion_cache import ConversionCache, cache_key, default_cache_dir, DEFAULT_MAX_BYTES
+from file_watcher import watch_files
 
 # --- Configuration ---
 TMP_DIR = "/tmp"
 DEBUG = False  # Set to True to enable debug printing, False to disable
+CONVERTER_VERSION = 2 # Bump when conversion output changes, to invalidate cached outputs
+DOT_EXTENSIONS = (".dot", ".gv")
+GML_EXTENSIONS = (".gml",)
 
 # --- Helper Functions ---
-def check_gv2gml():
-    """Checks if gv2gml executable is available in PATH."""
-    if shutil.which("gv2gml") is None:
-        print("Error: 'gv2gml' command not found.", file=sys.stderr)
-        print("Please ensure Graphviz is installed and 'gv2gml' is in your system's PATH.", file=sys.stderr)
-        sys.exit(1)
-
-def generate_filenames():
-    """Generates unique base filename and full paths for DOT and GML files."""
+def generate_filename(extension):
+    """Generates a unique timestamped path in TMP_DIR for an output file with the given extension."""
     timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')
     base_filename = f"graph-{timestamp}"
-    dot_filepath = os.path.join(TMP_DIR, f"{base_filename}.dot")
-    gml_filepath = os.path.join(TMP_DIR, f"{base_filename}.gml")
-    return dot_filepath, gml_filepath
+    return os.path.join(TMP_DIR, f"{base_filename}.{extension}")
 
-# Helper function to process the buffered lines for a single node
-def process_node_buffer(node_buffer, debug):
+def make_target_label(label, node_name):
     """
-    Processes a list of lines representing a single node block.
-    Adds/updates labels, sets shape to rectangle, and updates LabelGraphics text.
-
-    Args:
-        node_buffer (list): List of strings, lines of the node block.
-        debug (bool): Flag to enable debug printing.
-
-    Returns:
-        list: List of strings, the modified lines for the node block.
+    Works out the label a node should have: its existing label, otherwise its name, lowercased.
+    Returns an empty string if the node has neither.
     """
-    if not node_buffer:
-        return []
-    if debug:
-        print("-" * 20)
-        print(f"DEBUG: Processing Node Buffer (length {len(node_buffer)}):")
-        # Uncomment to see the raw buffer being processed
-        # for i, line in enumerate(node_buffer): print(f"  [{i}] {line}")
-
-    processed_lines = []
-    node_name = None
-    original_label_line_index = -1
-    label_value = None  # Store original label value if found
-    has_graphics_block = False
-    graphics_start_index = -1
-    graphics_end_index = -1
-    original_type_line_index = -1
-    type_found_in_graphics = False
-    name_line_index = -1 # Index where name was found
-    # --> New state variables for LabelGraphics
-    has_label_graphics = False
-    label_graphics_start_index = -1
-    label_graphics_end_index = -1
-    original_text_line_index = -1
-    text_found_in_label_graphics = False
-    # <-- End new state variables
-
-    # --- Regex Patterns ---
-    node_name_pattern = re.compile(r'^\s*name\s+"([^"]+)"')
-    label_pattern = re.compile(r'^\s*label\s+"([^"]*)"')
-    graphics_start_pattern = re.compile(r'^\s*graphics\s+\[')
-    type_pattern = re.compile(r'^\s*type\s+"([^"]+)"')
-    # --> New patterns for LabelGraphics
-    label_graphics_start_pattern = re.compile(r'^\s*LabelGraphics\s+\[')
-    text_pattern = re.compile(r'^\s*text\s+"([^"]*)"')
-    # <-- End new patterns
-    # Match graphics/LabelGraphics end ']' (assumes indent 4 or more)
-    sub_block_end_pattern = re.compile(r'^\s{4,}\]')
-    # Match node end ']' (assumes indent 2)
-    node_end_pattern = re.compile(r'^\s{2}\]')
-
-
-    # --- Pass 1: Find key elements and indices in the buffer ---
-    in_graphics = False
-    in_label_graphics = False # Track context within LabelGraphics
-    for i, line in enumerate(node_buffer):
-        # Find Node Name
-        name_match = node_name_pattern.match(line)
-        if name_match:
-            node_name = name_match.group(1)
-            name_line_index = i
-            if debug: print(f"  DEBUG: Found name: '{node_name}' at index {i}")
-
-        # Find Existing Label
-        label_match = label_pattern.match(line)
-        if label_match:
-            original_label_line_index = i
-            label_value = label_match.group(1)
-            if debug: print(f"  DEBUG: Found existing label: '{label_value}' at index {i}")
-
-        # Find Graphics Block Start
-        if graphics_start_pattern.match(line):
-            has_graphics_block = True
-            in_graphics = True
-            graphics_start_index = i
-            if debug: print(f"  DEBUG: Found graphics start at index {i}")
-            continue
-
-        # Find LabelGraphics Block Start
-        if label_graphics_start_pattern.match(line):
-            has_label_graphics = True
-            in_label_graphics = True
-            label_graphics_start_index = i
-            if debug: print(f"  DEBUG: Found LabelGraphics start at index {i}")
-            continue
-
-        # Inside Graphics Block
-        if in_graphics:
-            # Find Existing Type
-            if type_pattern.match(line):
-                original_type_line_index = i
-                type_found_in_graphics = True
-                if debug: print(f"  DEBUG: Found existing type at index {i}")
-
-            # Find Graphics Block End
-            if sub_block_end_pattern.match(line): # Check if it's a closing bracket for the sub-block
-                in_graphics = False
-                graphics_end_index = i
-                if debug: print(f"  DEBUG: Found graphics end at index {i}")
-
-        # Inside LabelGraphics Block
-        if in_label_graphics:
-            # Find Existing Text
-            if text_pattern.match(line):
-                original_text_line_index = i
-                text_found_in_label_graphics = True
-                if debug: print(f"  DEBUG: Found existing LabelGraphics text at index {i}")
-
-            # Find LabelGraphics Block End
-            if sub_block_end_pattern.match(line): # Check if it's a closing bracket for the sub-block
-                in_label_graphics = False
-                label_graphics_end_index = i
-                if debug: print(f"  DEBUG: Found LabelGraphics end at index {i}")
-
-
-    # --- Determine Target Label (used for both 'label' and 'LabelGraphics text') ---
     target_label = ""
-    if label_value is not None:  # Use existing label if found
-        target_label = label_value.lower()
-        if debug: print(f"  DEBUG: Using existing label, lowercased: '{target_label}'")
-    elif node_name:  # Otherwise use node name
+    if label is not None:  # Use existing label if found
+        target_label = label.lower()
+    elif node_name is not None:  # Otherwise use node name
         target_label = node_name.lower()
-        if debug: print(f"  DEBUG: Using node name '{node_name}', lowercased: '{target_label}'")
-    else:
-         if debug: print(f"  DEBUG: WARNING - No node name found in buffer, cannot generate label/text.")
     target_label = target_label.replace("&", "+") # Prevent error from "&" character.
     target_label = target_label.replace("\\n", "\n") # Replace \\n with explicit newline.
+    return target_label
 
+def fix_node(node_pairs, debug=False):
+    """
+    Fixes up a single parsed node in place.
+    Adds/updates its label, sets its shape to rectangle, and updates LabelGraphics text to match the label.
 
-    # --- Prepare New/Replacement Lines ---
-    label_indent = "  " # Typical label indent
-    graphics_indent = "  " # Typical graphics block indent
-    type_indent = "    " # Typical type indent within graphics
-    labelgraphics_text_indent = "    " # Typical text indent within LabelGraphics
-
-    new_label_line = f'{label_indent}label "{target_label}"' if target_label else None
-    new_type_line = f'{type_indent}type "rectangle"'
-    new_graphics_start_line = f'{graphics_indent}graphics ['
-    new_graphics_end_line = f'{graphics_indent}]'
-    # --> New line for LabelGraphics text
-    new_labelgraphics_text_line = f'{labelgraphics_text_indent}text "{target_label}"' if target_label else None
-    # <-- End new line
-
-    label_handled = False
-    type_handled = False
-    labelgraphics_text_handled = False # Track if text was replaced
-
-    # --- Pass 2: Construct the new node block ---
-    temp_processed_lines = []
-
-    for i, line in enumerate(node_buffer):
-
-        # 1. Handle Label Replacement
-        if i == original_label_line_index:
-            if new_label_line:
-                temp_processed_lines.append(new_label_line)
-                label_handled = True
-                if debug: print(f"  DEBUG: Replaced line {i} with new label line.")
-            # else: pass # Don't add original or new if no target label
-            continue # Skip adding the original label line
-
-        # 2. Handle Type Replacement (within existing graphics block)
-        if i == original_type_line_index:
-            temp_processed_lines.append(new_type_line)
-            type_handled = True
-            if debug: print(f"  DEBUG: Replaced line {i} with new type line.")
-            continue # Skip adding the original type line
-
-        # 3. Handle LabelGraphics Text Replacement
-        if i == original_text_line_index:
-            if new_labelgraphics_text_line:
-                 temp_processed_lines.append(new_labelgraphics_text_line)
-                 labelgraphics_text_handled = True
-                 if debug: print(f"  DEBUG: Replaced line {i} with new LabelGraphics text line.")
-            # else: pass # Don't add original or new if no target label
-            continue # Skip adding the original text line
-
-        # 4. Add the original line if not replaced above
-        temp_processed_lines.append(line)
-
-        # --- Insertions (happen *after* adding the current line) ---
-
-        # 5. Insert New Label (if none existed) - Insert after name line
-        if i == name_line_index and not label_handled and original_label_line_index == -1:
-            if new_label_line:
-                # Check if the next line is LabelGraphics, insert before it if so
-                next_line_is_label_graphics = False
-                if (i + 1) < len(node_buffer) and label_graphics_start_pattern.match(node_buffer[i+1]):
-                    next_line_is_label_graphics = True
-
-                if next_line_is_label_graphics:
-                    # Insert label *before* the name line was added to temp_processed_lines
-                    # This requires inserting into temp_processed_lines at the correct index
-                    # Find index of name line in temp_processed_lines
-                    name_line_in_temp_idx = -1
-                    for k, l in enumerate(temp_processed_lines):
-                         if l == node_buffer[i]: # Find the name line we just added
-                             name_line_in_temp_idx = k
-                             break
-                    if name_line_in_temp_idx != -1:
-                         temp_processed_lines.insert(name_line_in_temp_idx + 1, new_label_line) # Insert after
-                         if debug: print(f"  DEBUG: Inserted new label line after name line (index {i}).")
-                    else: # Fallback if finding the line fails (shouldn't happen)
-                         temp_processed_lines.append(new_label_line)
-                         if debug: print(f"  DEBUG: Inserted new label line after name line (index {i}) (fallback append).")
-
-                else:
-                    # Original logic: Append after adding the name line
-                     temp_processed_lines.append(new_label_line)
-                     if debug: print(f"  DEBUG: Inserted new label line after name line (index {i}).")
-
-                label_handled = True
-
-
-        # 6. Insert New Type (if graphics existed but type didn't) - Insert before graphics end ']'
-        if i == graphics_end_index and has_graphics_block and not type_handled and not type_found_in_graphics:
-             # Insert *before* the line just added (which is the graphics ']')
-            temp_processed_lines.insert(-1, new_type_line)
-            type_handled = True
-            if debug: print(f"  DEBUG: Inserted new type line before graphics end ']' at index {i}.")
-
-    # --- Post-Iteration Modifications ---
-
-    # 7. Insert Missing Graphics Block (if none existed)
-    if not has_graphics_block:
-        insert_point = -1
-        # Try inserting after the (potentially new) label line
-        label_line_idx = -1
-        name_line_idx_in_temp = -1
-        for idx, l in enumerate(temp_processed_lines):
-             if label_pattern.match(l): label_line_idx = idx
-             if node_name_pattern.match(l): name_line_idx_in_temp = idx # Find name in temp list
-
-        if label_line_idx != -1: insert_point = label_line_idx + 1
-        elif name_line_idx_in_temp != -1: insert_point = name_line_idx_in_temp + 1
-
-        # Fallback: insert before the node's closing ']'
-        if insert_point == -1:
-             for idx, l in reversed(list(enumerate(temp_processed_lines))):
-                 if node_end_pattern.match(l): # Match node end ']'
-                     insert_point = idx
-                     break
-
-        if insert_point != -1:
-            graphics_lines_to_insert = [
-                new_graphics_start_line,
-                new_type_line,
-                new_graphics_end_line
-            ]
-            temp_processed_lines[insert_point:insert_point] = graphics_lines_to_insert
-            if debug: print(f"  DEBUG: Inserted new graphics block at index {insert_point}.")
-            type_handled = True # Type was added as part of the new block
-        else:
-             if debug: print(f"  DEBUG: WARNING - Could not find suitable insertion point for missing graphics block.")
-
+    Args:
+        node_pairs (list): The node's [key, value] pairs, as produced by gml_parser.parse_gml.
+        debug (bool): Flag to enable debug printing.
+    """
+    # Find the last occurrence of each key we care about in one scan.
+    name_index = label_index = graphics_index = label_graphics_index = -1
+    for i, (key, value) in enumerate(node_pairs):
+        if key == 'name':
+            name_index = i
+        elif key == 'label':
+            label_index = i
+        elif key == 'graphics' and isinstance(value, list):
+            graphics_index = i
+        elif key == 'LabelGraphics' and isinstance(value, list):
+            label_graphics_index = i
 
-    # 8. Final Fallback for Label Insertion (if still not handled)
-    if not label_handled and new_label_line:
-        insert_point = -1
-        for idx, l in reversed(list(enumerate(temp_processed_lines))):
-            if node_end_pattern.match(l): # Match node end ']'
-                insert_point = idx
-                break
-        if insert_point != -1:
-             temp_processed_lines.insert(insert_point, new_label_line)
-             label_handled = True
-             if debug: print(f"  DEBUG: Inserted label line before node end ']' (fallback).")
-        # else: pass # Cannot insert if end bracket wasn't found
+    # --- Determine Target Label (used for both 'label' and 'LabelGraphics text') ---
+    label = unquote(node_pairs[label_index][1]) if label_index != -1 else None
+    node_name = unquote(node_pairs[name_index][1]) if name_index != -1 else None
+    if debug and label is None and node_name is None:
+        print(f"  DEBUG: WARNING - Node has no name, cannot generate label/text.")
+    target_label = make_target_label(label, node_name)
+    if debug: print(f"  DEBUG: Node target label: '{target_label}'")
+
+    # LabelGraphics: make any existing text match the label. Done first, since the inserts below shift indices.
+    if label_graphics_index != -1:
+        label_graphics = node_pairs[label_graphics_index][1]
+        text_index = find_last(label_graphics, 'text')
+        if text_index != -1:
+            if target_label:
+                label_graphics[text_index][1] = quote(target_label)
+            else:
+                del label_graphics[text_index]
+
+    # Graphics: set the type to rectangle if the block exists.
+    if graphics_index != -1:
+        graphics = node_pairs[graphics_index][1]
+        type_index = find_last(graphics, 'type')
+        if type_index != -1:
+            graphics[type_index][1] = quote("rectangle")
+        else:
+            graphics.append(['type', quote("rectangle")])
 
+    # Label: replace the existing one, or insert it after the name (or at the end if there's no name).
+    if label_index != -1:
+        if target_label:
+            node_pairs[label_index][1] = quote(target_label)
+        else:
+            del node_pairs[label_index]
+            label_index = -1
+    elif target_label:
+        label_index = name_index + 1 if name_index != -1 else len(node_pairs)
+        node_pairs.insert(label_index, ['label', quote(target_label)])
 
-    processed_lines = temp_processed_lines
-    if debug: print(f"DEBUG: Finished processing node buffer. Output lines: {len(processed_lines)}")
-    if debug: print("-" * 20)
-    return processed_lines
+    # Missing graphics block: add one after the label, or after the name.
+    if graphics_index == -1:
+        anchor_index = label_index if label_index != -1 else name_index
+        insert_index = anchor_index + 1 if anchor_index != -1 else len(node_pairs)
+        node_pairs.insert(insert_index, ['graphics', [['type', quote("rectangle")]]])
+        if debug: print(f"  DEBUG: Inserted new graphics block at index {insert_index}.")
 
 
 def modify_gml_content(gml_content, debug=False):
     """
-    Modifies GML content using a buffering approach for node blocks.
+    Modifies GML content, fixing up every node in a single pass over the parsed tree.
 
     Args:
         gml_content (str): The original GML content as a single string.
@@ -330,55 +146,351 @@ def modify_gml_content(gml_content, debug=False):
         str: The modified GML content as a single string.
     """
     if debug: print("DEBUG: Starting GML modification process.")
-    lines = gml_content.splitlines()
-    new_lines = []
-    node_buffer = []
-    in_node = False
-    node_start_pattern = re.compile(r'^\s*node\s+\[') # Allow flexible indent for start
-    node_end_pattern = re.compile(r'^\s{2}\]') # Expect node end ']' at indent 2
-
-    for i, line in enumerate(lines):
-        # Detect node start
-        if node_start_pattern.match(line):
-            if in_node and node_buffer:
-                if debug: print(f"DEBUG: WARNING - Line {i+1}: New 'node [' found before previous one closed? Processing previous buffer.")
-                processed_node = process_node_buffer(node_buffer, debug)
-                new_lines.extend(processed_node)
-
-            in_node = True
-            node_buffer = [line]
-            if debug: print(f"DEBUG: Line {i+1}: Found 'node [', starting buffer.")
-
-        # Inside a node block
-        elif in_node:
-            node_buffer.append(line)
-            if node_end_pattern.match(line): # Check if it's the node's closing bracket
-                if debug: print(f"DEBUG: Line {i+1}: Found potential node closing ']', processing buffer.")
-                processed_node = process_node_buffer(node_buffer, debug)
-                new_lines.extend(processed_node)
-                in_node = False
-                node_buffer = []
-
-        # Outside a node block
+    pairs = parse_gml(gml_content)
+    num_nodes = 0
+    for node_pairs in iter_graph_items(pairs, 'node'):
+        fix_node(node_pairs, debug)
+        num_nodes += 1
+    if debug: print(f"DEBUG: Finished GML modification process ({num_nodes} nodes).")
+    return write_gml(pairs)
+
+
+def dot_node_label(node_name, attrs):
+    """Returns a DOT node's explicit label, or None if it just uses the node name (GraphViz's default "\\N")."""
+    label = attrs.get('label')
+    if label is None or label == "\\N":
+        return None
+    return label.replace("\\N", node_name)
+
+def dot_node_fill(attrs):
+    """Returns a DOT node's fill color: fillcolor, falling back to color as GraphViz does for filled nodes."""
+    return attrs.get('fillcolor') or attrs.get('color')
+
+def dot_to_gml(dot_graph, debug=False):
+    """
+    Converts a parsed DOT graph (from dot_parser.parse_dot) to fixed-up GML text for yEd.
+
+    Args:
+        dot_graph (dict): The parsed DOT graph.
+        debug (bool): Flag to enable debug printing.
+
+    Returns:
+        str: The GML content.
+    """
+    graph_pairs = [['directed', '1' if dot_graph['directed'] else '0']]
+    node_ids = {}
+    for node_name, attrs in dot_graph['nodes'].items():
+        node_ids[node_name] = str(len(node_ids))
+        node_pairs = [['id', node_ids[node_name]], ['name', quote(node_name)]]
+        label = dot_node_label(node_name, attrs)
+        if label is not None:
+            node_pairs.append(['label', quote(label)])
+        graphics = []
+        fill = dot_node_fill(attrs)
+        if fill:
+            graphics.append(['fill', quote(fill)])
+        node_pairs.append(['graphics', graphics])
+        fix_node(node_pairs, debug)
+        graph_pairs.append(['node', node_pairs])
+
+    for source, target, attrs in dot_graph['edges']:
+        edge_pairs = [['source', node_ids[source]], ['target', node_ids[target]]]
+        if 'label' in attrs:
+            edge_pairs.append(['label', quote(attrs['label'])])
+        if dot_graph['directed']:
+            edge_pairs.append(['graphics', [['targetArrow', quote("standard")]]])
+        graph_pairs.append(['edge', edge_pairs])
+
+    return write_gml([['graph', graph_pairs]])
+
+def dot_to_graphml(dot_graph, layout=True):
+    """
+    Converts a parsed DOT graph (from dot_parser.parse_dot) to yEd GraphML text, with the same label fix-ups as GML.
+
+    Args:
+        dot_graph (dict): The parsed DOT graph.
+        layout (bool): Size nodes to their labels and give them layered layout coordinates.
+
+    Returns:
+        str: The GraphML content.
+    """
+    nodes = []
+    node_ids = {}
+    for node_name, attrs in dot_graph['nodes'].items():
+        node_ids[node_name] = f"n{len(node_ids)}"
+        label = make_target_label(dot_node_label(node_name, attrs), node_name)
+        nodes.append({'id': node_ids[node_name], 'label': label, 'fill': dot_node_fill(attrs)})
+    edges = [
+        {'source': node_ids[source], 'target': node_ids[target], 'label': attrs.get('label')}
+        for source, target, attrs in dot_graph['edges']
+    ]
+    if layout:
+        node_numbers = {node['id']: number for number, node in enumerate(nodes)}
+        sizes = [label_size(node['label']) for node in nodes]
+        layout_edges = [(node_numbers[edge['source']], node_numbers[edge['target']]) for edge in edges]
+        centers, bends = layered_layout(len(nodes), layout_edges, sizes)
+        for node, (width, height), (center_x, center_y) in zip(nodes, sizes, centers):
+            # yEd positions nodes by their top-left corner.
+            node.update(width=width, height=height, x=center_x - width / 2, y=center_y - height / 2)
+        for edge, points in zip(edges, bends):
+            edge['points'] = points
+    return write_graphml(nodes, edges, directed=dot_graph['directed'])
+
+def convert_dot(dot_content, output_format="gml", debug=False, layout=True):
+    """
+    Converts DOT text to fixed-up GML or GraphML text in one step.
+
+    Args:
+        dot_content (str): The DOT content as a single string.
+        output_format (str): "gml" or "graphml".
+        debug (bool): Flag to enable debug printing.
+        layout (bool): For GraphML, compute a layout (see dot_to_graphml).
+
+    Returns:
+        str: The converted content.
+
+    Raises:
+        DotSyntaxError: If the DOT content can't be parsed.
+    """
+    dot_graph = parse_dot(dot_content)
+    if output_format == "graphml":
+        return dot_to_graphml(dot_graph, layout)
+    return dot_to_gml(dot_graph, debug)
+
+
+# --- Batch Conversion ---
+def is_conversion_output(file_path):
+    """
+    Checks whether a GML file found in a directory looks like this script's own output: a "<name>_fixed.gml" fix-up,
+    or a "<name>.gml" next to a "<name>.dot"/"<name>.gv" it was converted from.
+    """
+    base_path = os.path.splitext(file_path)[0]
+    return base_path.endswith("_fixed") or any(os.path.exists(base_path + extension) for extension in DOT_EXTENSIONS)
+
+def find_input_files(paths):
+    """
+    Expands the given files and directories into a sorted, de-duplicated list of input files.
+    Directories are searched recursively for DOT and GML files, skipping GML files that look like outputs of this
+    script (see is_conversion_output), with a warning. Files given explicitly are kept if they're DOT or GML.
+    """
+    found = {}
+    skipped = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dir_path, dir_names, file_names in os.walk(path):
+                dir_names.sort()
+                for file_name in sorted(file_names):
+                    file_path = os.path.join(dir_path, file_name)
+                    if file_name.lower().endswith(GML_EXTENSIONS) and is_conversion_output(file_path):
+                        skipped.append(file_path)
+                    elif file_name.lower().endswith(DOT_EXTENSIONS + GML_EXTENSIONS):
+                        found[os.path.abspath(file_path)] = file_path
+        elif path.lower().endswith(DOT_EXTENSIONS + GML_EXTENSIONS):
+            found[os.path.abspath(path)] = path
         else:
-            new_lines.append(line)
+            print(f"Warning: Skipping '{path}', not a directory or a .dot/.gv/.gml file.", file=sys.stderr)
+    if skipped:
+        print(f"Warning: Skipping {len(skipped)} GML file(s) that look like outputs of this script (name them explicitly to convert them): {', '.join(skipped)}", file=sys.stderr)
+    return [found[key] for key in sorted(found)]
+
+def output_path_for(input_path, output_format, output_dir=None):
+    """Returns where the converted version of input_path goes: next to it, or in output_dir if given."""
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    if input_path.lower().endswith(GML_EXTENSIONS):
+        output_format = "gml" # GML input is fixed up, not converted
+        base_name += "_fixed"
+    directory = output_dir if output_dir is not None else os.path.dirname(input_path)
+    return os.path.join(directory, f"{base_name}.{output_format}")
+
+def convert_file(input_path, output_path, output_format="gml", cache_dir=None, cache_max_bytes=DEFAULT_MAX_BYTES, layout=True):
+    """
+    Converts one DOT file (or fixes up one GML file) and writes the result.
+    Runs in worker processes, so errors are returned rather than raised.
+
+    Args:
+        cache_dir (str): If given, look the output up in (and add it to) the conversion cache in this directory.
+        layout (bool): Lay out GraphML output (see dot_to_graphml).
 
-    if in_node and node_buffer:
-         if debug: print("DEBUG: WARNING - End of file reached while still in node block. Processing final buffer.")
-         processed_node = process_node_buffer(node_buffer, debug)
-         new_lines.extend(processed_node)
+    Returns:
+        tuple: (input_path, output_path, seconds taken, error message or None, whether the output came from the cache)
+    """
+    start_time = time.perf_counter()
+    cached = False
+    try:
+        is_gml = input_path.lower().endswith(GML_EXTENSIONS)
+        cache = key = output_bytes = None
+        if cache_dir is not None:
+            cache = ConversionCache(cache_dir, cache_max_bytes)
+            options = {'format': 'gml-fixup' if is_gml else output_format}
+            if not is_gml and output_format == "graphml":
+                options['layout'] = layout
+            key = cache_key(input_path, 'dot_gml_import', CONVERTER_VERSION, options)
+            output_bytes = cache.get(key)
+            cached = output_bytes is not None
+
+        if output_bytes is None:
+            with open(input_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            if is_gml:
+                output_content = modify_gml_content(content)
+            else:
+                output_content = convert_dot(content, output_format, layout=layout)
+            output_bytes = output_content.encode('utf-8')
+            if cache is not None:
+                cache.put(key, output_bytes)
+
+        with open(output_path, 'wb') as f:
+            f.write(output_bytes)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return input_path, output_path, time.perf_counter() - start_time, error, cached
+
+def convert_files(input_paths, output_format="gml", output_dir=None, jobs=None, cache_dir=None, cache_max_bytes=DEFAULT_MAX_BYTES, layout=True):
+    """
+    Converts many files, in parallel across processes when there's more than one job.
+
+    Args:
+        input_paths (list): DOT/GML files, e.g. from find_input_files.
+        output_format (str): "gml" or "graphml", for DOT inputs.
+        output_dir (str): Directory for outputs; defaults to next to each input.
+        jobs (int): Number of worker processes; defaults to the number of CPUs.
+        cache_dir (str): Conversion cache directory, or None to always convert.
+        cache_max_bytes (int): Size limit for the conversion cache.
+        layout (bool): Lay out GraphML output (see dot_to_graphml).
+
+    Returns:
+        list: convert_file result tuples, in the same order as input_paths.
+    """
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    output_paths = [output_path_for(path, output_format, output_dir) for path in input_paths]
+    count = len(input_paths)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or count <= 1:
+        return [convert_file(i, o, output_format, cache_dir, cache_max_bytes, layout) for i, o in zip(input_paths, output_paths)]
+    with ProcessPoolExecutor(max_workers=min(jobs, count)) as executor:
+        return list(executor.map(convert_file, input_paths, output_paths, [output_format] * count,
+                                 [cache_dir] * count, [cache_max_bytes] * count, [layout] * count))
+
+def print_timing_summary(results, wall_time):
+    """Prints one line per converted file with its time, then totals."""
+    print("\n--- Conversion Summary ---")
+    name_width = max(len(result[0]) for result in results)
+    for input_path, output_path, seconds, error, cached in results:
+        status = f"-> {output_path}" if error is None else f"FAILED ({error})"
+        if cached:
+            status += " (cached)"
+        print(f"{input_path:<{name_width}}  {seconds:8.3f}s  {status}")
+    failed = sum(1 for result in results if result[3] is not None)
+    cpu_time = sum(result[2] for result in results)
+    print(f"{len(results) - failed} converted, {failed} failed, {cpu_time:.3f}s total conversion time, {wall_time:.3f}s wall time.")
+
+def print_cache_summary(results, cache_dir):
+    """Prints cache hit/miss counts for a batch; computed from the results since workers each have their own cache object."""
+    hits = sum(1 for result in results if result[4])
+    misses = sum(1 for result in results if result[3] is None and not result[4])
+    print(f"Cache: {hits} hit(s), {misses} miss(es) in {cache_dir}")
+
+def check_batch_inputs(args):
+    """Finds the batch inputs, exiting with an error if there are none or their outputs would collide."""
+    input_paths = find_input_files(args.inputs)
+    if not input_paths:
+        print("Error: No DOT/GML input files found.", file=sys.stderr)
+        sys.exit(1)
+    output_paths = [output_path_for(path, args.format, args.output_dir) for path in input_paths]
+    if len(set(output_paths)) != len(output_paths):
+        print("Error: Some inputs would be written to the same output file; use separate output directories.", file=sys.stderr)
+        sys.exit(1)
+    return input_paths
+
+def batch_cache_dir(args):
+    """Returns the cache directory to use, or None if caching is off."""
+    if args.cache or args.cache_dir:
+        return args.cache_dir or default_cache_dir()
+    return None
+
+def run_batch(args):
+    """Batch mode: converts the files/directories given on the command line."""
+    input_paths = check_batch_inputs(args)
+    print(f"Converting {len(input_paths)} file(s)...", file=sys.stderr)
+    start_time = time.perf_counter()
+    cache_dir = batch_cache_dir(args)
+    cache_max_bytes = int(args.cache_size_mb * 1024 * 1024)
+    results = convert_files(input_paths, args.format, args.output_dir, args.jobs, cache_dir, cache_max_bytes, not args.no_layout)
+    print_timing_summary(results, time.perf_counter() - start_time)
+    if cache_dir is not None:
+        print_cache_summary(results, cache_dir)
+    if any(result[3] is not None for result in results):
+        sys.exit(1)
 
-    if debug: print("DEBUG: Finished GML modification process.")
-    # Join lines and ensure final newline
-    result = "\n".join(new_lines)
-    if result and not result.endswith('\n'):
-        result += '\n'
-    return result
+def run_watch(args):
+    """
+    Watch mode: converts the inputs, then converts them again whenever they change, until interrupted.
+    The hash of each input's last converted content is kept in memory, so saves that don't change the content aren't
+    converted again. Inputs that fail are retried on their next change.
+    """
+    check_batch_inputs(args)
+    # Explicitly named files of other types were already warned about by find_input_files.
+    watch_paths = [path for path in args.inputs if os.path.isdir(path) or path.lower().endswith(DOT_EXTENSIONS + GML_EXTENSIONS)]
+    cache_dir = batch_cache_dir(args)
+    cache_max_bytes = int(args.cache_size_mb * 1024 * 1024)
+    converted = {} # input path -> SHA-256 of the content last converted
+    print(f"Watching {', '.join(watch_paths)} for changes. Press Ctrl+C to stop.", file=sys.stderr)
+    explicit_paths = {os.path.abspath(path) for path in watch_paths if not os.path.isdir(path)}
+    for changed in watch_files(watch_paths, DOT_EXTENSIONS + GML_EXTENSIONS, use_inotify=not args.poll):
+        digests = {}
+        for input_path in changed:
+            # Our own GML outputs land in watched directories too; converting them would fix up every output again
+            if (input_path.lower().endswith(GML_EXTENSIONS) and os.path.abspath(input_path) not in explicit_paths
+                    and is_conversion_output(input_path)):
+                continue
+            try:
+                with open(input_path, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).digest()
+            except FileNotFoundError:
+                continue
+            if converted.get(input_path) != digest:
+                digests[input_path] = digest
+        if not digests:
+            continue
+        input_paths = list(digests)
+        results = convert_files(input_paths, args.format, args.output_dir, args.jobs, cache_dir, cache_max_bytes, not args.no_layout)
+        for input_path, output_path, seconds, error, cached in results:
+            if error is None:
+                converted[input_path] = digests[input_path]
+                print(f"[{time.strftime('%H:%M:%S')}] {input_path} -> {output_path} ({seconds:.3f}s{', cached' if cached else ''})", file=sys.stderr)
+            else:
+                print(f"[{time.strftime('%H:%M:%S')}] {input_path} FAILED ({error})", file=sys.stderr)
 
 
 # --- Main Execution ---
 if __name__ == "__main__":
-    check_gv2gml()
+    parser = argparse.ArgumentParser(description='Convert DOT recipe graphs to GML or GraphML files for yEd. Reads one graph from stdin, or converts the given files/directories in batch.')
+    parser.add_argument('inputs', nargs='*', help='DOT/GML files or directories to convert in batch. If omitted, a single DOT graph is read from stdin.')
+    parser.add_argument('-f', '--format', choices=['gml', 'graphml'], default='gml', help='Output format (default: gml).')
+    parser.add_argument('-o', '--output', help='Output file path for stdin mode (default: a timestamped file in /tmp).')
+    parser.add_argument('--output-dir', help='Batch mode: write outputs here instead of next to the inputs.')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Batch mode: number of worker processes (default: number of CPUs).')
+    parser.add_argument('--cache', action='store_true', help='Batch mode: reuse cached outputs for inputs that haven\'t changed.')
+    parser.add_argument('--cache-dir', help='Batch mode: cache directory (implies --cache; default: ~/.cache/factorio-mod-scripts/graphs).')
+    parser.add_argument('--cache-size-mb', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024), help='Batch mode: cache size limit in MB (default: %(default)d).')
+    parser.add_argument('--no-layout', action='store_true', help='GraphML output: don\'t size and lay out nodes, leaving them all at the origin.')
+    parser.add_argument('--watch', action='store_true', help='Batch mode: keep running, and convert inputs again whenever they change.')
+    parser.add_argument('--poll', action='store_true', help='Watch mode: poll for changes instead of using inotify.')
+    args = parser.parse_args()
+
+    if args.watch and not args.inputs:
+        parser.error("--watch needs files or directories to watch")
+    if args.watch:
+        try:
+            run_watch(args)
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+    if args.inputs:
+        run_batch(args)
+        sys.exit(0)
 
     print("Paste your DOT file content below. Press Ctrl+D when finished.", file=sys.stderr)
     dot_content = ""
@@ -396,78 +508,28 @@ if __name__ == "__main__":
         print("Error: No input content provided.", file=sys.stderr)
         sys.exit(1)
 
-    dot_filepath, gml_filepath = generate_filenames()
-
-    # 1. Save DOT file
-    try:
-        with open(dot_filepath, 'w', encoding='utf-8') as f:
-            f.write(dot_content)
-        print(f"DOT content saved to: {dot_filepath}", file=sys.stderr)
-    except IOError as e:
-        print(f"Error writing DOT file {dot_filepath}: {e}", file=sys.stderr)
-        sys.exit(1)
+    output_filepath = args.output or generate_filename(args.format)
 
-    # 2. Run gv2gml
-    print(f"Running gv2gml to convert to: {gml_filepath}", file=sys.stderr)
-    command = ["gv2gml", dot_filepath, "-o", gml_filepath]
+    # 1. Parse DOT and convert
     try:
-        result = subprocess.run(command, check=True, capture_output=True, text=True, encoding='utf-8')
-        if DEBUG and result.stdout:
-             print(f"DEBUG gv2gml stdout:\n{result.stdout}", file=sys.stderr)
-        if result.stderr:
-             print(f"gv2gml stderr:\n{result.stderr}", file=sys.stderr)
-    except FileNotFoundError:
-        print(f"Error: 'gv2gml' command not found during execution.", file=sys.stderr)
-        sys.exit(1)
-    except subprocess.CalledProcessError as e:
-        print(f"Error running gv2gml:", file=sys.stderr)
-        print(f"Command: {' '.join(e.cmd)}", file=sys.stderr)
-        print(f"Return code: {e.returncode}", file=sys.stderr)
-        stderr_str = e.stderr.decode('utf-8', errors='ignore') if isinstance(e.stderr, bytes) else e.stderr
-        stdout_str = e.stdout.decode('utf-8', errors='ignore') if isinstance(e.stdout, bytes) else e.stdout
-        print(f"Stderr:\n{stderr_str}", file=sys.stderr)
-        print(f"Stdout:\n{stdout_str}", file=sys.stderr)
-        try:
-            os.remove(dot_filepath)
-            print(f"Removed intermediate file: {dot_filepath}", file=sys.stderr)
-        except OSError: pass
+        output_content = convert_dot(dot_content, args.format, debug=DEBUG, layout=not args.no_layout)
+    except DotSyntaxError as e:
+        print(f"Error parsing DOT input: {e}", file=sys.stderr)
         sys.exit(1)
     except Exception as e:
-         print(f"An unexpected error occurred running gv2gml: {e}", file=sys.stderr)
+         print(f"An unexpected error occurred during conversion: {e}", file=sys.stderr)
+         traceback.print_exc(file=sys.stderr)
          sys.exit(1)
 
-
-    # 3. Read and Modify GML file
-    print(f"Modifying GML file: {gml_filepath}", file=sys.stderr)
+    # 2. Save the output file
     try:
-        with open(gml_filepath, 'r', encoding='utf-8') as f:
-            original_gml_content = f.read()
-
-        modified_gml_content = modify_gml_content(original_gml_content, debug=DEBUG)
-
-        with open(gml_filepath, 'w', encoding='utf-8') as f:
-            f.write(modified_gml_content)
-
-    except FileNotFoundError:
-         print(f"Error: GML file {gml_filepath} not found after conversion.", file=sys.stderr)
-         sys.exit(1)
+        with open(output_filepath, 'w', encoding='utf-8') as f:
+            f.write(output_content)
     except IOError as e:
-        print(f"Error reading or writing GML file {gml_filepath}: {e}", file=sys.stderr)
+        print(f"Error writing output file {output_filepath}: {e}", file=sys.stderr)
         sys.exit(1)
-    except Exception as e:
-         print(f"An unexpected error occurred during GML modification: {e}", file=sys.stderr)
-         traceback.print_exc(file=sys.stderr)
-         print(f"Original GML saved at: {gml_filepath}", file=sys.stderr)
-         sys.exit(1)
 
-    # 4. Success message with final file path
+    # 3. Success message with final file path
     print(f"\nSuccessfully processed graph.", file=sys.stderr)
-    print(f"Final modified GML file is located at:")
-    print(gml_filepath)
-
-    # Optional: Clean up the original .dot file
-    # try:
-    #     os.remove(dot_filepath)
-    #     print(f"Cleaned up intermediate file: {dot_filepath}", file=sys.stderr)
-    # except OSError as e:
-    #     print(f"Warning: Could not remove intermediate DOT file {dot_filepath}: {e}", file=sys.stderr)
+    print(f"Final {args.format.upper()} file is located at:")
+    print(output_filepath)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+# Parser for the DOT graph language used by GraphViz, so DOT recipe graphs can be converted without running gv2gml.
+# Supports the full DOT grammar (graph/digraph, strict, subgraphs, attribute statements, edge chains, ports,
+# quoted/HTML strings and comments), but only keeps what's needed for conversion: nodes with their attributes in
+# order of first appearance, and edges with their attributes.
+#
+# The parsed graph is a dict:
+#   {'name': str or None, 'directed': bool, 'strict': bool, 'attrs': {graph attributes},
+#    'nodes': {node_name: {attributes}}, 'edges': [(source_name, target_name, {attributes}), ...]}
+
+import re
+import sys
+
+# --- Token Pattern (compiled once) ---
+# Order matters: comments before '/' can be misread, edge operators before numerals ('--' vs '-1').
+TOKEN_PATTERN = re.compile(r'''
+    (?P<space>[ \t\r\n\f\v]+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/|(?<![^\n])\#[^\n]*)
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<html><)
+  | (?P<edgeop>->|--)
+  | (?P<id>[A-Za-z_\u0080-\uffff][A-Za-z_0-9\u0080-\uffff]*|-?(?:\.[0-9]+|[0-9]+(?:\.[0-9]*)?))
+  | (?P<punct>[\[\]{}=;,:+])
+''', re.VERBOSE | re.DOTALL)
+
+KEYWORDS = {'strict', 'graph', 'digraph', 'node', 'edge', 'subgraph'}
+
+
+class DotSyntaxError(ValueError):
+    """Raised when DOT input can't be tokenized or parsed."""
+
+
+def tokenize_dot(dot_content):
+    """
+    Returns a list of (kind, value, line) tokens.
+    Kinds are 'id' (identifiers, numerals and strings, already unquoted), 'keyword' (lowercased), 'edgeop' and
+    'punct'. Quoted strings joined with '+' are concatenated, as in GraphViz.
+    """
+    tokens = []
+    position = 0
+    line = 1
+    length = len(dot_content)
+    while position < length:
+        match = TOKEN_PATTERN.match(dot_content, position)
+        if match is None:
+            raise DotSyntaxError(f"Line {line}: unexpected character {dot_content[position]!r}")
+        kind = match.lastgroup
+        text = match.group()
+        end = match.end()
+
+        if kind == 'html':
+            end = _find_html_end(dot_content, position, line)
+            tokens.append(('id', dot_content[position + 1:end - 1], line))
+        elif kind == 'string':
+            value = _unescape_string(text[1:-1])
+            # String concatenation: "a" + "b"
+            if len(tokens) >= 2 and tokens[-1][:2] == ('punct', '+') and tokens[-2][0] == 'string':
+                tokens.pop()
+                value = tokens.pop()[1] + value
+            tokens.append(('string', value, line))
+        elif kind == 'id':
+            if text.lower() in KEYWORDS:
+                tokens.append(('keyword', text.lower(), line))
+            else:
+                tokens.append(('id', text, line))
+        elif kind in ('edgeop', 'punct'):
+            tokens.append((kind, text, line))
+
+        line += dot_content.count("\n", position, end)
+        position = end
+
+    # Quoted strings are ordinary IDs once concatenation has been handled.
+    return [('id', value, tok_line) if kind == 'string' else (kind, value, tok_line) for kind, value, tok_line in tokens]
+
+
+def _unescape_string(text):
+    # DOT only escapes '"'; a backslash-newline is a line continuation. Other escapes such as \n and \l are kept
+    # for the consumer to interpret, as GraphViz does.
+    return text.replace('\\"', '"').replace('\\\r\n', '').replace('\\\n', '')
+
+
+def _find_html_end(dot_content, start, line):
+    depth = 0
+    for i in range(start, len(dot_content)):
+        char = dot_content[i]
+        if char == '<':
+            depth += 1
+        elif char == '>':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    raise DotSyntaxError(f"Line {line}: unterminated HTML string")
+
+
+class _DotParser:
+    """Recursive-descent parser over the token list from tokenize_dot."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+        self.graph = {'name': None, 'directed': False, 'strict': False, 'attrs': {}, 'nodes': {}, 'edges': []}
+        self.edge_keys = set() # (source, target) pairs already added, for strict graphs
+
+    # --- Token helpers ---
+    def peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None, self.last_line())
+
+    def last_line(self):
+        return self.tokens[-1][2] if self.tokens else 1
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def accept(self, kind, value=None):
+        token_kind, token_value, _ = self.peek()
+        if token_kind == kind and (value is None or token_value == value):
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, kind, value=None):
+        token_kind, token_value, line = self.peek()
+        if token_kind != kind or (value is not None and token_value != value):
+            wanted = value if value is not None else kind
+            found = token_value if token_value is not None else "end of input"
+            raise DotSyntaxError(f"Line {line}: expected {wanted!r}, found {found!r}")
+        self.position += 1
+        return token_value
+
+    # --- Grammar ---
+    def parse_graph(self):
+        graph = self.graph
+        graph['strict'] = self.accept('keyword', 'strict')
+        kind, value, line = self.next()
+        if kind != 'keyword' or value not in ('graph', 'digraph'):
+            raise DotSyntaxError(f"Line {line}: expected 'graph' or 'digraph'")
+        graph['directed'] = value == 'digraph'
+        if self.peek()[0] == 'id':
+            graph['name'] = self.next()[1]
+        self.expect('punct', '{')
+        self.parse_stmt_list({'node': {}, 'edge': {}}, top_level=True)
+        self.expect('punct', '}')
+        if self.peek()[0] is not None:
+            raise DotSyntaxError(f"Line {self.peek()[2]}: unexpected content after the graph")
+        return graph
+
+    def parse_stmt_list(self, defaults, top_level=False):
+        """Parses statements up to the closing '}'. Returns the names of all nodes mentioned, for subgraph edges."""
+        members = {}
+        while True:
+            kind, value, line = self.peek()
+            if kind is None or (kind == 'punct' and value == '}'):
+                return list(members)
+            self.parse_stmt(defaults, members, top_level)
+            self.accept('punct', ';')
+
+    def parse_stmt(self, defaults, members, top_level):
+        kind, value, line = self.peek()
+
+        # attr_stmt: (graph|node|edge) attr_list
+        if kind == 'keyword' and value in ('graph', 'node', 'edge'):
+            self.position += 1
+            attrs = self.parse_attr_lists()
+            if value == 'graph':
+                if top_level:
+                    self.graph['attrs'].update(attrs)
+            else:
+                defaults[value].update(attrs)
+            return
+
+        # ID '=' ID
+        if kind == 'id' and self.peek(1)[:2] == ('punct', '='):
+            self.position += 2
+            attr_value = self.expect('id')
+            if top_level:
+                self.graph['attrs'][value] = attr_value
+            return
+
+        # node_stmt or edge_stmt, starting with a node or a subgraph
+        operand = self.parse_edge_operand(defaults, members)
+        if self.peek()[0] == 'edgeop':
+            operands = [operand]
+            while self.accept('edgeop'):
+                operands.append(self.parse_edge_operand(defaults, members))
+            attrs = dict(defaults['edge'])
+            attrs.update(self.parse_attr_lists())
+            for sources, targets in zip(operands, operands[1:]):
+                for source in sources:
+                    for target in targets:
+                        self.add_edge(source, target, attrs)
+        elif self.peek()[:2] == ('punct', '['):
+            # node_stmt with attributes; a bare subgraph can't have an attr_list
+            attrs = self.parse_attr_lists()
+            for name in operand:
+                self.graph['nodes'][name].update(attrs)
+
+    def parse_edge_operand(self, defaults, members):
+        """Parses a node_id or subgraph, returning the list of node names it stands for."""
+        kind, value, line = self.peek()
+        if (kind == 'keyword' and value == 'subgraph') or (kind == 'punct' and value == '{'):
+            if self.accept('keyword', 'subgraph') and self.peek()[0] == 'id':
+                self.position += 1
+            self.expect('punct', '{')
+            # Subgraphs inherit the enclosing defaults, but their own attr_stmts don't leak out.
+            sub_defaults = {'node': dict(defaults['node']), 'edge': dict(defaults['edge'])}
+            names = self.parse_stmt_list(sub_defaults)
+            self.expect('punct', '}')
+            for name in names:
+                members[name] = None
+            return names
+
+        name = self.expect('id')
+        # Ports (node:port:compass) don't matter for conversion.
+        while self.accept('punct', ':'):
+            self.expect('id')
+        if name not in self.graph['nodes']:
+            self.graph['nodes'][name] = dict(defaults['node'])
+        members[name] = None
+        return [name]
+
+    def parse_attr_lists(self):
+        attrs = {}
+        while self.accept('punct', '['):
+            while not self.accept('punct', ']'):
+                key = self.expect('id')
+                if self.accept('punct', '='):
+                    attrs[key] = self.expect('id')
+                else:
+                    attrs[key] = 'true'
+                if not self.accept('punct', ','):
+                    self.accept('punct', ';')
+        return attrs
+
+    def add_edge(self, source, target, attrs):
+        graph = self.graph
+        if graph['strict']:
+            key = (source, target) if graph['directed'] else tuple(sorted((source, target)))
+            if key in self.edge_keys:
+                return
+            self.edge_keys.add(key)
+        graph['edges'].append((source, target, dict(attrs)))
+
+
+def parse_dot(dot_content):
+    """
+    Parses DOT text into a graph dict (see the top of this file).
+
+    Args:
+        dot_content (str): The DOT content as a single string.
+
+    Returns:
+        dict: The parsed graph.
+    """
+    return _DotParser(tokenize_dot(dot_content)).parse_graph()
+
+
+if __name__ == "__main__":
+    # Prints a summary of a DOT file from stdin, mainly useful for checking that a file parses.
+    try:
+        graph = parse_dot(sys.stdin.read())
+    except DotSyntaxError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    kind = "digraph" if graph['directed'] else "graph"
+    print(f"{kind} {graph['name'] or ''}: {len(graph['nodes'])} nodes, {len(graph['edges'])} edges")
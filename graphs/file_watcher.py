@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+# Watches files and directories for changes, for the --watch modes of graphml_to_text.py and dot_gml_import.py.
+# On Linux, inotify (through ctypes, so nothing needs installing) wakes the watcher up as soon as something is written;
+# elsewhere, or if inotify can't be set up, the watched files are polled instead.
+# Either way, a change only counts once the files have stopped changing for the debounce interval, so an editor that
+# saves in several writes (yEd does) triggers one re-export. Changes are detected by comparing each file's size and
+# modification time with the previous scan, so only files that actually changed are reported.
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+
+DEFAULT_DEBOUNCE = 0.5 # Seconds files must be unchanged before a change is reported
+DEFAULT_POLL_INTERVAL = 1.0 # Seconds between scans when polling
+
+# inotify constants, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII") # wd, mask, cookie, name length
+
+
+def scan_files(paths, extensions):
+    """
+    Lists the files to watch with their current state.
+
+    Args:
+        paths (list): Files and directories. Directories are searched recursively for files with the given extensions;
+            files given explicitly are always included while they exist.
+        extensions (tuple): Lowercase file extensions, e.g. (".graphml",).
+
+    Returns:
+        dict: File path -> (size, modification time in ns).
+    """
+    found = {}
+
+    def add(file_path):
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return # Deleted between listing and stat
+        found[file_path] = (stat.st_size, stat.st_mtime_ns)
+
+    for path in paths:
+        if os.path.isdir(path):
+            for dir_path, dir_names, file_names in os.walk(path):
+                for file_name in file_names:
+                    if file_name.lower().endswith(extensions):
+                        add(os.path.join(dir_path, file_name))
+        else:
+            add(path)
+    return found
+
+
+class _InotifyWaiter:
+    """Blocks until inotify reports activity in the watched directories."""
+
+    def __init__(self, paths):
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch # AttributeError if this libc has no inotify
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.directories = {} # watch descriptor -> directory path
+        try:
+            for path in paths:
+                if os.path.isdir(path):
+                    for dir_path, _, _ in os.walk(path):
+                        self._watch(dir_path)
+                else:
+                    # Watch the parent, since editors often replace a file rather than rewrite it.
+                    self._watch(os.path.dirname(path) or ".")
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _watch(self, directory):
+        wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"Can't watch {directory}: {os.strerror(error)}")
+        self.directories[wd] = directory
+
+    def wait(self, timeout=None):
+        """Waits up to timeout seconds (forever if None) for activity. Returns whether there was any."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            self._handle_events(data)
+        return True
+
+    def _handle_events(self, data):
+        """Starts watching directories created inside watched ones."""
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and wd in self.directories:
+                new_directory = os.path.join(self.directories[wd], os.fsdecode(name))
+                try:
+                    for dir_path, _, _ in os.walk(new_directory):
+                        self._watch(dir_path)
+                except OSError as e:
+                    print(f"Warning: {e}", file=sys.stderr)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollWaiter:
+    """Stands in for _InotifyWaiter by sleeping. It can't see activity, so the caller has to scan after every wait."""
+
+    def __init__(self, poll_interval):
+        self.poll_interval = poll_interval
+
+    def wait(self, timeout=None):
+        time.sleep(self.poll_interval if timeout is None else timeout)
+        return False
+
+    def close(self):
+        pass
+
+
+def watch_files(paths, extensions, debounce=DEFAULT_DEBOUNCE, poll_interval=DEFAULT_POLL_INTERVAL, use_inotify=True):
+    """
+    Yields sorted lists of files that are new or have changed: first every existing file, then each batch of changes
+    once the files have settled. Runs until interrupted.
+
+    Args:
+        paths (list): Files and directories to watch; see scan_files.
+        extensions (tuple): Lowercase extensions of files to pick up in directories.
+        debounce (float): Seconds the files must stay unchanged before a batch is reported.
+        poll_interval (float): Seconds between scans when polling.
+        use_inotify (bool): Try inotify before falling back to polling.
+    """
+    waiter = None
+    if use_inotify and sys.platform.startswith("linux"):
+        try:
+            waiter = _InotifyWaiter(paths)
+        except (AttributeError, OSError) as e:
+            if isinstance(e, OSError) and e.errno == errno.ENOSPC:
+                print("Warning: Out of inotify watches (see fs.inotify.max_user_watches); polling instead.", file=sys.stderr)
+            else:
+                print(f"Warning: Can't use inotify ({e}); polling instead.", file=sys.stderr)
+    if waiter is None:
+        waiter = _PollWaiter(poll_interval)
+
+    try:
+        state = scan_files(paths, extensions)
+        yield sorted(state)
+        while True:
+            waiter.wait()
+            new_state = scan_files(paths, extensions)
+            if new_state == state:
+                continue
+            # Debounce: wait until the files have been quiet for a whole interval.
+            while True:
+                active = waiter.wait(debounce)
+                settled_state = scan_files(paths, extensions)
+                if not active and settled_state == new_state:
+                    break
+                new_state = settled_state
+            changed = [path for path, file_state in new_state.items() if state.get(path) != file_state]
+            state = new_state
+            if changed:
+                yield sorted(changed)
+    finally:
+        waiter.close()
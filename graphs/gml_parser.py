@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+# Tokenizer, parser and writer for GML (Graph Modelling Language) files, as produced by gv2gml and read by yEd.
+# GML is a tree of `key value` pairs, where a value is a number, a "quoted string", or a `[ ... ]` list of more pairs.
+# The tree is represented as nested Python lists of [key, value] pairs, where each value is either the raw token text
+# (strings keep their quotes, so they can be written back unchanged) or another list of pairs.
+
+import re
+import sys
+
+# --- Token Pattern (compiled once) ---
+# GML strings can't contain '"' and have no escape sequences, but may span multiple lines.
+# Every token is classified by its first character; a lone '"' only matches the last alternative, so it marks an unterminated string.
+TOKEN_PATTERN = re.compile(r'"[^"]*"|[\[\]]|#[^\n]*|[^\s\[\]"]+|"')
+
+INDENT = "  "
+
+
+class GmlSyntaxError(ValueError):
+    """Raised when GML input can't be tokenized or parsed."""
+
+
+def _token_kind(token):
+    first = token[0]
+    if first == '"':
+        return 'string' if len(token) > 1 else 'unterminated'
+    if first == '[':
+        return 'open'
+    if first == ']':
+        return 'close'
+    if first == '#':
+        return 'comment'
+    return 'atom'
+
+
+def tokenize_gml(gml_content):
+    """
+    Yields (kind, text) tokens from GML text in a single pass.
+    Kinds are 'string', 'open', 'close' and 'atom' (keys and numbers). Whitespace and comments are skipped.
+    """
+    for match in TOKEN_PATTERN.finditer(gml_content):
+        token = match.group()
+        kind = _token_kind(token)
+        if kind == 'comment':
+            continue
+        if kind == 'unterminated':
+            raise _unterminated_error(gml_content, match.start())
+        yield kind, token
+
+
+def _unterminated_error(gml_content, position):
+    line = gml_content.count("\n", 0, position) + 1
+    return GmlSyntaxError(f"Unterminated string starting on line {line}")
+
+
+def parse_gml(gml_content):
+    """
+    Parses GML text into a list of [key, value] pairs.
+
+    Args:
+        gml_content (str): The GML content as a single string.
+
+    Returns:
+        list: Top-level pairs, usually a single ['graph', [...]] pair.
+    """
+    root = []
+    stack = [] # Enclosing lists of the list currently being filled
+    current = root
+    key = None
+    # Dispatches on the first character of findall's plain strings rather than going through tokenize_gml;
+    # this loop is the hot path for big graphs.
+    for token in TOKEN_PATTERN.findall(gml_content):
+        first = token[0]
+        if first == '#':
+            continue
+        if first == '"' and len(token) == 1:
+            raise _unterminated_error(gml_content, gml_content.rfind('"'))
+        if key is None:
+            if first == ']':
+                if not stack:
+                    raise GmlSyntaxError("Unexpected ']' at top level")
+                current = stack.pop()
+            elif first == '[' or first == '"':
+                raise GmlSyntaxError(f"Expected a key, found {token!r}")
+            else:
+                key = token
+        else:
+            if first == '[':
+                new_list = []
+                current.append([key, new_list])
+                stack.append(current)
+                current = new_list
+            elif first == ']':
+                raise GmlSyntaxError(f"Key {key!r} has no value")
+            else:
+                current.append([key, token])
+            key = None
+    if key is not None:
+        raise GmlSyntaxError(f"Key {key!r} has no value at end of input")
+    if stack:
+        raise GmlSyntaxError(f"{len(stack)} unclosed '[' at end of input")
+    return root
+
+
+def write_gml(pairs):
+    """Serializes a list of [key, value] pairs back to GML text, indenting each nesting level by two spaces."""
+    out = []
+    # Explicit stack of iterators instead of recursion, so deeply nested input can't hit the recursion limit.
+    stack = [iter(pairs)]
+    while stack:
+        depth = len(stack) - 1
+        for key, value in stack[-1]:
+            if isinstance(value, list):
+                out.append(f"{INDENT * depth}{key} [\n")
+                stack.append(iter(value))
+                break
+            out.append(f"{INDENT * depth}{key} {value}\n")
+        else:
+            stack.pop()
+            if stack:
+                out.append(f"{INDENT * (len(stack) - 1)}]\n")
+    return "".join(out)
+
+
+def quote(text):
+    """Makes a GML string token from text. GML strings can't contain '"', so it's written as an HTML entity."""
+    return '"' + text.replace('"', '&quot;') + '"'
+
+
+def unquote(token):
+    """Returns the text of a GML string token, or the token unchanged if it isn't a string."""
+    if len(token) >= 2 and token[0] == '"' and token[-1] == '"':
+        return token[1:-1].replace('&quot;', '"')
+    return token
+
+
+def find_last(pairs, key):
+    """Returns the index of the last pair with the given key, or -1."""
+    for i in range(len(pairs) - 1, -1, -1):
+        if pairs[i][0] == key:
+            return i
+    return -1
+
+
+def iter_graph_items(pairs, item_key):
+    """Yields the pair lists of every `item_key [...]` (e.g. 'node' or 'edge') directly inside top-level graphs."""
+    for key, value in pairs:
+        if key == 'graph' and isinstance(value, list):
+            for sub_key, sub_value in value:
+                if sub_key == item_key and isinstance(sub_value, list):
+                    yield sub_value
+
+
+if __name__ == "__main__":
+    # Normalizes a GML file from stdin, mainly useful for checking that a file parses.
+    try:
+        sys.stdout.write(write_gml(parse_gml(sys.stdin.read())))
+    except GmlSyntaxError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+
+# Layered (Sugiyama-style) layout for recipe graphs, so converted GraphML opens in yEd already readable, without the
+# manual "fit node to label" and auto-layout steps. Edges flow top to bottom, which for recipe graphs alternates item and
+# recipe layers. The steps, each close to linear time so thousands of nodes take seconds:
+#   1. Cycle breaking: edges that close a loop (found by depth-first search) are laid out reversed.
+#   2. Layering: longest path from the sources; edges spanning several layers get a dummy node per layer crossed, which
+#      become the edge's bend points.
+#   3. Crossing reduction: alternating down/up sweeps that sort each layer by the barycenter of its neighbours in the
+#      previous layer. Crossings are counted after each sweep with a Fenwick tree (O(E log V)) and the best order kept.
+#   4. Coordinates: each layer is pulled towards its neighbours' positions while keeping the order and spacing, by
+#      solving that least-squares problem exactly with pool-adjacent-violators.
+# Node sizes come from their label text, estimated with yEd's default 12pt font.
+
+CHAR_WIDTH = 7.0 # Average character width of yEd's default label font
+LINE_HEIGHT = 18.0
+LABEL_PADDING_X = 8.0
+LABEL_PADDING_Y = 6.0
+MIN_NODE_SIZE = 30.0
+NODE_GAP = 20.0 # Horizontal space between neighbouring nodes
+DUMMY_WIDTH = 10.0 # Horizontal space reserved for an edge passing through a layer
+LAYER_GAP = 60.0 # Vertical space between layers
+CROSSING_SWEEPS = 12 # Maximum down+up sweep pairs
+CROSSING_PATIENCE = 2 # Stop after this many sweep pairs without fewer crossings
+POSITION_SWEEPS = 4
+
+
+def label_size(label):
+    """Returns an estimated (width, height) for a node showing label; "\\n" in the label starts a new line."""
+    lines = label.split("\n") if label else [""]
+    width = max(len(line) for line in lines) * CHAR_WIDTH + 2 * LABEL_PADDING_X
+    height = len(lines) * LINE_HEIGHT + 2 * LABEL_PADDING_Y
+    return max(width, MIN_NODE_SIZE), max(height, MIN_NODE_SIZE)
+
+
+def _reversed_edges(num_nodes, edges):
+    """Returns the set of edge indexes to reverse to make the graph acyclic: the back edges of an iterative DFS."""
+    out_edges = [[] for _ in range(num_nodes)]
+    for edge_index, (source, target) in enumerate(edges):
+        out_edges[source].append(edge_index)
+    state = [0] * num_nodes # 0: unvisited, 1: on the DFS stack, 2: done
+    reversed_edges = set()
+    for root in range(num_nodes):
+        if state[root]:
+            continue
+        state[root] = 1
+        stack = [(root, 0)]
+        while stack:
+            node, position = stack[-1]
+            if position < len(out_edges[node]):
+                stack[-1] = (node, position + 1)
+                edge_index = out_edges[node][position]
+                target = edges[edge_index][1]
+                if state[target] == 1:
+                    reversed_edges.add(edge_index)
+                elif state[target] == 0:
+                    state[target] = 1
+                    stack.append((target, 0))
+            else:
+                state[node] = 2
+                stack.pop()
+    return reversed_edges
+
+
+def _longest_path_layers(num_nodes, dag_edges):
+    """
+    Assigns each node the layer one below its deepest predecessor, with Kahn's topological sort.
+    Then, going back up, nodes with more outgoing than incoming edges are moved down to just above their highest
+    successor, which shortens their edges overall. That mostly moves raw resources next to where they're first used,
+    and saves many dummy nodes.
+    """
+    successors = [[] for _ in range(num_nodes)]
+    in_degree = [0] * num_nodes
+    for source, target in dag_edges:
+        successors[source].append(target)
+        in_degree[target] += 1
+    degree_in = list(in_degree)
+    layer = [0] * num_nodes
+    order = []
+    ready = [node for node in range(num_nodes) if in_degree[node] == 0]
+    while ready:
+        node = ready.pop()
+        order.append(node)
+        for target in successors[node]:
+            if layer[node] + 1 > layer[target]:
+                layer[target] = layer[node] + 1
+            in_degree[target] -= 1
+            if in_degree[target] == 0:
+                ready.append(target)
+
+    for node in reversed(order):
+        node_successors = successors[node]
+        if len(node_successors) > degree_in[node]:
+            lowest = min(layer[target] for target in node_successors) - 1
+            if lowest > layer[node]:
+                layer[node] = lowest
+    return layer
+
+
+def _count_crossings(upper_position, lower_position, segments, num_lower):
+    """
+    Counts crossings between two adjacent layers with a Fenwick tree (Barth, Juenger & Mutzel), in O(E log V).
+    segments are (upper node, lower node) pairs.
+    """
+    ordered = sorted((upper_position[upper], lower_position[lower]) for upper, lower in segments)
+    tree = [0] * (num_lower + 1)
+    crossings = 0
+    for count, (_, lower) in enumerate(ordered):
+        # Segments seen so far that end to the right of this one cross it.
+        index = lower + 1
+        not_crossing = 0
+        while index > 0:
+            not_crossing += tree[index]
+            index -= index & -index
+        crossings += count - not_crossing
+        index = lower + 1
+        while index <= num_lower:
+            tree[index] += 1
+            index += index & -index
+    return crossings
+
+
+def _pav_positions(desired, separations):
+    """
+    Places a row of nodes as close as possible (least squares) to their desired centers, keeping their order and
+    x[i + 1] - x[i] >= separations[i]. Substituting y[i] = x[i] - (sum of separations before i) turns this into
+    isotonic regression, solved in linear time by pool-adjacent-violators.
+    """
+    offsets = [0.0]
+    for separation in separations:
+        offsets.append(offsets[-1] + separation)
+    blocks = [] # [mean, count]
+    for value, offset in zip(desired, offsets):
+        blocks.append([value - offset, 1])
+        while len(blocks) > 1 and blocks[-2][0] > blocks[-1][0]:
+            mean, count = blocks.pop()
+            previous = blocks[-1]
+            previous[0] = (previous[0] * previous[1] + mean * count) / (previous[1] + count)
+            previous[1] += count
+    positions = []
+    for mean, count in blocks:
+        positions.extend([mean] * count)
+    return [position + offset for position, offset in zip(positions, offsets)]
+
+
+def _neighbour_means(nodes, segments, values, from_upper):
+    """
+    For each node, the mean of values over its neighbours through segments (from the layer above if from_upper,
+    else from the layer below), or None if it has none. One pass over the segments, rather than one per node.
+    """
+    totals = dict.fromkeys(nodes, 0.0)
+    counts = dict.fromkeys(nodes, 0)
+    if from_upper:
+        for upper, lower in segments:
+            totals[lower] += values[upper]
+            counts[lower] += 1
+    else:
+        for upper, lower in segments:
+            totals[upper] += values[lower]
+            counts[upper] += 1
+    return [totals[node] / counts[node] if counts[node] else None for node in nodes]
+
+
+def layered_layout(num_nodes, edges, sizes):
+    """
+    Computes a layered layout.
+
+    Args:
+        num_nodes (int): Nodes are numbered 0 .. num_nodes - 1.
+        edges (list): (source, target) node pairs. Self-loops are allowed but don't affect the layout.
+        sizes (list): (width, height) of each node.
+
+    Returns:
+        tuple: (centers, bends). centers[node] is the (x, y) center of each node; bends[edge index] is the list of
+            (x, y) bend points of each edge, from source to target.
+    """
+    reversed_edges = _reversed_edges(num_nodes, edges)
+    dag_edges = []
+    for edge_index, (source, target) in enumerate(edges):
+        if source == target:
+            continue
+        dag_edges.append((target, source) if edge_index in reversed_edges else (source, target))
+    layer = _longest_path_layers(num_nodes, dag_edges)
+
+    # Split edges spanning several layers into unit segments through dummy nodes.
+    widths = [width for width, _ in sizes]
+    chains = {} # edge index -> dummy nodes from the upper end to the lower end
+    segments = []
+    for edge_index, (source, target) in enumerate(edges):
+        if source == target:
+            continue
+        upper, lower = (target, source) if edge_index in reversed_edges else (source, target)
+        chain = []
+        previous = upper
+        for dummy_layer in range(layer[upper] + 1, layer[lower]):
+            dummy = len(layer)
+            layer.append(dummy_layer)
+            widths.append(DUMMY_WIDTH)
+            chain.append(dummy)
+            segments.append((previous, dummy))
+            previous = dummy
+        segments.append((previous, lower))
+        if chain:
+            chains[edge_index] = chain
+
+    total_nodes = len(layer)
+    num_layers = max(layer) + 1 if layer else 0
+    down_neighbours = [[] for _ in range(total_nodes)]
+    segments_below = [[] for _ in range(num_layers)] # upper layer -> segments to the layer below
+    for upper, lower in segments:
+        down_neighbours[upper].append(lower)
+        segments_below[layer[upper]].append((upper, lower))
+
+    # Initial order: depth-first from the top, which keeps connected nodes near each other.
+    layers = [[] for _ in range(num_layers)]
+    placed = [False] * total_nodes
+    for root in sorted(range(total_nodes), key=lambda node: layer[node]):
+        if placed[root]:
+            continue
+        placed[root] = True
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            layers[layer[node]].append(node)
+            for neighbour in reversed(down_neighbours[node]):
+                if not placed[neighbour]:
+                    placed[neighbour] = True
+                    stack.append(neighbour)
+    position = [0] * total_nodes
+    for nodes in layers:
+        for index, node in enumerate(nodes):
+            position[node] = index
+
+    def total_crossings():
+        return sum(
+            _count_crossings(position, position, segments_below[layer_index], len(layers[layer_index + 1]))
+            for layer_index in range(num_layers - 1)
+        )
+
+    def sort_layer(layer_index, from_upper):
+        nodes = layers[layer_index]
+        layer_segments = segments_below[layer_index - 1] if from_upper else segments_below[layer_index]
+        means = _neighbour_means(nodes, layer_segments, position, from_upper)
+        # Nodes with no neighbours on that side keep their place.
+        keys = {node: position[node] if mean is None else mean for node, mean in zip(nodes, means)}
+        nodes.sort(key=keys.__getitem__)
+        for index, node in enumerate(nodes):
+            position[node] = index
+
+    best_crossings = total_crossings()
+    best_layers = [list(nodes) for nodes in layers]
+    sweeps_without_improvement = 0
+    for _ in range(CROSSING_SWEEPS):
+        if best_crossings == 0 or sweeps_without_improvement >= CROSSING_PATIENCE:
+            break
+        for layer_index in range(1, num_layers):
+            sort_layer(layer_index, True)
+        for layer_index in range(num_layers - 2, -1, -1):
+            sort_layer(layer_index, False)
+        crossings = total_crossings()
+        if crossings < best_crossings:
+            best_crossings = crossings
+            best_layers = [list(nodes) for nodes in layers]
+            sweeps_without_improvement = 0
+        else:
+            sweeps_without_improvement += 1
+    layers = best_layers
+
+    # Horizontal coordinates: start packed and centered, then pull each layer towards its neighbours.
+    x = [0.0] * total_nodes
+    separations = []
+    for nodes in layers:
+        gaps = [(widths[a] + widths[b]) / 2 + NODE_GAP for a, b in zip(nodes, nodes[1:])]
+        separations.append(gaps)
+        start = -sum(gaps) / 2
+        for node, offset in zip(nodes, [0.0] + gaps):
+            start += offset
+            x[node] = start
+
+    def place_layer(layer_index, from_upper):
+        nodes = layers[layer_index]
+        if not nodes:
+            return
+        layer_segments = segments_below[layer_index - 1] if from_upper else segments_below[layer_index]
+        means = _neighbour_means(nodes, layer_segments, x, from_upper)
+        desired = [x[node] if mean is None else mean for node, mean in zip(nodes, means)]
+        for node, new_x in zip(nodes, _pav_positions(desired, separations[layer_index])):
+            x[node] = new_x
+
+    for _ in range(POSITION_SWEEPS):
+        for layer_index in range(1, num_layers):
+            place_layer(layer_index, True)
+        for layer_index in range(num_layers - 2, -1, -1):
+            place_layer(layer_index, False)
+
+    # Vertical coordinates: each layer as tall as its tallest node.
+    layer_heights = [0.0] * num_layers
+    for node in range(num_nodes):
+        layer_heights[layer[node]] = max(layer_heights[layer[node]], sizes[node][1])
+    layer_y = []
+    top = 0.0
+    for height in layer_heights:
+        layer_y.append(top + height / 2)
+        top += height + LAYER_GAP
+
+    min_x = min((x[node] - widths[node] / 2 for node in range(total_nodes)), default=0.0)
+    centers = [(x[node] - min_x, layer_y[layer[node]]) for node in range(num_nodes)]
+    bends = [[] for _ in edges]
+    for edge_index, chain in chains.items():
+        points = [(x[dummy] - min_x, layer_y[layer[dummy]]) for dummy in chain]
+        if edge_index in reversed_edges:
+            points.reverse()
+        bends[edge_index] = points
+    return centers, bends
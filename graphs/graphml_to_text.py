@@ -5,12 +5,23 @@
 # The yEd file should have an arrow from every item/fluid to recipes where it's an ingredient, and an arrow from every recipe to items/fluids it produces.
 # The resulting text format has one line for every recipe, like: `recipe_name: input1 + input2 -> output1 + output2`.
 # Code written by Gemini 2.5 Pro.
+#
+# With --watch, the given file or directory is watched (see file_watcher.py) and each .graphml file is re-exported to a
+# .txt file next to it (or in --output-dir) whenever it's saved, e.g.
+#   python graphml_to_text.py designs/ --watch
 
 import xml.etree.ElementTree as ET
+import re
+import os
 import sys
+import time
+import hashlib
 import argparse
 from collections import defaultdict
 
+from conversion_cache import ConversionCache, cache_key
+from file_watcher import watch_files
+
 # Define the yEd/GraphML namespaces to correctly parse the file
 # Using a placeholder for the default namespace is common practice
 NAMESPACES = {
@@ -24,6 +35,11 @@ NAMESPACES = {
 ITEM_COLOR = "#CCFFFF"
 RECIPE_COLOR = "#FFCC99"
 
+CONVERTER_VERSION = 1 # Bump when the text output changes, to invalidate cached outputs
+
+# First number in an edge label, e.g. "2", "0.5x" or "x3", taken as the ingredient/product amount
+AMOUNT_PATTERN = re.compile(r'\d*\.?\d+(?:[eE][-+]?\d+)?')
+
 def get_node_info(node_element):
     """Extracts ID, label, and type (item, recipe, or unknown) from a node element."""
     node_id = node_element.get('id')
@@ -55,57 +71,97 @@ def get_node_info(node_element):
 
     return node_id, label, node_type
 
-def process_graphml(graphml_file):
-    """
-    Parses a yEd GraphML file and prints Factorio recipes.
+def get_edge_label(edge_element):
+    """Returns the text of an edge's first yEd EdgeLabel, or None."""
+    edge_label_element = edge_element.find('.//y:EdgeLabel', NAMESPACES)
+    if edge_label_element is not None and edge_label_element.text:
+        return edge_label_element.text.strip()
+    return None
 
-    Args:
-        graphml_file (str): Path to the GraphML file.
-    """
-    try:
-        tree = ET.parse(graphml_file)
-        root = tree.getroot()
-    except ET.ParseError as e:
-        print(f"Error parsing XML file: {e}", file=sys.stderr)
-        sys.exit(1)
-    except FileNotFoundError:
-        print(f"Error: File not found: {graphml_file}", file=sys.stderr)
-        sys.exit(1)
+def parse_amount(edge_label):
+    """Returns the amount given by an edge label, defaulting to 1 for missing or non-numeric labels."""
+    if edge_label:
+        match = AMOUNT_PATTERN.search(edge_label)
+        if match:
+            return float(match.group())
+    return 1.0
 
-    graph_element = root.find('gm:graph', NAMESPACES)
-    if graph_element is None:
-        print("Error: Could not find <graph> element in the GraphML file.", file=sys.stderr)
-        sys.exit(1)
-
-    nodes_info = {} # Store {node_id: (label, type)}
-    recipe_nodes = {} # Store {recipe_id: {'name': recipe_name, 'inputs': [], 'outputs': []}}
+def iter_graph_records(graph_element):
+    """
+    Yields node and edge records from an already-parsed <graph> element.
 
-    # --- Pass 1: Process all nodes ---
+    Records are tuples: ('node', node_id, label, node_type) or ('edge', source_id, target_id, edge_label).
+    """
     for node_element in graph_element.findall('gm:node', NAMESPACES):
         node_id, label, node_type = get_node_info(node_element)
         if node_id:
-            nodes_info[node_id] = (label, node_type)
-            if node_type == 'recipe':
-                recipe_nodes[node_id] = {'name': label, 'inputs': [], 'outputs': []}
+            yield ('node', node_id, label, node_type)
+    for edge_element in graph_element.findall('gm:edge', NAMESPACES):
+        yield ('edge', edge_element.get('source'), edge_element.get('target'), get_edge_label(edge_element))
 
-    if not recipe_nodes:
-        print("No recipe nodes (orange color: {}) found in the graph.".format(RECIPE_COLOR))
-        return
+def iter_graphml_records_streaming(graphml_file):
+    """
+    Yields the same records as iter_graph_records, but reads the file incrementally with iterparse.
+    Each top-level node/edge element is cleared as soon as its record has been emitted, so memory use
+    doesn't grow with the size of the file.
 
-    # --- Pass 2: Process all edges to link items and recipes ---
-    for edge_element in graph_element.findall('gm:edge', NAMESPACES):
-        source_id = edge_element.get('source')
-        target_id = edge_element.get('target')
+    Raises ET.ParseError or FileNotFoundError like ET.parse, and ValueError if there's no <graph> element.
+    """
+    graph_tag = '{%s}graph' % NAMESPACES['gm']
+    node_tag = '{%s}node' % NAMESPACES['gm']
+    edge_tag = '{%s}edge' % NAMESPACES['gm']
 
-        if not source_id or not target_id:
-            print(f"Warning: Skipping edge with missing source/target ID.", file=sys.stderr)
+    root = None
+    top_graph = None # The first <graph> directly under the root, same as root.find('gm:graph')
+    in_top_graph = False
+    depth = 0
+    for event, element in ET.iterparse(graphml_file, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if depth == 1:
+                root = element
+            elif depth == 2 and top_graph is None and element.tag == graph_tag:
+                top_graph = element
+                in_top_graph = True
             continue
 
-        # Check if source and target nodes exist in our parsed info
-        if source_id not in nodes_info or target_id not in nodes_info:
-            print(f"Warning: Skipping edge connecting unknown node(s): {source_id} -> {target_id}", file=sys.stderr)
-            continue
+        depth -= 1
+        if in_top_graph and depth == 2:
+            # Direct child of the top-level graph; its subtree is complete now.
+            if element.tag == node_tag:
+                node_id, label, node_type = get_node_info(element)
+                if node_id:
+                    yield ('node', node_id, label, node_type)
+            elif element.tag == edge_tag:
+                yield ('edge', element.get('source'), element.get('target'), get_edge_label(element))
+            element.clear()
+            top_graph.clear()
+        elif depth == 1:
+            # Direct child of the root (keys, graphs, data), nothing more to read from it.
+            if element is top_graph:
+                in_top_graph = False
+            root.clear()
 
+    if top_graph is None:
+        raise ValueError("Could not find <graph> element in the GraphML file.")
+
+def collect_recipes(records):
+    """
+    Links item and recipe nodes using the given node/edge records.
+
+    Args:
+        records: Iterable of records from iter_graph_records or iter_graphml_records_streaming.
+
+    Returns:
+        tuple: (nodes_info, recipe_nodes), where nodes_info is {node_id: (label, type)} and
+            recipe_nodes is {recipe_id: {'name': recipe_name, 'inputs': [], 'outputs': [], 'input_amounts': [],
+            'output_amounts': []}} in file order. Amounts come from edge labels, see parse_amount.
+    """
+    nodes_info = {} # Store {node_id: (label, type)}
+    recipe_nodes = {} # Store {recipe_id: {'name': recipe_name, 'inputs': [], 'outputs': [], ...}}
+    pending_edges = [] # Edges seen before one of their nodes, only possible when streaming
+
+    def link_edge(source_id, target_id, edge_label):
         source_label, source_type = nodes_info[source_id]
         target_label, target_type = nodes_info[target_id]
 
@@ -113,36 +169,245 @@ def process_graphml(graphml_file):
         if source_type == 'item' and target_type == 'recipe':
             if target_id in recipe_nodes:
                 recipe_nodes[target_id]['inputs'].append(source_label)
+                recipe_nodes[target_id]['input_amounts'].append(parse_amount(edge_label))
             else:
                  print(f"Warning: Edge points to recipe node '{target_id}' ({target_label}) which was not correctly identified.", file=sys.stderr)
 
-
         # Edge: Recipe -> Item (Output)
         elif source_type == 'recipe' and target_type == 'item':
             if source_id in recipe_nodes:
                 recipe_nodes[source_id]['outputs'].append(target_label)
+                recipe_nodes[source_id]['output_amounts'].append(parse_amount(edge_label))
             else:
                 print(f"Warning: Edge originates from recipe node '{source_id}' ({source_label}) which was not correctly identified.", file=sys.stderr)
 
+    for record in records:
+        if record[0] == 'node':
+            _, node_id, label, node_type = record
+            nodes_info[node_id] = (label, node_type)
+            if node_type == 'recipe':
+                recipe_nodes[node_id] = {'name': label, 'inputs': [], 'outputs': [], 'input_amounts': [], 'output_amounts': []}
+            continue
+
+        _, source_id, target_id, edge_label = record
+        if not source_id or not target_id:
+            print(f"Warning: Skipping edge with missing source/target ID.", file=sys.stderr)
+            continue
+        if source_id in nodes_info and target_id in nodes_info:
+            link_edge(source_id, target_id, edge_label)
+        else:
+            pending_edges.append((source_id, target_id, edge_label))
+
+    for source_id, target_id, edge_label in pending_edges:
+        # Check if source and target nodes exist in our parsed info
+        if source_id not in nodes_info or target_id not in nodes_info:
+            print(f"Warning: Skipping edge connecting unknown node(s): {source_id} -> {target_id}", file=sys.stderr)
+            continue
+        link_edge(source_id, target_id, edge_label)
+
+    return nodes_info, recipe_nodes
+
+def format_recipe_line(recipe_name, inputs, outputs):
+    """Formats one recipe as `recipe_name: input1 + input2 -> output1 + output2`."""
+    # Sort inputs and outputs alphabetically for consistent output
+    inputs_str = " + ".join(sorted(inputs)) if inputs else " " # Use space if no inputs? Or empty string? Let's use empty for clarity.
+    outputs_str = " + ".join(sorted(outputs)) if outputs else ""
 
-    # --- Pass 3: Format and print the recipes ---
+    # Handle cases where inputs or outputs might be missing entirely
+    if not inputs_str.strip(): inputs_str = "<none>"
+    if not outputs_str.strip(): outputs_str = "<none>"
+
+    return f"{recipe_name}: {inputs_str} -> {outputs_str}"
+
+def parse_recipe_line(line):
+    """
+    Parses a line in the format written by format_recipe_line.
+
+    Returns:
+        tuple: (recipe_name, inputs, outputs), or None if the line isn't a recipe line.
+    """
+    name, separator, rest = line.rstrip("\n").partition(": ")
+    if not separator:
+        return None
+    inputs_str, separator, outputs_str = rest.rpartition(" -> ")
+    if not separator:
+        return None
+    inputs = [] if inputs_str == "<none>" else inputs_str.split(" + ")
+    outputs = [] if outputs_str == "<none>" else outputs_str.split(" + ")
+    return name, inputs, outputs
+
+class GraphMLError(ValueError):
+    """A GraphML file couldn't be read: missing, not well-formed XML, or not a yEd graph."""
+
+def load_graphml_records(graphml_file, stream=False):
+    """
+    Reads a yEd GraphML file and returns its node/edge records.
+
+    Args:
+        graphml_file (str): Path to the GraphML file.
+        stream (bool): Use iterparse instead of building the whole DOM. Records are then produced lazily, so with
+            streaming the errors below are raised while iterating.
+
+    Raises:
+        GraphMLError: If the file is missing or can't be parsed.
+    """
+    if stream:
+        records = iter_graphml_records_streaming(graphml_file)
+        return _raise_parse_errors(records, graphml_file)
+
+    try:
+        tree = ET.parse(graphml_file)
+        root = tree.getroot()
+    except ET.ParseError as e:
+        raise GraphMLError(f"Can't parse XML file {graphml_file}: {e}")
+    except FileNotFoundError:
+        raise GraphMLError(f"File not found: {graphml_file}")
+
+    graph_element = root.find('gm:graph', NAMESPACES)
+    if graph_element is None:
+        raise GraphMLError(f"Could not find <graph> element in {graphml_file}")
+
+    return iter_graph_records(graph_element)
+
+def _raise_parse_errors(records, graphml_file):
+    """Passes records through, turning streaming parse errors into the same GraphMLErrors as the non-streaming path."""
+    try:
+        yield from records
+    except ET.ParseError as e:
+        raise GraphMLError(f"Can't parse XML file {graphml_file}: {e}")
+    except FileNotFoundError:
+        raise GraphMLError(f"File not found: {graphml_file}")
+    except ValueError as e:
+        raise GraphMLError(f"{graphml_file}: {e}")
+
+def recipes_text(graphml_file, stream=False):
+    """
+    Parses a yEd GraphML file and returns the recipe text that process_graphml prints.
+
+    Args:
+        graphml_file (str): Path to the GraphML file.
+        stream (bool): Parse incrementally with iterparse, for very large files. Output is identical.
+
+    Raises:
+        GraphMLError: If the file is missing or can't be parsed.
+    """
+    records = load_graphml_records(graphml_file, stream=stream)
+    nodes_info, recipe_nodes = collect_recipes(records)
+
+    if not recipe_nodes:
+        return "No recipe nodes (orange color: {}) found in the graph.\n".format(RECIPE_COLOR)
+
+    # Format the recipes
     #print("--- Factorio Recipes ---")
-    for recipe_id, data in recipe_nodes.items():
-        recipe_name = data['name']
-        # Sort inputs and outputs alphabetically for consistent output
-        inputs_str = " + ".join(sorted(data['inputs'])) if data['inputs'] else " " # Use space if no inputs? Or empty string? Let's use empty for clarity.
-        outputs_str = " + ".join(sorted(data['outputs'])) if data['outputs'] else ""
+    return "".join(format_recipe_line(data['name'], data['inputs'], data['outputs']) + "\n" for data in recipe_nodes.values())
+
+def cached_recipes_text(graphml_file, stream=False, cache=None):
+    """
+    Like recipes_text, but reuses the output from a previous run on identical file content if cache is given.
+    Warnings about the graph are only printed when it's actually parsed.
+
+    Raises:
+        GraphMLError: If the file is missing or can't be parsed.
+    """
+    if cache is None:
+        return recipes_text(graphml_file, stream)
+
+    try:
+        key = cache_key(graphml_file, 'graphml_to_text', CONVERTER_VERSION)
+    except FileNotFoundError:
+        raise GraphMLError(f"File not found: {graphml_file}")
+    cached = cache.get(key)
+    if cached is not None:
+        return cached.decode('utf-8')
+    text = recipes_text(graphml_file, stream)
+    cache.put(key, text.encode('utf-8'))
+    return text
+
+def process_graphml(graphml_file, stream=False, cache=None):
+    """
+    Parses a yEd GraphML file and prints Factorio recipes.
+
+    Args:
+        graphml_file (str): Path to the GraphML file.
+        stream (bool): Parse incrementally with iterparse, for very large files. Output is identical.
+        cache (ConversionCache): If given, reuse the output from a previous run on identical file content.
 
-        # Handle cases where inputs or outputs might be missing entirely
-        if not inputs_str.strip(): inputs_str = "<none>"
-        if not outputs_str.strip(): outputs_str = "<none>"
+    Raises:
+        GraphMLError: If the file is missing or can't be parsed.
+    """
+    sys.stdout.write(cached_recipes_text(graphml_file, stream, cache))
 
+def text_path_for(graphml_file, output_dir=None):
+    """Returns where --watch writes the text for graphml_file: next to it, or in output_dir if given."""
+    base_name = os.path.splitext(os.path.basename(graphml_file))[0]
+    directory = output_dir if output_dir is not None else os.path.dirname(graphml_file)
+    return os.path.join(directory, base_name + ".txt")
 
-        print(f"{recipe_name}: {inputs_str} -> {outputs_str}")
+def watch_graphml(paths, output_dir=None, stream=False, cache=None, use_inotify=True):
+    """
+    Re-exports .graphml files to text whenever they change, until interrupted.
+    The hash of each file's last exported content is kept in memory, so saves that don't change the content
+    (or files that were only touched) aren't parsed again.
+
+    Args:
+        paths (list): GraphML files and directories to watch.
+        output_dir (str): Directory for the .txt files; defaults to next to each input.
+        stream (bool): Parse incrementally with iterparse.
+        cache (ConversionCache): Optional on-disk cache, e.g. to skip the initial export of unchanged files.
+        use_inotify (bool): Use inotify where available instead of polling.
+    """
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    exported = {} # GraphML path -> SHA-256 of the content last exported
+    for changed in watch_files(paths, ('.graphml',), use_inotify=use_inotify):
+        for graphml_file in changed:
+            try:
+                with open(graphml_file, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).digest()
+            except FileNotFoundError:
+                continue
+            if exported.get(graphml_file) == digest:
+                continue
+            try:
+                text = cached_recipes_text(graphml_file, stream, cache)
+            except GraphMLError as e:
+                # The file may be half-written; it's retried on its next change.
+                print(f"[{time.strftime('%H:%M:%S')}] Error: {e}", file=sys.stderr)
+                continue
+            text_path = text_path_for(graphml_file, output_dir)
+            with open(text_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            exported[graphml_file] = digest
+            print(f"[{time.strftime('%H:%M:%S')}] {graphml_file} -> {text_path}", file=sys.stderr)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Convert yEd GraphML Factorio recipes to text format.')
-    parser.add_argument('graphml_file', help='Path to the yEd GraphML file.')
+    parser.add_argument('graphml_file', help='Path to the yEd GraphML file (or, with --watch, a directory of them).')
+    parser.add_argument('--stream', action='store_true', help='Parse incrementally instead of loading the whole file, for huge graphs.')
+    parser.add_argument('--cache', action='store_true', help='Reuse the cached output if the file hasn\'t changed since a previous run.')
+    parser.add_argument('--cache-dir', help='Cache directory (implies --cache; default: ~/.cache/factorio-mod-scripts/graphs).')
+    parser.add_argument('--watch', action='store_true', help='Keep running, and write a .txt file for each .graphml file whenever it changes.')
+    parser.add_argument('--output-dir', help='Watch mode: write the .txt files here instead of next to the inputs.')
+    parser.add_argument('--poll', action='store_true', help='Watch mode: poll for changes instead of using inotify.')
     args = parser.parse_args()
 
-    process_graphml(args.graphml_file)
+    cache = None
+    if args.cache or args.cache_dir:
+        cache = ConversionCache(args.cache_dir)
+    if args.watch:
+        if not os.path.exists(args.graphml_file):
+            print(f"Error: File not found: {args.graphml_file}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Watching {args.graphml_file} for changes. Press Ctrl+C to stop.", file=sys.stderr)
+        try:
+            watch_graphml([args.graphml_file], args.output_dir, args.stream, cache, use_inotify=not args.poll)
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+    try:
+        process_graphml(args.graphml_file, stream=args.stream, cache=cache)
+    except GraphMLError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if cache is not None:
+        cache.report()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+# Writes yEd-flavoured GraphML, the format that graphml_to_text.py reads.
+# Nodes are written as yEd ShapeNodes with a fill color and label, and edges as PolyLineEdges with an optional label
+# (used for ingredient/product amounts in recipe graphs) and optional bend points (e.g. from graph_layout.py).
+
+from xml.sax.saxutils import escape, quoteattr
+
+from graphml_to_text import NAMESPACES
+
+DEFAULT_NODE_WIDTH = 30.0
+DEFAULT_NODE_HEIGHT = 30.0
+
+GRAPHML_HEADER = f'''<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<graphml xmlns="{NAMESPACES['gm']}" xmlns:y="{NAMESPACES['y']}" xmlns:yed="{NAMESPACES['yed']}">
+  <key for="node" id="d6" yfiles.type="nodegraphics"/>
+  <key for="edge" id="d10" yfiles.type="edgegraphics"/>
+'''
+
+
+def iter_graphml_lines(nodes, edges, directed=True):
+    """
+    Yields the lines of a yEd GraphML document.
+
+    Args:
+        nodes (list): Dicts with 'id', 'label' and optionally 'fill', 'x', 'y', 'width', 'height'.
+        edges (list): Dicts with 'source' and 'target' node ids, and optionally 'label' and 'points' (a list of (x, y)
+            bend points in absolute coordinates).
+        directed (bool): Whether edges get arrowheads.
+    """
+    yield GRAPHML_HEADER
+    yield f'  <graph edgedefault="{"directed" if directed else "undirected"}" id="G">\n'
+
+    for node in nodes:
+        width = node.get('width', DEFAULT_NODE_WIDTH)
+        height = node.get('height', DEFAULT_NODE_HEIGHT)
+        x = node.get('x', 0.0)
+        y = node.get('y', 0.0)
+        yield f'    <node id={quoteattr(node["id"])}>\n'
+        yield '      <data key="d6">\n'
+        yield '        <y:ShapeNode>\n'
+        yield f'          <y:Geometry height="{height:.1f}" width="{width:.1f}" x="{x:.1f}" y="{y:.1f}"/>\n'
+        if node.get('fill'):
+            yield f'          <y:Fill color={quoteattr(node["fill"])} transparent="false"/>\n'
+        else:
+            yield '          <y:Fill hasColor="false" transparent="false"/>\n'
+        yield '          <y:BorderStyle color="#000000" type="line" width="1.0"/>\n'
+        yield f'          <y:NodeLabel alignment="center" autoSizePolicy="content" modelName="internal" modelPosition="c" visible="true">{escape(node["label"])}</y:NodeLabel>\n'
+        yield '          <y:Shape type="rectangle"/>\n'
+        yield '        </y:ShapeNode>\n'
+        yield '      </data>\n'
+        yield '    </node>\n'
+
+    target_arrow = "standard" if directed else "none"
+    for i, edge in enumerate(edges):
+        yield f'    <edge id="e{i}" source={quoteattr(edge["source"])} target={quoteattr(edge["target"])}>\n'
+        yield '      <data key="d10">\n'
+        yield '        <y:PolyLineEdge>\n'
+        if edge.get('points'):
+            yield '          <y:Path sx="0.0" sy="0.0" tx="0.0" ty="0.0">\n'
+            for point_x, point_y in edge['points']:
+                yield f'            <y:Point x="{point_x:.1f}" y="{point_y:.1f}"/>\n'
+            yield '          </y:Path>\n'
+        yield '          <y:LineStyle color="#000000" type="line" width="1.0"/>\n'
+        yield f'          <y:Arrows source="none" target="{target_arrow}"/>\n'
+        if edge.get('label'):
+            yield f'          <y:EdgeLabel alignment="center" visible="true">{escape(edge["label"])}</y:EdgeLabel>\n'
+        yield '          <y:BendStyle smoothed="false"/>\n'
+        yield '        </y:PolyLineEdge>\n'
+        yield '      </data>\n'
+        yield '    </edge>\n'
+
+    yield '  </graph>\n'
+    yield '</graphml>\n'
+
+
+def write_graphml(nodes, edges, directed=True):
+    """Returns a yEd GraphML document as a string. See iter_graphml_lines for the arguments."""
+    return "".join(iter_graphml_lines(nodes, edges, directed))
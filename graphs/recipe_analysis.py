@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+# Structural checks for recipe graphs extracted from yEd diagrams (see graphml_to_text.py and recipe_graph.py):
+#   - recipe loops: strongly connected components of the item -> recipe -> item graph (Tarjan's algorithm)
+#   - items that are produced but never consumed, and items that are consumed but never produced
+#   - recipes that can't be crafted starting from a set of raw resources (by default, the items nothing produces)
+# Everything runs on RecipeGraph's CSR indexes in time linear in the number of items, recipes and edges.
+#
+# Usage:
+#   python recipe_analysis.py recipes.graphml
+#   python recipe_analysis.py recipes.graphml --raw "iron ore" --raw "copper ore"   (only these count as available)
+
+import sys
+import argparse
+from collections import deque
+
+from recipe_graph import load_recipe_graph
+
+
+def find_loops(graph):
+    """
+    Finds recipe loops with an iterative Tarjan's algorithm over the bipartite item/recipe graph.
+    Node IDs are item IDs, then recipe IDs offset by graph.num_items; items point to the recipes consuming them, and
+    recipes to their products.
+
+    Args:
+        graph (RecipeGraph): The recipe graph.
+
+    Returns:
+        list: One (item IDs, recipe IDs) tuple per strongly connected component that contains a cycle.
+    """
+    num_items = graph.num_items
+    num_nodes = num_items + graph.num_recipes
+    # Plain lists are much faster to index than arrays; tolist() works for array('l') and NumPy alike.
+    consumer_offsets, consumers = graph.consumer_offsets.tolist(), graph.consumers.tolist()
+    product_offsets, products = graph.product_offsets.tolist(), graph.products.tolist()
+
+    def successors(node):
+        if node < num_items:
+            return [num_items + r for r in consumers[consumer_offsets[node]:consumer_offsets[node + 1]]]
+        recipe_id = node - num_items
+        return products[product_offsets[recipe_id]:product_offsets[recipe_id + 1]]
+
+    index = [-1] * num_nodes
+    lowlink = [0] * num_nodes
+    on_stack = [False] * num_nodes
+    component_stack = []
+    loops = []
+    next_index = 0
+    for root in range(num_nodes):
+        if index[root] != -1:
+            continue
+        # Each frame is (node, its successors, position of the next successor to visit).
+        index[root] = lowlink[root] = next_index
+        next_index += 1
+        component_stack.append(root)
+        on_stack[root] = True
+        call_stack = [(root, successors(root), 0)]
+        while call_stack:
+            node, node_successors, position = call_stack[-1]
+            if position < len(node_successors):
+                call_stack[-1] = (node, node_successors, position + 1)
+                successor = node_successors[position]
+                if index[successor] == -1:
+                    index[successor] = lowlink[successor] = next_index
+                    next_index += 1
+                    component_stack.append(successor)
+                    on_stack[successor] = True
+                    call_stack.append((successor, successors(successor), 0))
+                elif on_stack[successor] and index[successor] < lowlink[node]:
+                    lowlink[node] = index[successor]
+                continue
+
+            call_stack.pop()
+            if call_stack:
+                parent = call_stack[-1][0]
+                if lowlink[node] < lowlink[parent]:
+                    lowlink[parent] = lowlink[node]
+            if lowlink[node] != index[node]:
+                continue
+            component = []
+            while True:
+                member = component_stack.pop()
+                on_stack[member] = False
+                component.append(member)
+                if member == node:
+                    break
+            # The graph is bipartite, so a single node can't have a self-loop; any cycle needs two or more nodes.
+            if len(component) > 1:
+                component.reverse()
+                loops.append((
+                    [member for member in component if member < num_items],
+                    [member - num_items for member in component if member >= num_items],
+                ))
+    return loops
+
+
+def find_dead_ends(graph):
+    """
+    Finds items missing a producer or a consumer.
+
+    Returns:
+        tuple: (item IDs produced but never consumed, item IDs consumed but never produced). Items no recipe touches
+            are in neither list.
+    """
+    consumer_offsets = graph.consumer_offsets.tolist()
+    producer_offsets = graph.producer_offsets.tolist()
+    never_consumed = []
+    never_produced = []
+    for item_id in range(graph.num_items):
+        produced = producer_offsets[item_id + 1] > producer_offsets[item_id]
+        consumed = consumer_offsets[item_id + 1] > consumer_offsets[item_id]
+        if produced and not consumed:
+            never_consumed.append(item_id)
+        elif consumed and not produced:
+            never_produced.append(item_id)
+    return never_consumed, never_produced
+
+
+def find_unreachable_recipes(graph, raw_item_ids):
+    """
+    Finds recipes that can't be crafted from the raw resources: a recipe becomes craftable once all its ingredients
+    are available, and then makes its products available. Each edge is visited at most once.
+
+    Args:
+        graph (RecipeGraph): The recipe graph.
+        raw_item_ids (iterable): Item IDs available from the start.
+
+    Returns:
+        tuple: (unreachable recipe IDs, unreachable item IDs).
+    """
+    ingredient_offsets = graph.ingredient_offsets.tolist()
+    consumer_offsets, consumers = graph.consumer_offsets.tolist(), graph.consumers.tolist()
+    product_offsets, products = graph.product_offsets.tolist(), graph.products.tolist()
+    # Ingredients still missing per recipe; an ingredient listed twice is counted twice and seen twice below.
+    missing = [ingredient_offsets[r + 1] - ingredient_offsets[r] for r in range(graph.num_recipes)]
+    item_reached = [False] * graph.num_items
+    recipe_reached = [False] * graph.num_recipes
+    queue = deque()
+
+    def reach_recipe(recipe_id):
+        recipe_reached[recipe_id] = True
+        for product in products[product_offsets[recipe_id]:product_offsets[recipe_id + 1]]:
+            if not item_reached[product]:
+                item_reached[product] = True
+                queue.append(product)
+
+    for item_id in raw_item_ids:
+        if not item_reached[item_id]:
+            item_reached[item_id] = True
+            queue.append(item_id)
+    for recipe_id in range(graph.num_recipes):
+        if missing[recipe_id] == 0:
+            reach_recipe(recipe_id)
+    while queue:
+        item_id = queue.popleft()
+        for recipe_id in consumers[consumer_offsets[item_id]:consumer_offsets[item_id + 1]]:
+            missing[recipe_id] -= 1
+            if missing[recipe_id] == 0:
+                reach_recipe(recipe_id)
+
+    unreachable_recipes = [r for r in range(graph.num_recipes) if not recipe_reached[r]]
+    unreachable_items = [i for i in range(graph.num_items) if not item_reached[i]]
+    return unreachable_recipes, unreachable_items
+
+
+def print_names(title, names):
+    print(f"--- {title} ({len(names)}) ---")
+    for name in sorted(names):
+        print(name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Report recipe loops, dead-end items and unreachable recipes in a recipe graph.')
+    parser.add_argument('graph_file', help='Path to a .graphml file, a .rgsnap snapshot, or a text file of recipe lines.')
+    parser.add_argument('--raw', action='append', default=[], metavar='ITEM', help='Raw resource to start from when checking reachability. Can be repeated. Default: every item that no recipe produces.')
+    parser.add_argument('--stream', action='store_true', help='Parse GraphML incrementally, for huge graphs.')
+    args = parser.parse_args()
+
+    try:
+        graph = load_recipe_graph(args.graph_file, stream=args.stream)
+    except FileNotFoundError:
+        print(f"Error: File not found: {args.graph_file}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    unknown = [name for name in args.raw if name not in graph.item_index]
+    if unknown:
+        print(f"Error: Unknown item(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+
+    item_names = graph.item_names
+    recipe_names = graph.recipe_names
+    loops = find_loops(graph)
+    print(f"--- Recipe loops ({len(loops)}) ---")
+    for item_ids, recipe_ids in loops:
+        print(f"{len(recipe_ids)} recipe(s): {', '.join(sorted(recipe_names[r] for r in recipe_ids))}")
+        print(f"  items: {', '.join(sorted(item_names[i] for i in item_ids))}")
+
+    never_consumed, never_produced = find_dead_ends(graph)
+    print_names("Produced but never consumed", [item_names[i] for i in never_consumed])
+    print_names("Consumed but never produced", [item_names[i] for i in never_produced])
+
+    if args.raw:
+        raw_item_ids = [graph.item_index[name] for name in args.raw]
+    else:
+        raw_item_ids = never_produced
+    unreachable_recipes, _ = find_unreachable_recipes(graph, raw_item_ids)
+    print_names("Recipes unreachable from raw resources", [recipe_names[r] for r in unreachable_recipes])
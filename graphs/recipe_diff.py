@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+# Semantic diff between two versions of a recipe graph, e.g. before and after editing a yEd diagram.
+# Each side can be a .graphml file, a .rgsnap snapshot or a graphml_to_text text dump, so a diagram can be compared
+# against an older dump. Recipes are reduced to canonical forms (sorted ingredient and product names) and matched
+# through dicts keyed by those forms, so the diff is linear in the size of the graphs, with no line-by-line alignment:
+#   1. recipes with the same name and form on both sides are unchanged
+#   2. a removed and an added recipe with the same form are a rename
+#   3. a removed and an added recipe with the same name are a change to its ingredients/products
+#   4. whatever is left was removed or added
+# Items are compared by label, counting only items that some recipe uses, since text dumps can't list unconnected items.
+#
+# Usage:
+#   python recipe_diff.py old.graphml new.graphml
+#   python recipe_diff.py recipes.txt recipes.graphml --amounts   (also compare amounts; text dumps count every amount as 1)
+
+import sys
+import argparse
+from collections import defaultdict
+
+from recipe_graph import load_recipe_graph
+from graphml_to_text import format_recipe_line
+
+
+def format_amount(name, amount):
+    """Formats an ingredient/product as `name`, or `2 name` when the amount isn't 1."""
+    return name if amount == 1 else f"{amount:g} {name}"
+
+
+def canonical_recipes(graph, amounts=False):
+    """
+    Reduces every recipe to a hashable canonical form.
+
+    Args:
+        graph (RecipeGraph): The recipe graph.
+        amounts (bool): Include ingredient/product amounts in the forms.
+
+    Returns:
+        list: (recipe name, (ingredients, products)) by recipe ID, where ingredients and products are sorted tuples of
+            item names, or of (item name, amount) pairs if amounts is set.
+    """
+    item_names = graph.item_names
+    ingredient_offsets, ingredients = graph.ingredient_offsets.tolist(), graph.ingredients.tolist()
+    product_offsets, products = graph.product_offsets.tolist(), graph.products.tolist()
+    if amounts:
+        ingredient_amounts, product_amounts = graph.ingredient_amounts.tolist(), graph.product_amounts.tolist()
+
+    recipes = []
+    for recipe_id, recipe_name in enumerate(graph.recipe_names):
+        ingredient_slice = slice(ingredient_offsets[recipe_id], ingredient_offsets[recipe_id + 1])
+        product_slice = slice(product_offsets[recipe_id], product_offsets[recipe_id + 1])
+        if amounts:
+            inputs = tuple(sorted(zip((item_names[i] for i in ingredients[ingredient_slice]), ingredient_amounts[ingredient_slice])))
+            outputs = tuple(sorted(zip((item_names[i] for i in products[product_slice]), product_amounts[product_slice])))
+        else:
+            inputs = tuple(sorted(item_names[i] for i in ingredients[ingredient_slice]))
+            outputs = tuple(sorted(item_names[i] for i in products[product_slice]))
+        recipes.append((recipe_name, (inputs, outputs)))
+    return recipes
+
+
+def format_form(name, form, amounts=False):
+    """Formats a recipe's canonical form as a graphml_to_text line."""
+    inputs, outputs = form
+    if amounts:
+        inputs = [format_amount(item, amount) for item, amount in inputs]
+        outputs = [format_amount(item, amount) for item, amount in outputs]
+    return format_recipe_line(name, list(inputs), list(outputs))
+
+
+def _take(groups, key):
+    """Pops one value from the list stored under key in groups, dropping the key once it's empty."""
+    values = groups[key]
+    value = values.pop()
+    if not values:
+        del groups[key]
+    return value
+
+
+def diff_recipes(old_recipes, new_recipes):
+    """
+    Matches the recipes of two graphs. Repeated names and forms are handled as multisets.
+
+    Args:
+        old_recipes, new_recipes (list): (name, form) pairs, as from canonical_recipes.
+
+    Returns:
+        dict: 'removed' and 'added': lists of (name, form); 'renamed': list of (old name, new name, form);
+            'changed': list of (name, old form, new form); 'unchanged': count.
+    """
+    # Step 1: exact matches cancel out.
+    remaining_old = defaultdict(int)
+    for recipe in old_recipes:
+        remaining_old[recipe] += 1
+    unchanged = 0
+    added = []
+    for recipe in new_recipes:
+        if remaining_old.get(recipe):
+            remaining_old[recipe] -= 1
+            unchanged += 1
+        else:
+            added.append(recipe)
+    removed = [recipe for recipe, count in remaining_old.items() for _ in range(count)]
+
+    # Step 2: same form under a different name.
+    removed_by_form = defaultdict(list)
+    for name, form in reversed(removed):
+        removed_by_form[form].append(name)
+    renamed = []
+    still_added = []
+    for name, form in added:
+        if form in removed_by_form:
+            renamed.append((_take(removed_by_form, form), name, form))
+        else:
+            still_added.append((name, form))
+    removed = [(name, form) for form, names in removed_by_form.items() for name in reversed(names)]
+
+    # Step 3: same name with a different form.
+    removed_by_name = defaultdict(list)
+    for name, form in reversed(removed):
+        removed_by_name[name].append(form)
+    changed = []
+    added = []
+    for name, form in still_added:
+        if name in removed_by_name:
+            changed.append((name, _take(removed_by_name, name), form))
+        else:
+            added.append((name, form))
+    removed = [(name, form) for name, forms in removed_by_name.items() for form in reversed(forms)]
+
+    return {'removed': removed, 'added': added, 'renamed': renamed, 'changed': changed, 'unchanged': unchanged}
+
+
+def used_items(graph):
+    """Returns the set of names of items that at least one recipe uses or makes."""
+    item_names = graph.item_names
+    return {item_names[i] for i in graph.ingredients.tolist()} | {item_names[i] for i in graph.products.tolist()}
+
+
+def diff_items(old_graph, new_graph):
+    """Returns (removed item names, added item names), sorted. Unconnected items are ignored."""
+    old_items = used_items(old_graph)
+    new_items = used_items(new_graph)
+    return sorted(old_items - new_items), sorted(new_items - old_items)
+
+
+def print_recipe_diff(result, removed_items, added_items, amounts=False):
+    """Prints a diff in sections; only sections with entries are shown."""
+    if result['renamed']:
+        print(f"--- Renamed recipes ({len(result['renamed'])}) ---")
+        for old_name, new_name, form in sorted(result['renamed']):
+            print(f"  {old_name} => {new_name}")
+    if result['changed']:
+        print(f"--- Changed recipes ({len(result['changed'])}) ---")
+        for name, old_form, new_form in sorted(result['changed']):
+            print(f"- {format_form(name, old_form, amounts)}")
+            print(f"+ {format_form(name, new_form, amounts)}")
+    if result['removed']:
+        print(f"--- Removed recipes ({len(result['removed'])}) ---")
+        for name, form in sorted(result['removed']):
+            print(f"- {format_form(name, form, amounts)}")
+    if result['added']:
+        print(f"--- Added recipes ({len(result['added'])}) ---")
+        for name, form in sorted(result['added']):
+            print(f"+ {format_form(name, form, amounts)}")
+    if removed_items:
+        print(f"--- Removed items ({len(removed_items)}) ---")
+        for name in removed_items:
+            print(f"- {name}")
+    if added_items:
+        print(f"--- Added items ({len(added_items)}) ---")
+        for name in added_items:
+            print(f"+ {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare two versions of a recipe graph by recipe and item labels.')
+    parser.add_argument('old_file', help='Path to the old .graphml file, .rgsnap snapshot, or text file of recipe lines.')
+    parser.add_argument('new_file', help='Path to the new .graphml file, .rgsnap snapshot, or text file of recipe lines.')
+    parser.add_argument('--amounts', action='store_true', help='Also compare ingredient/product amounts.')
+    parser.add_argument('--stream', action='store_true', help='Parse GraphML incrementally, for huge graphs.')
+    args = parser.parse_args()
+
+    graphs = []
+    for path in (args.old_file, args.new_file):
+        try:
+            graphs.append(load_recipe_graph(path, stream=args.stream))
+        except FileNotFoundError:
+            print(f"Error: File not found: {path}", file=sys.stderr)
+            sys.exit(1)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    old_graph, new_graph = graphs
+
+    result = diff_recipes(canonical_recipes(old_graph, args.amounts), canonical_recipes(new_graph, args.amounts))
+    removed_items, added_items = diff_items(old_graph, new_graph)
+    print_recipe_diff(result, removed_items, added_items, args.amounts)
+    differences = len(result['removed']) + len(result['added']) + len(result['renamed']) + len(result['changed'])
+    print(f"{result['unchanged']} recipe(s) unchanged, {differences} differ; {len(removed_items)} item(s) removed, {len(added_items)} added.", file=sys.stderr)
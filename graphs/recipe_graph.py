@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+
+# Indexed recipe graph, for querying the same recipe set many times without re-parsing it.
+# Items and recipes get integer IDs (in order of first appearance), and edges are stored as CSR (compressed sparse row)
+# arrays: for recipe r, its ingredient item IDs are ingredients[ingredient_offsets[r]:ingredient_offsets[r + 1]].
+# Reverse indexes (which recipes consume/produce each item) use the same layout, so every lookup is O(1) plus the size
+# of the answer. Ingredient/product amounts (from edge labels) are stored in float arrays parallel to the edge arrays.
+#
+# Use as a library:
+#   from recipe_graph import RecipeGraph
+#   graph = RecipeGraph.from_graphml("recipes.graphml")
+#   graph.producers_of("iron plate")
+# Or from the command line:
+#   python recipe_graph.py recipes.graphml --producers "iron plate" --consumers "iron plate"
+
+import sys
+import argparse
+from array import array
+
+from graphml_to_text import load_graphml_records, collect_recipes, format_recipe_line, parse_recipe_line
+
+
+# Names of the CSR index arrays, e.g. for saving/loading them.
+INDEX_ARRAYS = (
+    'ingredient_offsets', 'ingredients',
+    'product_offsets', 'products',
+    'consumer_offsets', 'consumers',
+    'producer_offsets', 'producers',
+)
+# Names of the float arrays holding the amount for each entry of ingredients/products.
+AMOUNT_ARRAYS = ('ingredient_amounts', 'product_amounts')
+
+
+def _build_csr(rows, num_rows):
+    """Builds (offsets, values) CSR arrays from a list of per-row value lists."""
+    offsets = array('l', [0]) * (num_rows + 1)
+    total = 0
+    for row_index, row in enumerate(rows):
+        total += len(row)
+        offsets[row_index + 1] = total
+    values = array('l', [0]) * total
+    for row_index, row in enumerate(rows):
+        start = offsets[row_index]
+        values[start:start + len(row)] = array('l', row)
+    return offsets, values
+
+
+def _flatten_amounts(amount_lists, offsets):
+    """Builds the float array parallel to a CSR values array; missing amount lists default to 1 per entry."""
+    amounts = array('d', [1.0]) * offsets[-1]
+    if amount_lists is not None:
+        for row_index, row in enumerate(amount_lists):
+            start = offsets[row_index]
+            amounts[start:start + len(row)] = array('d', row)
+    return amounts
+
+
+def _transpose_csr(offsets, values, num_columns):
+    """
+    Builds the reverse index of a CSR matrix with a counting sort, in O(rows + edges).
+    Returns (offsets, values) where row c lists the original rows that contain c.
+    """
+    counts = array('l', [0]) * (num_columns + 1)
+    for column in values:
+        counts[column + 1] += 1
+    for i in range(num_columns):
+        counts[i + 1] += counts[i]
+    reverse_offsets = array('l', counts)
+    reverse_values = array('l', [0]) * len(values)
+    next_slot = array('l', counts[:num_columns])
+    for row in range(len(offsets) - 1):
+        for k in range(offsets[row], offsets[row + 1]):
+            column = values[k]
+            reverse_values[next_slot[column]] = row
+            next_slot[column] += 1
+    return reverse_offsets, reverse_values
+
+
+class RecipeGraph:
+    """
+    Items and recipes with integer IDs, forward and reverse adjacency in CSR arrays.
+
+    Attributes:
+        item_names (list): Item name by item ID.
+        recipe_names (list): Recipe name by recipe ID. Names can repeat if the diagram has duplicate recipe labels.
+        item_index (dict): Item ID by name.
+        recipe_index (dict): Recipe ID by name (the first recipe, if a name repeats).
+        ingredient_offsets, ingredients: CSR arrays, recipe ID -> ingredient item IDs.
+        product_offsets, products: CSR arrays, recipe ID -> product item IDs.
+        consumer_offsets, consumers: CSR arrays, item ID -> IDs of recipes using it as an ingredient.
+        producer_offsets, producers: CSR arrays, item ID -> IDs of recipes producing it.
+        ingredient_amounts, product_amounts: Amount for each entry of ingredients/products.
+    """
+
+    def __init__(self, item_names, recipe_names, ingredient_lists, product_lists,
+                 ingredient_amount_lists=None, product_amount_lists=None):
+        """
+        Builds the indexes. Usually called through one of the from_* constructors.
+
+        Args:
+            item_names (list): Item names; their positions become item IDs.
+            recipe_names (list): Recipe names; their positions become recipe IDs.
+            ingredient_lists (list): For each recipe, a list of ingredient item IDs.
+            product_lists (list): For each recipe, a list of product item IDs.
+            ingredient_amount_lists, product_amount_lists (list): Amounts matching the lists above; default 1 each.
+        """
+        self.item_names = list(item_names)
+        self.recipe_names = list(recipe_names)
+        self.item_index = {name: item_id for item_id, name in enumerate(self.item_names)}
+        self.recipe_index = {}
+        for recipe_id, name in enumerate(self.recipe_names):
+            self.recipe_index.setdefault(name, recipe_id)
+
+        num_items = len(self.item_names)
+        num_recipes = len(self.recipe_names)
+        self.ingredient_offsets, self.ingredients = _build_csr(ingredient_lists, num_recipes)
+        self.product_offsets, self.products = _build_csr(product_lists, num_recipes)
+        self.ingredient_amounts = _flatten_amounts(ingredient_amount_lists, self.ingredient_offsets)
+        self.product_amounts = _flatten_amounts(product_amount_lists, self.product_offsets)
+        self.consumer_offsets, self.consumers = _transpose_csr(self.ingredient_offsets, self.ingredients, num_items)
+        self.producer_offsets, self.producers = _transpose_csr(self.product_offsets, self.products, num_items)
+
+    # --- Constructors ---
+    @classmethod
+    def from_recipes(cls, recipes, extra_items=()):
+        """
+        Builds a graph from (recipe_name, input_names, output_names) tuples, optionally followed by
+        (input_amounts, output_amounts). Items are numbered in order of first appearance; extra_items adds items that
+        no recipe uses.
+        """
+        item_index = {}
+        recipe_names = []
+        ingredient_lists = []
+        product_lists = []
+        ingredient_amount_lists = []
+        product_amount_lists = []
+
+        def intern(name):
+            item_id = item_index.get(name)
+            if item_id is None:
+                item_id = item_index[name] = len(item_index)
+            return item_id
+
+        for name in extra_items:
+            intern(name)
+        for recipe in recipes:
+            recipe_name, inputs, outputs = recipe[:3]
+            recipe_names.append(recipe_name)
+            ingredient_lists.append([intern(name) for name in inputs])
+            product_lists.append([intern(name) for name in outputs])
+            ingredient_amount_lists.append(recipe[3] if len(recipe) > 3 else [1.0] * len(inputs))
+            product_amount_lists.append(recipe[4] if len(recipe) > 4 else [1.0] * len(outputs))
+        return cls(list(item_index), recipe_names, ingredient_lists, product_lists,
+                   ingredient_amount_lists, product_amount_lists)
+
+    @classmethod
+    def from_arrays(cls, item_names, recipe_names, arrays):
+        """
+        Wraps already-built index arrays without copying or rebuilding them, e.g. NumPy arrays from a snapshot.
+
+        Args:
+            item_names (list): Item name by item ID.
+            recipe_names (list): Recipe name by recipe ID.
+            arrays (dict): Every name in INDEX_ARRAYS and AMOUNT_ARRAYS mapped to a sequence supporting slicing.
+        """
+        graph = cls.__new__(cls)
+        graph.item_names = list(item_names)
+        graph.recipe_names = list(recipe_names)
+        graph.item_index = {name: item_id for item_id, name in enumerate(graph.item_names)}
+        graph.recipe_index = {}
+        for recipe_id, name in enumerate(graph.recipe_names):
+            graph.recipe_index.setdefault(name, recipe_id)
+        for name in INDEX_ARRAYS + AMOUNT_ARRAYS:
+            setattr(graph, name, arrays[name])
+        return graph
+
+    @classmethod
+    def from_graphml(cls, graphml_file, stream=False):
+        """Builds a graph from a yEd GraphML file, as read by graphml_to_text.py. Unconnected item nodes are included."""
+        nodes_info, recipe_nodes = collect_recipes(load_graphml_records(graphml_file, stream=stream))
+        item_labels = [label for label, node_type in nodes_info.values() if node_type == 'item']
+        recipes = (
+            (data['name'], data['inputs'], data['outputs'], data['input_amounts'], data['output_amounts'])
+            for data in recipe_nodes.values()
+        )
+        return cls.from_recipes(recipes, extra_items=item_labels)
+
+    @classmethod
+    def from_text(cls, lines):
+        """Builds a graph from lines in graphml_to_text's `name: a + b -> c` format. Other lines are skipped."""
+        recipes = (parsed for parsed in map(parse_recipe_line, lines) if parsed is not None)
+        return cls.from_recipes(recipes)
+
+    # --- Queries by ID ---
+    @property
+    def num_items(self):
+        return len(self.item_names)
+
+    @property
+    def num_recipes(self):
+        return len(self.recipe_names)
+
+    def recipe_ingredients(self, recipe_id):
+        """Item IDs of a recipe's ingredients."""
+        return self.ingredients[self.ingredient_offsets[recipe_id]:self.ingredient_offsets[recipe_id + 1]]
+
+    def recipe_products(self, recipe_id):
+        """Item IDs of a recipe's products."""
+        return self.products[self.product_offsets[recipe_id]:self.product_offsets[recipe_id + 1]]
+
+    def recipe_ingredient_amounts(self, recipe_id):
+        """Amounts matching recipe_ingredients."""
+        return self.ingredient_amounts[self.ingredient_offsets[recipe_id]:self.ingredient_offsets[recipe_id + 1]]
+
+    def recipe_product_amounts(self, recipe_id):
+        """Amounts matching recipe_products."""
+        return self.product_amounts[self.product_offsets[recipe_id]:self.product_offsets[recipe_id + 1]]
+
+    def item_consumers(self, item_id):
+        """IDs of recipes that use an item as an ingredient."""
+        return self.consumers[self.consumer_offsets[item_id]:self.consumer_offsets[item_id + 1]]
+
+    def item_producers(self, item_id):
+        """IDs of recipes that produce an item."""
+        return self.producers[self.producer_offsets[item_id]:self.producer_offsets[item_id + 1]]
+
+    # --- Queries by name ---
+    def producers_of(self, item_name):
+        """Names of recipes that produce the named item (empty if the item is unknown)."""
+        item_id = self.item_index.get(item_name)
+        if item_id is None:
+            return []
+        return [self.recipe_names[r] for r in self.item_producers(item_id)]
+
+    def consumers_of(self, item_name):
+        """Names of recipes that use the named item as an ingredient (empty if the item is unknown)."""
+        item_id = self.item_index.get(item_name)
+        if item_id is None:
+            return []
+        return [self.recipe_names[r] for r in self.item_consumers(item_id)]
+
+    def ingredients_of(self, recipe_name):
+        """Ingredient names of the named recipe."""
+        return [self.item_names[i] for i in self.recipe_ingredients(self.recipe_index[recipe_name])]
+
+    def products_of(self, recipe_name):
+        """Product names of the named recipe."""
+        return [self.item_names[i] for i in self.recipe_products(self.recipe_index[recipe_name])]
+
+    # --- Output ---
+    def iter_text_lines(self):
+        """Yields each recipe in graphml_to_text's text format, in recipe ID order."""
+        item_names = self.item_names
+        # Plain lists iterate much faster than NumPy arrays from snapshots; tolist() works for both array types.
+        ingredient_offsets, ingredients = self.ingredient_offsets.tolist(), self.ingredients.tolist()
+        product_offsets, products = self.product_offsets.tolist(), self.products.tolist()
+        for recipe_id, recipe_name in enumerate(self.recipe_names):
+            inputs = [item_names[i] for i in ingredients[ingredient_offsets[recipe_id]:ingredient_offsets[recipe_id + 1]]]
+            outputs = [item_names[i] for i in products[product_offsets[recipe_id]:product_offsets[recipe_id + 1]]]
+            yield format_recipe_line(recipe_name, inputs, outputs)
+
+
+def load_recipe_graph(path, stream=False):
+    """
+    Loads a RecipeGraph from a .graphml file, a .rgsnap snapshot (see recipe_snapshot.py), or a recipe text dump.
+
+    Args:
+        path (str): The file to load; the type is chosen by extension.
+        stream (bool): Parse GraphML incrementally, for huge graphs.
+    """
+    lower_path = path.lower()
+    if lower_path.endswith('.graphml'):
+        return RecipeGraph.from_graphml(path, stream=stream)
+    if lower_path.endswith('.rgsnap'):
+        from recipe_snapshot import load_snapshot # Needs NumPy, so only imported when used
+        return load_snapshot(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return RecipeGraph.from_text(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Query producers/consumers in a recipe graph from a yEd GraphML file, a snapshot, or a graphml_to_text dump.')
+    parser.add_argument('graph_file', help='Path to a .graphml file, a .rgsnap snapshot, or a text file of recipe lines.')
+    parser.add_argument('--stream', action='store_true', help='Parse GraphML incrementally, for huge graphs.')
+    parser.add_argument('--producers', action='append', default=[], metavar='ITEM', help='Print the recipes producing ITEM. Can be repeated.')
+    parser.add_argument('--consumers', action='append', default=[], metavar='ITEM', help='Print the recipes consuming ITEM. Can be repeated.')
+    args = parser.parse_args()
+
+    try:
+        graph = load_recipe_graph(args.graph_file, stream=args.stream)
+    except FileNotFoundError:
+        print(f"Error: File not found: {args.graph_file}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"{graph.num_items} items, {graph.num_recipes} recipes, {len(graph.ingredients)} ingredient edges, {len(graph.products)} product edges.")
+    for item_name in args.producers:
+        print(f"Producers of {item_name}: {', '.join(graph.producers_of(item_name)) or '<none>'}")
+    for item_name in args.consumers:
+        print(f"Consumers of {item_name}: {', '.join(graph.consumers_of(item_name)) or '<none>'}")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+# Compact binary snapshots of parsed recipe graphs (see recipe_graph.py), so tools can start up without re-parsing XML.
+# A snapshot is memory-mapped on load: the CSR index arrays are NumPy views straight into the file, and only the name
+# tables are decoded.
+#
+# File layout (all integers little-endian):
+#   8 bytes   magic, SNAPSHOT_MAGIC
+#   8 bytes   uint64 offset of the JSON footer
+#   sections  each 8-byte aligned: an int32 array per name in recipe_graph.INDEX_ARRAYS, a float64 array per name in
+#             recipe_graph.AMOUNT_ARRAYS, and for the item and recipe name tables an int64 offsets array plus a UTF-8
+#             blob of the concatenated names
+#   footer    JSON: {"version", "num_items", "num_recipes", "sections": {name: [offset, byte_length, dtype]}}
+#
+# Usage:
+#   python recipe_snapshot.py save recipes.graphml recipes.rgsnap   (input can also be a graphml_to_text text dump)
+#   python recipe_snapshot.py text recipes.rgsnap                   (prints the `name: a + b -> c` lines)
+
+import sys
+import json
+import struct
+import argparse
+import numpy as np
+
+from recipe_graph import RecipeGraph, INDEX_ARRAYS, AMOUNT_ARRAYS, load_recipe_graph
+
+SNAPSHOT_MAGIC = b"RGSNAP\0\1"
+SNAPSHOT_VERSION = 2 # Version 2 added the amount arrays
+SNAPSHOT_EXTENSION = ".rgsnap"
+INDEX_DTYPE = "<i4"
+AMOUNT_DTYPE = "<f8"
+NAME_OFFSET_DTYPE = "<i8"
+ALIGNMENT = 8
+
+
+def _name_table(names):
+    """Interns a list of names as (offsets array, UTF-8 blob)."""
+    encoded = [name.encode("utf-8") for name in names]
+    offsets = np.zeros(len(encoded) + 1, dtype=NAME_OFFSET_DTYPE)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def _decode_name_table(offsets, blob):
+    bounds = offsets.tolist()
+    return [blob[start:end].decode("utf-8") for start, end in zip(bounds, bounds[1:])]
+
+
+def save_snapshot(graph, path):
+    """
+    Writes a RecipeGraph to a binary snapshot file.
+
+    Args:
+        graph (RecipeGraph): The graph to save.
+        path (str): Output file path.
+    """
+    item_offsets, item_blob = _name_table(graph.item_names)
+    recipe_offsets, recipe_blob = _name_table(graph.recipe_names)
+    sections = [(name, np.asarray(getattr(graph, name), dtype=INDEX_DTYPE)) for name in INDEX_ARRAYS]
+    sections += [(name, np.asarray(getattr(graph, name), dtype=AMOUNT_DTYPE)) for name in AMOUNT_ARRAYS]
+    sections += [
+        ("item_name_offsets", item_offsets),
+        ("item_names", item_blob),
+        ("recipe_name_offsets", recipe_offsets),
+        ("recipe_names", recipe_blob),
+    ]
+
+    footer = {"version": SNAPSHOT_VERSION, "num_items": graph.num_items, "num_recipes": graph.num_recipes, "sections": {}}
+    with open(path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack("<Q", 0)) # Footer offset, filled in at the end
+        for name, data in sections:
+            padding = -f.tell() % ALIGNMENT
+            f.write(b"\0" * padding)
+            if isinstance(data, bytes):
+                footer["sections"][name] = [f.tell(), len(data), "bytes"]
+                f.write(data)
+            else:
+                footer["sections"][name] = [f.tell(), data.nbytes, data.dtype.str]
+                f.write(data.tobytes())
+        footer_offset = f.tell()
+        f.write(json.dumps(footer).encode("utf-8"))
+        f.seek(len(SNAPSHOT_MAGIC))
+        f.write(struct.pack("<Q", footer_offset))
+
+
+def load_snapshot(path, mmap=True):
+    """
+    Loads a RecipeGraph from a snapshot file.
+
+    Args:
+        path (str): Snapshot file path.
+        mmap (bool): Memory-map the file, so index arrays are only paged in when used. Otherwise the file is read
+            into memory.
+
+    Returns:
+        RecipeGraph: The graph; its index arrays are read-only NumPy arrays.
+
+    Raises:
+        ValueError: If the file isn't a snapshot or has an unsupported version.
+    """
+    if mmap:
+        buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    else:
+        buffer = np.fromfile(path, dtype=np.uint8)
+    header_size = len(SNAPSHOT_MAGIC) + 8
+    if len(buffer) < header_size or buffer[:len(SNAPSHOT_MAGIC)].tobytes() != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path} is not a recipe graph snapshot")
+    footer_offset, = struct.unpack("<Q", buffer[len(SNAPSHOT_MAGIC):header_size].tobytes())
+    footer = json.loads(buffer[footer_offset:].tobytes().decode("utf-8"))
+    if footer["version"] != SNAPSHOT_VERSION:
+        raise ValueError(f"{path} has snapshot version {footer['version']}, expected {SNAPSHOT_VERSION}; re-save it from the source graph")
+
+    def section(name):
+        offset, length, dtype = footer["sections"][name]
+        data = buffer[offset:offset + length]
+        if dtype == "bytes":
+            return data.tobytes()
+        return data.view(dtype)
+
+    item_names = _decode_name_table(section("item_name_offsets"), section("item_names"))
+    recipe_names = _decode_name_table(section("recipe_name_offsets"), section("recipe_names"))
+    arrays = {name: section(name) for name in INDEX_ARRAYS + AMOUNT_ARRAYS}
+    return RecipeGraph.from_arrays(item_names, recipe_names, arrays)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Save recipe graphs to binary snapshots, or print a snapshot as recipe text.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    save_parser = subparsers.add_parser('save', help='Parse a .graphml file or recipe text dump and save it as a snapshot.')
+    save_parser.add_argument('input_file', help='Path to a .graphml file or a text file of recipe lines.')
+    save_parser.add_argument('snapshot_file', help='Output snapshot path.')
+    save_parser.add_argument('--stream', action='store_true', help='Parse GraphML incrementally, for huge graphs.')
+    text_parser = subparsers.add_parser('text', help='Print a snapshot in graphml_to_text\'s `name: a + b -> c` format.')
+    text_parser.add_argument('snapshot_file', help='Snapshot path.')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'save':
+            graph = load_recipe_graph(args.input_file, stream=args.stream)
+            save_snapshot(graph, args.snapshot_file)
+            print(f"Saved {graph.num_items} items and {graph.num_recipes} recipes to {args.snapshot_file}", file=sys.stderr)
+        else:
+            graph = load_snapshot(args.snapshot_file)
+            for line in graph.iter_text_lines():
+                print(line)
+    except FileNotFoundError as e:
+        print(f"Error: File not found: {e.filename}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
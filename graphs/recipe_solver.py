@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+
+# Production-rate calculator for recipe graphs extracted from yEd diagrams (see graphml_to_text.py and recipe_graph.py).
+# Given target output rates, works out how fast each needed recipe has to run, how many machines that takes, and how
+# much of each raw resource is consumed.
+#
+# Method: the graph becomes a sparse items x recipes matrix A, where A[i, r] is the net amount of item i made by one
+# craft of recipe r (products positive, ingredients negative, amounts from edge labels). Starting from the targets,
+# one producing recipe is chosen for each needed item (the first producer, unless overridden with --prefer); items with
+# no producer are raw resources. Then the square system A[needed items, chosen recipes] x = targets is solved with a
+# sparse direct solver, so loops (e.g. catalysts) are handled exactly. Byproducts that nothing needs are reported as
+# surplus. A needed item whose producers are all already chosen for other items (e.g. heavy oil when oil processing was
+# chosen for light oil) is balanced externally: reported as a raw resource if the plan is short of it, surplus if over.
+#
+# Usage:
+#   python recipe_solver.py recipes.graphml --target "iron gear=2" --prefer "heavy oil=coal liquefaction" --time "smelting=3.2"
+
+import sys
+import argparse
+from collections import deque
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import spsolve, lsqr
+
+from recipe_graph import load_recipe_graph
+
+# Rates below this are treated as zero when reporting.
+EPSILON = 1e-9
+
+
+def recipe_matrix(graph):
+    """
+    Assembles the items x recipes net-production matrix of a RecipeGraph in one vectorized pass.
+    Repeated edges between the same item and recipe are summed.
+
+    Returns:
+        scipy.sparse.csr_matrix: A[i, r] = amount of item i produced minus consumed by one craft of recipe r.
+    """
+    num_recipes = graph.num_recipes
+    recipe_ids = np.arange(num_recipes)
+    ingredient_columns = np.repeat(recipe_ids, np.diff(np.asarray(graph.ingredient_offsets)))
+    product_columns = np.repeat(recipe_ids, np.diff(np.asarray(graph.product_offsets)))
+    rows = np.concatenate([np.asarray(graph.products), np.asarray(graph.ingredients)])
+    columns = np.concatenate([product_columns, ingredient_columns])
+    data = np.concatenate([np.asarray(graph.product_amounts), -np.asarray(graph.ingredient_amounts)])
+    return sp.csr_matrix((data, (rows, columns)), shape=(graph.num_items, num_recipes))
+
+
+def select_recipes(graph, target_item_ids, preferred_recipes=None, raw_item_ids=()):
+    """
+    Walks back from the targets through ingredients, choosing one producing recipe per needed item.
+
+    Args:
+        graph (RecipeGraph): The recipe graph.
+        target_item_ids (iterable): Item IDs to produce.
+        preferred_recipes (dict): Item ID -> recipe ID to use for that item instead of its first producer.
+        raw_item_ids (iterable): Item IDs to treat as raw resources even if some recipe makes them.
+
+    Returns:
+        tuple: (needed item IDs, chosen recipe IDs, raw item IDs, shared item IDs), each in visit order.
+            needed[k] is made by chosen[k]; shared items are made only by recipes already chosen for other items.
+    """
+    preferred_recipes = preferred_recipes or {}
+    raw_item_ids = set(raw_item_ids)
+    needed = []
+    raw = []
+    shared = []
+    chosen = {} # recipe ID -> None, as an ordered set
+    seen = set(target_item_ids)
+    queue = deque(target_item_ids)
+    while queue:
+        item_id = queue.popleft()
+        if item_id in raw_item_ids:
+            raw.append(item_id)
+            continue
+        recipe_id = preferred_recipes.get(item_id)
+        producers = graph.item_producers(item_id)
+        if recipe_id is None:
+            # Use the first producer that isn't already chosen, so each needed item gets its own recipe.
+            for producer in producers:
+                if int(producer) not in chosen:
+                    recipe_id = int(producer)
+                    break
+        if recipe_id is None or recipe_id in chosen:
+            if len(producers) or recipe_id is not None:
+                shared.append(item_id)
+            else:
+                raw.append(item_id)
+            continue
+
+        needed.append(item_id)
+        chosen[recipe_id] = None
+        for ingredient in graph.recipe_ingredients(recipe_id):
+            ingredient = int(ingredient)
+            if ingredient not in seen:
+                seen.add(ingredient)
+                queue.append(ingredient)
+    return needed, list(chosen), raw, shared
+
+
+def solve_rates(graph, targets, preferred_recipes=None, raw_items=(), recipe_times=None, default_time=1.0, crafting_speed=1.0, matrix=None):
+    """
+    Solves for recipe rates that produce the target items.
+
+    Args:
+        graph (RecipeGraph): The recipe graph.
+        targets (dict): Item name -> wanted output rate (items per second).
+        preferred_recipes (dict): Item name -> recipe name to make it with.
+        raw_items (iterable): Item names to treat as raw resources.
+        recipe_times (dict): Recipe name -> seconds per craft, for machine counts.
+        default_time (float): Seconds per craft for recipes not in recipe_times.
+        crafting_speed (float): Machine crafting speed, for machine counts.
+        matrix: A precomputed recipe_matrix(graph), to save reassembling it for repeated solves.
+
+    Returns:
+        dict: 'recipes': [(recipe name, crafts per second, machines)], 'raw': [(item name, rate consumed)],
+            'surplus': [(item name, rate left over)], 'residual': how far the solution is from exact (0 if exact).
+
+    Raises:
+        KeyError: If an item or recipe name isn't in the graph.
+    """
+    recipe_times = recipe_times or {}
+    target_ids = {graph.item_index[name]: rate for name, rate in targets.items()}
+    preferred_ids = {graph.item_index[item]: graph.recipe_index[recipe] for item, recipe in (preferred_recipes or {}).items()}
+    raw_ids = [graph.item_index[name] for name in raw_items]
+    needed, chosen, raw, shared = select_recipes(graph, list(target_ids), preferred_ids, raw_ids)
+
+    if matrix is None:
+        matrix = recipe_matrix(graph)
+    rates = np.zeros(graph.num_recipes)
+    residual = 0.0
+    if chosen:
+        system = matrix[needed][:, chosen].tocsc()
+        wanted = np.array([target_ids.get(item_id, 0.0) for item_id in needed])
+        # Square, since each needed item brought in its own recipe.
+        with np.errstate(all='ignore'):
+            try:
+                solution = np.atleast_1d(spsolve(system, wanted))
+            except RuntimeError:
+                solution = None # Singular matrix
+        if solution is None or not np.all(np.isfinite(solution)):
+            # Singular, e.g. a recipe that makes nothing net of what it needs: fall back to least squares.
+            solution = lsqr(system, wanted, atol=1e-12, btol=1e-12)[0]
+        residual = float(np.linalg.norm(system @ solution - wanted))
+        rates[chosen] = solution
+
+    net = matrix @ rates
+    recipe_results = []
+    for recipe_id in chosen:
+        name = graph.recipe_names[recipe_id]
+        rate = float(rates[recipe_id])
+        machines = rate * recipe_times.get(name, default_time) / crafting_speed
+        recipe_results.append((name, rate, machines))
+
+    needed_set = set(needed)
+    raw_set = set(raw)
+    raw_results = [(graph.item_names[item_id], float(-net[item_id])) for item_id in raw]
+    # Shared items with a shortfall have to be supplied from outside, like raw resources.
+    for item_id in shared:
+        if net[item_id] < -EPSILON:
+            raw_results.append((graph.item_names[item_id], float(-net[item_id])))
+            raw_set.add(item_id)
+    surplus = [
+        (graph.item_names[item_id], float(net[item_id]) - target_ids.get(item_id, 0.0))
+        for item_id in np.flatnonzero(net > EPSILON).tolist()
+        if item_id not in needed_set and item_id not in raw_set and net[item_id] - target_ids.get(item_id, 0.0) > EPSILON
+    ]
+    # Targets are rows of the system, so anything made beyond them is surplus too.
+    for item_id in needed:
+        extra = float(net[item_id]) - target_ids.get(item_id, 0.0)
+        if extra > EPSILON:
+            surplus.append((graph.item_names[item_id], extra))
+
+    return {
+        'recipes': recipe_results,
+        'raw': raw_results,
+        'surplus': surplus,
+        'residual': residual,
+    }
+
+
+def parse_assignment(text, convert=str):
+    """Parses a NAME=VALUE command-line argument. The split is at the last '=', so names may contain '='."""
+    name, separator, value = text.rpartition("=")
+    if not separator or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {text!r}")
+    try:
+        return name.strip(), convert(value.strip())
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid value in {text!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Calculate recipe rates, machine counts and raw resource use for target outputs.')
+    parser.add_argument('graph_file', help='Path to a .graphml file, a .rgsnap snapshot, or a text file of recipe lines (amounts default to 1).')
+    parser.add_argument('--target', action='append', required=True, type=lambda text: parse_assignment(text, float), metavar='ITEM=RATE', help='Item to produce and its rate per second. Can be repeated.')
+    parser.add_argument('--prefer', action='append', default=[], type=parse_assignment, metavar='ITEM=RECIPE', help='Recipe to make ITEM with, instead of its first producer. Can be repeated.')
+    parser.add_argument('--raw', action='append', default=[], metavar='ITEM', help='Treat ITEM as a raw resource even if a recipe makes it. Can be repeated.')
+    parser.add_argument('--time', action='append', default=[], type=lambda text: parse_assignment(text, float), metavar='RECIPE=SECONDS', help='Crafting time of a recipe. Can be repeated.')
+    parser.add_argument('--default-time', type=float, default=1.0, help='Crafting time of recipes without --time (default: 1).')
+    parser.add_argument('--crafting-speed', type=float, default=1.0, help='Crafting speed of machines (default: 1).')
+    parser.add_argument('--stream', action='store_true', help='Parse GraphML incrementally, for huge graphs.')
+    args = parser.parse_args()
+
+    try:
+        graph = load_recipe_graph(args.graph_file, stream=args.stream)
+    except FileNotFoundError:
+        print(f"Error: File not found: {args.graph_file}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        result = solve_rates(graph, dict(args.target), dict(args.prefer), args.raw, dict(args.time), args.default_time, args.crafting_speed)
+    except KeyError as e:
+        print(f"Error: Unknown item or recipe: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print("--- Recipes ---")
+    for name, rate, machines in result['recipes']:
+        print(f"{name}: {rate:.4g}/s ({machines:.4g} machines)")
+        if rate < -EPSILON:
+            print(f"Warning: Negative rate for recipe '{name}'; try a different --prefer choice.", file=sys.stderr)
+    print("--- Raw resources ---")
+    for name, rate in result['raw']:
+        print(f"{name}: {rate:.4g}/s")
+    if result['surplus']:
+        print("--- Surplus ---")
+        for name, rate in result['surplus']:
+            print(f"{name}: {rate:.4g}/s")
+    if result['residual'] > 1e-6:
+        print(f"Warning: No exact solution with the chosen recipes (residual {result['residual']:.4g}).", file=sys.stderr)
@@ -0,0 +1,3 @@
+from factorization.batch import main
+
+main()
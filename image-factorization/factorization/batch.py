@@ -0,0 +1,252 @@
+"""
+Batch factorization: factorizes many icons in one command, in parallel across processes, so the Python/NumPy/
+scikit-learn start-up cost is paid once per worker instead of once per image.
+
+Usage (from the image-factorization folder):
+    python -m factorization 3 icons/ "more-icons/*.png" --method nmf --jobs 8 --output-dir factors/
+Directories are searched recursively for PNG files. Outputs are named like the single-image scripts' outputs,
+<name>_1.png, <name>_2.png, ..., next to each input or in --output-dir; files found in directories or by patterns that
+look like such outputs are skipped, with a warning.
+With --fit-on, the model is fitted once on a reference image, and every image is only transformed with it.
+With --shared-basis, the model is fitted once on all the inputs together (an icon family), so factor N is the same color
+component in every output and the family can be tinted consistently.
+With --histogram (nmf only), each distinct color is transformed once instead of every pixel, giving the same outputs;
+the fit still sees every pixel, so this mostly speeds up --fit-on and --shared-basis runs. --quantize N also merges
+colors within buckets of N levels per channel and fits on the distinct colors only, much faster but at some loss of detail.
+With --tiled, images are processed in blocks of rows and the outputs written as they go (see tiled.py), for sheets too
+big to factorize in memory.
+"""
+
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from threadpoolctl import threadpool_limits # Installed with scikit-learn
+
+from factorization import nmf, pca, tiled
+
+METHODS = {'nmf': nmf, 'pca': pca} # nmf is factorizeColorsA's method, pca is factorizeColorsB's
+IMAGE_EXTENSIONS = ('.png',)
+FACTOR_SUFFIX_PATTERN = re.compile(r'_\d+$')
+
+
+def is_factor_output(image_path):
+    """Whether image_path looks like an output of a previous run, i.e. <name>_<n>.png next to <name>.png."""
+    base_name, ext = os.path.splitext(image_path)
+    match = FACTOR_SUFFIX_PATTERN.search(base_name)
+    return match is not None and os.path.exists(base_name[:match.start()] + ext)
+
+
+def find_images(inputs):
+    """
+    Expands files, directories and glob patterns into a sorted, de-duplicated list of PNG files. Files found by
+    expanding a directory or glob pattern that look like outputs of previous runs (see is_factor_output) are skipped,
+    with a warning; files named explicitly are always kept.
+    """
+    found = {}
+    for pattern in inputs:
+        paths = [pattern] if os.path.exists(pattern) else sorted(glob.glob(pattern, recursive=True))
+        if not paths:
+            print(f"Warning: '{pattern}' didn't match any files.", file=sys.stderr)
+        for path in paths:
+            if os.path.isdir(path):
+                for dir_path, dir_names, file_names in os.walk(path):
+                    for file_name in file_names:
+                        if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                            file_path = os.path.join(dir_path, file_name)
+                            found[os.path.abspath(file_path)] = file_path
+            elif path.lower().endswith(IMAGE_EXTENSIONS):
+                found[os.path.abspath(path)] = path
+    explicit = {os.path.abspath(pattern) for pattern in inputs if os.path.isfile(pattern)}
+    skipped = [key for key in sorted(found) if key not in explicit and is_factor_output(found[key])]
+    if skipped:
+        print(f"Warning: Skipping {len(skipped)} file(s) that look like outputs of a previous run (name them explicitly "
+              f"to factorize them): {', '.join(found[key] for key in skipped)}", file=sys.stderr)
+    return [found[key] for key in sorted(found) if key not in skipped]
+
+def output_paths_for(image_path, num_factors, output_dir=None):
+    """Returns the factor image paths for image_path: <name>_1.png ... next to it, or in output_dir if given."""
+    base_name, ext = os.path.splitext(os.path.basename(image_path))
+    directory = output_dir if output_dir is not None else os.path.dirname(image_path)
+    return [os.path.join(directory, f"{base_name}_{i}{ext}") for i in range(1, num_factors + 1)]
+
+
+def fit_model(method, num_factors, image_path, histogram=False, quantize=None):
+    """Fits a model for the given method on one image, for reuse on others."""
+    module = METHODS[method]
+    if method == 'pca':
+        model = module.make_model(min(num_factors, 2)) # PCA on 2D hue/saturation data has at most 2 components
+        module.factorize_image(image_path, num_factors, model)
+    else:
+        model = module.make_model(num_factors)
+        module.factorize_colors(image_path, num_factors, model, histogram, quantize)
+    return model
+
+
+def fit_shared_model(method, num_factors, image_paths, sample_pixels=None):
+    """Fits one model on a whole family of images; see nmf.fit_shared_model and pca.fit_shared_model."""
+    return METHODS[method].fit_shared_model(image_paths, num_factors, sample_pixels)
+
+
+def factorize_file(image_path, method, num_factors, output_dir=None, model=None, histogram=False, quantize=None,
+                   tile_rows=None, sample_pixels=tiled.DEFAULT_SAMPLE_PIXELS):
+    """
+    Factorizes one image and saves its factor images.
+    Runs in worker processes, so errors are returned rather than raised.
+
+    Args:
+        image_path (str): The image.
+        method (str): 'nmf' or 'pca'.
+        num_factors (int): Number of factor images.
+        output_dir (str): Directory for the outputs; defaults to next to the input.
+        model: A fitted model to transform with (see fit_model), or None to fit one for this image.
+        histogram (bool), quantize (int): See nmf.factorize_colors; nmf only.
+        tile_rows (int): If given, factorize in blocks of this many rows (see tiled.py).
+        sample_pixels (int): With tile_rows, pixels to fit the nmf model on (None for all).
+
+    Returns:
+        tuple: (image_path, output paths, factor colors or None, seconds taken, error message or None)
+    """
+    start_time = time.perf_counter()
+    output_paths = output_paths_for(image_path, num_factors, output_dir)
+    colors = None
+    error = None
+    try:
+        if tile_rows is not None:
+            if method == 'pca':
+                tiled.factorize_image_tiled(image_path, num_factors, output_paths, model, tile_rows)
+            else:
+                colors = tiled.factorize_colors_tiled(image_path, num_factors, output_paths, model, tile_rows, sample_pixels)
+                if colors is None:
+                    raise ValueError("Image is completely transparent")
+            factor_images = []
+        elif method == 'pca':
+            factor_images = pca.factorize_image(image_path, num_factors, model)
+        else:
+            result = nmf.factorize_colors(image_path, num_factors, model, histogram, quantize)
+            if result is None:
+                raise ValueError("Image is completely transparent")
+            factor_images, colors = result
+        for factor_image, output_path in zip(factor_images, output_paths):
+            factor_image.save(output_path)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return image_path, output_paths, colors, time.perf_counter() - start_time, error
+
+
+def _init_worker():
+    warnings.filterwarnings('ignore')
+    # The pool already keeps every CPU busy; multithreaded BLAS in each worker would only oversubscribe them.
+    threadpool_limits(1)
+
+
+def factorize_files(image_paths, method, num_factors, output_dir=None, jobs=None, model=None, histogram=False, quantize=None,
+                    tile_rows=None, sample_pixels=tiled.DEFAULT_SAMPLE_PIXELS):
+    """
+    Factorizes many images, in parallel across processes when there's more than one job.
+
+    Returns:
+        list: factorize_file result tuples, in the same order as image_paths.
+    """
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    count = len(image_paths)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or count <= 1:
+        return [factorize_file(path, method, num_factors, output_dir, model, histogram, quantize, tile_rows, sample_pixels)
+                for path in image_paths]
+    jobs = min(jobs, count)
+    # Small icons take milliseconds each, so hand them out in chunks to keep inter-process overhead down.
+    chunk_size = max(1, count // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as executor:
+        return list(executor.map(factorize_file, image_paths, [method] * count, [num_factors] * count,
+                                 [output_dir] * count, [model] * count, [histogram] * count, [quantize] * count,
+                                 [tile_rows] * count, [sample_pixels] * count, chunksize=chunk_size))
+
+
+def print_summary(results, wall_time, verbose=False):
+    """Prints failures (and with verbose, every image with its factor colors), then totals."""
+    for image_path, output_paths, colors, seconds, error in results:
+        if error is not None:
+            print(f"{image_path}: FAILED ({error})")
+        elif verbose:
+            color_text = f" {' '.join(colors)}" if colors else ""
+            print(f"{image_path}: {seconds:.3f}s{color_text}")
+    failed = sum(1 for result in results if result[4] is not None)
+    cpu_time = sum(result[3] for result in results)
+    print(f"{len(results) - failed} factorized, {failed} failed, {cpu_time:.3f}s total factorization time, {wall_time:.3f}s wall time.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Factorize many PNG images into component images, in parallel.')
+    parser.add_argument('num_factors', type=int, help='Number of factor images per input.')
+    parser.add_argument('inputs', nargs='+', help='PNG files, directories (searched recursively) or glob patterns.')
+    parser.add_argument('-m', '--method', choices=sorted(METHODS), default='nmf', help='nmf (factorizeColorsA, default) or pca (factorizeColorsB).')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Number of worker processes (default: number of CPUs).')
+    parser.add_argument('--output-dir', help='Write factor images here instead of next to the inputs.')
+    parser.add_argument('--fit-on', metavar='IMAGE', help='Fit the model once on this image and only transform the inputs with it.')
+    parser.add_argument('--shared-basis', action='store_true', help='Fit one model on all inputs together and transform each input with it, so factors match across the family.')
+    parser.add_argument('--sample-pixels', type=int, default=None, help=f'With --shared-basis, fit on at most this many random pixels per image (default: 5000); with --tiled, fit each nmf model on about this many (default: {tiled.DEFAULT_SAMPLE_PIXELS}). 0 for all.')
+    parser.add_argument('--histogram', action='store_true', help='nmf: transform each distinct color once instead of every pixel (same output; speeds up the transform, not the fit).')
+    parser.add_argument('--quantize', type=int, metavar='N', help='nmf: like --histogram, but first round colors to buckets of N levels per channel and fit on the distinct colors only (lossy, much faster).')
+    parser.add_argument('--tiled', nargs='?', type=int, const=tiled.DEFAULT_BLOCK_ROWS, metavar='ROWS', help=f'Process each image in blocks of ROWS rows (default: {tiled.DEFAULT_BLOCK_ROWS}), streaming the outputs to disk, so memory stays bounded on huge sheets.')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print every image with its time and factor colors.')
+    args = parser.parse_args()
+
+    if args.num_factors < 1:
+        print("Error: Number of factors must be at least 1", file=sys.stderr)
+        sys.exit(1)
+    warnings.filterwarnings('ignore')
+
+    image_paths = find_images(args.inputs)
+    if not image_paths:
+        print("Error: No PNG input files found.", file=sys.stderr)
+        sys.exit(1)
+    if args.output_dir is not None and len({os.path.basename(path) for path in image_paths}) != len(image_paths):
+        print("Error: Some inputs have the same file name, so their outputs would collide in --output-dir.", file=sys.stderr)
+        sys.exit(1)
+
+    if (args.histogram or args.quantize) and args.method != 'nmf':
+        print("Error: --histogram and --quantize only apply to the nmf method.", file=sys.stderr)
+        sys.exit(1)
+    if args.quantize is not None and not 1 <= args.quantize <= 255:
+        print("Error: --quantize must be between 1 and 255.", file=sys.stderr)
+        sys.exit(1)
+    if args.tiled is not None and (args.histogram or args.quantize):
+        print("Error: --tiled can't be combined with --histogram or --quantize.", file=sys.stderr)
+        sys.exit(1)
+    if args.tiled is not None and args.tiled < 1:
+        print("Error: --tiled needs at least 1 row per block.", file=sys.stderr)
+        sys.exit(1)
+    if args.fit_on and args.shared_basis:
+        print("Error: Use either --fit-on or --shared-basis, not both.", file=sys.stderr)
+        sys.exit(1)
+    model = None
+    if args.shared_basis:
+        print(f"Fitting a shared basis on {len(image_paths)} image(s)...", file=sys.stderr)
+        try:
+            sample_pixels = 5000 if args.sample_pixels is None else args.sample_pixels
+            model = fit_shared_model(args.method, args.num_factors, image_paths, sample_pixels or None)
+        except Exception as e:
+            print(f"Error: Couldn't fit a shared model: {e}", file=sys.stderr)
+            sys.exit(1)
+    elif args.fit_on:
+        try:
+            model = fit_model(args.method, args.num_factors, args.fit_on, args.histogram, args.quantize)
+        except Exception as e:
+            print(f"Error: Couldn't fit a model on '{args.fit_on}': {e}", file=sys.stderr)
+            sys.exit(1)
+
+    print(f"Factorizing {len(image_paths)} image(s) into {args.num_factors} component(s) each...", file=sys.stderr)
+    start_time = time.perf_counter()
+    tiled_sample_pixels = tiled.DEFAULT_SAMPLE_PIXELS if args.sample_pixels is None else args.sample_pixels or None
+    results = factorize_files(image_paths, args.method, args.num_factors, args.output_dir, args.jobs, model,
+                              args.histogram, args.quantize, args.tiled, tiled_sample_pixels)
+    print_summary(results, time.perf_counter() - start_time, args.verbose)
+    if any(result[4] is not None for result in results):
+        sys.exit(1)
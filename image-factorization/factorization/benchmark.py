@@ -0,0 +1,282 @@
+"""
+Benchmark and quality suite for the factorization methods. Synthetic icons are mixed from known color components
+(the same icon at every size), and each method/option combination factorizes them the way the batch command does,
+output files included. Every run is in a fresh process, so peak memory is per run. Reported per run:
+    seconds: wall time of factorizing and saving the outputs
+    peak_rss_mb: peak resident memory of the process (imports and the decoded input included)
+    reconstruction_rmse: RMS error (0-255 levels, premultiplied RGB) of the best tinted recombination of the factor
+        images, i.e. how well tinting the factors with the right colors gives the icon back
+    component_error: mean absolute error (0-255 levels) between the known component alphas and the best-matching
+        factor alphas, over visible pixels. PCA factors are normalized strengths rather than shares, so expect more here.
+Results are saved as JSON; --compare flags cases that got slower, bigger or worse than in an earlier results file.
+
+Usage (from the image-factorization folder):
+    python -m factorization.benchmark --sizes 64 256 1024 4096 --output results.json
+    python -m factorization.benchmark --cases nmf nmf-histogram --compare results.json
+"""
+
+import os
+import sys
+import json
+import colorsys
+import time
+import platform
+import argparse
+import tempfile
+import warnings
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+from scipy.optimize import linear_sum_assignment
+
+try:
+    import resource
+except ImportError:
+    resource = None # Not on Windows; peak memory isn't reported there
+
+from factorization import batch, tiled
+
+# Case name -> (method, batch.factorize_file options)
+CASES = {
+    'nmf': ('nmf', {}),
+    'nmf-histogram': ('nmf', {'histogram': True}),
+    'nmf-quantize16': ('nmf', {'quantize': 16}),
+    'nmf-tiled': ('nmf', {'tile_rows': tiled.DEFAULT_BLOCK_ROWS}),
+    'pca': ('pca', {}),
+    'pca-tiled': ('pca', {'tile_rows': tiled.DEFAULT_BLOCK_ROWS}),
+}
+DEFAULT_SIZES = [64, 256, 1024, 4096]
+REGRESSION_RATIO = 1.2 # --compare flags runs this much slower or bigger than before
+REGRESSION_LEVELS = 1.0 # ... or with errors this many 0-255 levels worse
+
+
+def synthetic_icon(size, num_components=3, seed=0):
+    """
+    Makes a round icon mixed from num_components colors, each dominating a few soft blobs, with mild shading and an
+    antialiased edge. Shapes are defined in relative coordinates, so every size shows the same icon.
+
+    Returns:
+        tuple: ((size, size, 4) uint8 RGBA image, (num_components, size, size) float32 component alphas in 0-1,
+            (num_components, 3) component RGB colors in 0-1)
+    """
+    rng = np.random.default_rng(seed)
+    hues = (rng.random() + np.arange(num_components) / num_components) % 1.0
+    saturations = rng.uniform(0.6, 0.9, num_components)
+    values = rng.uniform(0.8, 1.0, num_components)
+    colors = np.array([colorsys.hsv_to_rgb(*hsv) for hsv in zip(hues, saturations, values)], dtype=np.float32)
+
+    coordinates = (np.arange(size, dtype=np.float32) + 0.5) / size
+    y, x = coordinates[:, np.newaxis], coordinates[np.newaxis, :]
+    weights = np.empty((num_components, size, size), dtype=np.float32)
+    for k in range(num_components):
+        weights[k] = 0.02
+        for cy, cx, radius in zip(rng.uniform(0.15, 0.85, 3), rng.uniform(0.15, 0.85, 3), rng.uniform(0.08, 0.2, 3)):
+            weights[k] += np.exp(-((y - cy) ** 2 + (x - cx) ** 2) / (2 * radius ** 2))
+    weights **= 3 # Sharpen, so each color has regions of its own with soft transitions between them
+    shares = weights / weights.sum(axis=0)
+    del weights
+
+    distance = np.sqrt((y - 0.5) ** 2 + (x - 0.5) ** 2)
+    alpha = np.clip((0.45 - distance) * size / 1.5 + 0.5, 0, 1) # Edge about 1.5 pixels wide
+    shade = 1.0 - 0.25 * (x + y) / 2 # Lit from the top left
+    rgb = np.einsum('khw,kc->hwc', shares, colors) * shade[..., np.newaxis]
+
+    image = np.empty((size, size, 4), dtype=np.uint8)
+    image[..., :3] = np.round(rgb * 255)
+    image[..., 3] = np.round(alpha * 255)
+    return image, shares * alpha, colors
+
+
+def reconstruction_rmse(image, factor_alphas):
+    """
+    RMS error, in 0-255 levels, of the best recombination of the factors: each factor tinted with the color that
+    least-squares fits the image's premultiplied RGB. Works from the normal equations, so no full-size residual is made.
+
+    Args:
+        image ((H, W, 4) uint8): The original.
+        factor_alphas ((k, H, W) uint8): The factors' alpha planes.
+    """
+    alpha = image[..., 3].reshape(-1).astype(np.float64) / 255
+    premultiplied = image[..., :3].reshape(-1, 3) / 255 * alpha[:, np.newaxis]
+    factors = factor_alphas.reshape(len(factor_alphas), -1).T / 255
+    gram = factors.T @ factors
+    projections = factors.T @ premultiplied
+    tints = np.linalg.pinv(gram) @ projections
+    squared_error = (premultiplied ** 2).sum() - 2 * (tints * projections).sum() + (tints * (gram @ tints)).sum()
+    return float(np.sqrt(max(squared_error, 0.0) / premultiplied.size) * 255)
+
+
+def component_error(true_alphas, factor_alphas, visible):
+    """
+    Mean absolute error, in 0-255 levels over the visible pixels, between each known component and the factor it's
+    matched with (matching minimizes the total error; factors beyond the number of components are ignored).
+    """
+    truth = true_alphas.reshape(len(true_alphas), -1)[:, visible]
+    found = factor_alphas.reshape(len(factor_alphas), -1)[:, visible].astype(np.float32) / 255
+    costs = np.array([[np.abs(t - f).mean() for f in found] for t in truth])
+    rows, columns = linear_sum_assignment(costs)
+    # Components left without a factor (PCA has at most 2) count as entirely missed.
+    missed = [np.abs(truth[k]).mean() for k in range(len(truth)) if k not in set(rows)]
+    return float((costs[rows, columns].sum() + sum(missed)) / len(truth) * 255)
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024 # Bytes on macOS, KiB elsewhere
+
+
+def run_case(case, image_path, truth_path, num_factors, output_dir):
+    """Runs one case in the current (fresh) process and returns its result dict."""
+    warnings.filterwarnings('ignore')
+    method, options = CASES[case]
+    start_time = time.perf_counter()
+    _, output_paths, _, _, error = batch.factorize_file(image_path, method, num_factors, output_dir, **options)
+    seconds = time.perf_counter() - start_time
+    result = {'seconds': seconds, 'peak_rss_mb': peak_rss_mb(), 'error': error}
+    if error is None:
+        image = np.asarray(Image.open(image_path).convert('RGBA'))
+        factor_alphas = np.stack([np.asarray(Image.open(path).getchannel('A')) for path in output_paths])
+        true_alphas = np.load(truth_path).astype(np.float32) / 255
+        result['reconstruction_rmse'] = reconstruction_rmse(image, factor_alphas)
+        result['component_error'] = component_error(true_alphas, factor_alphas, image[..., 3].reshape(-1) > 0)
+    return result
+
+
+def write_icon(size, num_components, image_path, truth_path):
+    """Saves a synthetic_icon and its component alphas (as uint8 levels)."""
+    image, true_alphas, _ = synthetic_icon(size, num_components)
+    Image.fromarray(image, 'RGBA').save(image_path)
+    np.save(truth_path, np.round(true_alphas * 255).astype(np.uint8))
+
+
+def run_isolated(function, *args):
+    """
+    Runs function(*args) in a new process and returns its result. Peak RSS is inherited by child processes on Linux,
+    so everything big (icon generation included) runs this way, to keep this process small and the runs independent.
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(function, *args).result()
+
+
+def environment():
+    """Versions and machine details to store with the results."""
+    import sklearn
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_benchmark(cases, sizes, num_components=3, repeat=1, verbose=True):
+    """
+    Runs every case at every size.
+
+    Returns:
+        list: Result dicts with case, method, size, components and the measurements (the fastest of repeat runs).
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in sizes:
+            image_path = os.path.join(work_dir, f'icon{size}.png')
+            truth_path = os.path.join(work_dir, f'icon{size}_truth.npy')
+            run_isolated(write_icon, size, num_components, image_path, truth_path)
+            for case in cases:
+                output_dir = os.path.join(work_dir, case)
+                os.makedirs(output_dir, exist_ok=True)
+                runs = [run_isolated(run_case, case, image_path, truth_path, num_components, output_dir)
+                        for _ in range(repeat)]
+                result = min(runs, key=lambda run: run['seconds'])
+                result.update(case=case, method=CASES[case][0], size=size, components=num_components)
+                results.append(result)
+                if verbose:
+                    print(format_result(result), file=sys.stderr)
+    return results
+
+
+def format_result(result):
+    if result['error'] is not None:
+        return f"{result['case']:>15} {result['size']:>5}px  FAILED ({result['error']})"
+    rss = f"{result['peak_rss_mb']:8.0f}MB" if result['peak_rss_mb'] is not None else "       ?MB"
+    return (f"{result['case']:>15} {result['size']:>5}px {result['seconds']:9.3f}s {rss}"
+            f"  rmse {result['reconstruction_rmse']:6.2f}  component error {result['component_error']:6.2f}")
+
+
+def compare_results(old_results, new_results):
+    """
+    Finds regressions between two result lists, matching runs by case, size and number of components.
+
+    Returns:
+        list: Messages describing each regression.
+    """
+    old_by_key = {(r['case'], r['size'], r['components']): r for r in old_results}
+    regressions = []
+    for new in new_results:
+        old = old_by_key.get((new['case'], new['size'], new['components']))
+        if old is None or new['error'] is not None or old['error'] is not None:
+            if old is not None and new['error'] is not None and old['error'] is None:
+                regressions.append(f"{new['case']} {new['size']}px: now fails ({new['error']})")
+            continue
+        label = f"{new['case']} {new['size']}px"
+        if new['seconds'] > old['seconds'] * REGRESSION_RATIO:
+            regressions.append(f"{label}: {old['seconds']:.3f}s -> {new['seconds']:.3f}s")
+        if old['peak_rss_mb'] and new['peak_rss_mb'] and new['peak_rss_mb'] > old['peak_rss_mb'] * REGRESSION_RATIO:
+            regressions.append(f"{label}: peak memory {old['peak_rss_mb']:.0f}MB -> {new['peak_rss_mb']:.0f}MB")
+        for metric in ('reconstruction_rmse', 'component_error'):
+            if new[metric] > old[metric] + REGRESSION_LEVELS:
+                regressions.append(f"{label}: {metric} {old[metric]:.2f} -> {new[metric]:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark speed, memory and quality of the factorization methods on synthetic icons.')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES), help='Method/option combinations to run (default: all).')
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help='Icon sizes in pixels (default: %(default)s).')
+    parser.add_argument('--components', type=int, default=3, help='Color components per icon, and factors asked for (default: %(default)d).')
+    parser.add_argument('--repeat', type=int, default=1, help='Run each case this many times and keep the fastest (default: %(default)d).')
+    parser.add_argument('-o', '--output', default='benchmark.json', help='JSON file to save results to (default: %(default)s).')
+    parser.add_argument('--compare', metavar='JSON', help='Earlier results file; exits with status 1 if anything regressed.')
+    args = parser.parse_args()
+
+    if args.components < 1 or args.repeat < 1 or min(args.sizes) < 1:
+        print("Error: --components, --repeat and --sizes must be at least 1", file=sys.stderr)
+        sys.exit(1)
+    old_results = None
+    if args.compare:
+        try:
+            with open(args.compare) as f:
+                old_results = json.load(f)['results']
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error: Can't read results from '{args.compare}': {e}", file=sys.stderr)
+            sys.exit(1)
+
+    results = run_benchmark(args.cases, args.sizes, args.components, args.repeat)
+    with open(args.output, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    print(f"Saved {len(results)} result(s) to {args.output}", file=sys.stderr)
+
+    if old_results is not None:
+        regressions = compare_results(old_results, results)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}.")
+
+
+if __name__ == "__main__":
+    main()
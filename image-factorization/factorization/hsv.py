@@ -0,0 +1,44 @@
+"""
+Vectorized RGB -> HSV conversion, shared by factorizeColorsA.py and factorizeColorsB.py.
+Converting a whole pixel array in a few NumPy operations is much faster than calling colorsys once per pixel.
+"""
+
+import numpy as np
+
+
+def rgb_to_hsv(rgb):
+    """
+    Convert an (N, 3) array of 0-255 RGB values to (N, 3) HSV values in the 0-1 range.
+    Gives the same results as colorsys.rgb_to_hsv on each pixel divided by 255, up to floating point rounding.
+    """
+    rgb_norm = np.asarray(rgb, dtype=np.float64) / 255.0
+    r, g, b = rgb_norm[:, 0], rgb_norm[:, 1], rgb_norm[:, 2]
+
+    max_val = np.maximum(np.maximum(r, g), b)
+    min_val = np.minimum(np.minimum(r, g), b)
+    diff = max_val - min_val
+    gray = diff == 0
+    safe_diff = np.where(gray, 1.0, diff) # Hue and saturation are 0 for grays; avoid dividing by 0
+
+    v = max_val
+    s = np.where(gray, 0.0, diff / np.where(max_val == 0, 1.0, max_val))
+
+    # Same precedence as colorsys when several channels are the maximum: red, then green, then blue.
+    h = np.select(
+        [max_val == r, max_val == g],
+        [(g - b) / safe_diff, (b - r) / safe_diff + 2.0],
+        (r - g) / safe_diff + 4.0,
+    )
+    h = np.where(gray, 0.0, (h / 6.0) % 1.0)
+
+    return np.column_stack([h, s, v])
+
+
+def rgb_to_hsv_vectorized(rgb_array):
+    """Convert RGB array to HSV array, handling transparency."""
+    hsv = rgb_to_hsv(rgb_array[:, :3])
+
+    # Add alpha channel
+    alpha = rgb_array[:, 3] / 255.0 if rgb_array.shape[1] == 4 else np.ones(len(rgb_array))
+
+    return np.column_stack([hsv, alpha])
@@ -0,0 +1,304 @@
+"""
+NMF-based factorization (the method of factorizeColorsA.py): non-negative matrix factorization of per-pixel HSV
+features, giving one white image per factor whose alpha is that factor's share of each pixel.
+
+With histogram=True the model is fitted on every pixel as usual, but each distinct RGBA color is transformed once and
+the results are scattered back to the pixels, giving the same output. Icons usually have a few thousand distinct colors,
+so this mostly pays off when the model is already fitted (e.g. shared across a family) and only transforms each image.
+With quantize, colors are first rounded into buckets (lossy) and the model is also fitted on the distinct colors only,
+each weighted by its pixel count, which is faster still but doesn't match the per-pixel fit.
+factorize_alphas returns the factors as one (k, height, width) uint8 array of alpha planes; factorize_colors wraps them
+in white RGBA images.
+"""
+
+import colorsys
+import numpy as np
+from PIL import Image
+from sklearn.decomposition import NMF
+
+from factorization.hsv import rgb_to_hsv_vectorized
+
+
+def make_model(num_factors):
+    """Returns the (unfitted) NMF model used by factorize_colors."""
+    return NMF(n_components=num_factors, init='nndsvda', random_state=42, max_iter=500)
+
+
+def is_fitted(model):
+    """Whether a scikit-learn decomposition model has been fitted."""
+    return hasattr(model, 'components_')
+
+
+def prepare_color_features(hsv_array, num_factors):
+    """
+    Prepare features for factorization, handling circular hue.
+    Create richer feature space to support more factors.
+    """
+    h, s, v, a = hsv_array[:, 0], hsv_array[:, 1], hsv_array[:, 2], hsv_array[:, 3]
+    
+    # Limit features to what we need for the requested number of factors
+    # NMF requires n_features >= n_components
+    # Each feature is only computed if it's kept, since they're full columns over every pixel.
+    feature_builders = [
+        # 1. Basic features: hue cartesian coordinates (shifted to positive)
+        lambda: s * np.cos(2 * np.pi * h) + 1,
+        lambda: s * np.sin(2 * np.pi * h) + 1,
+        # 2. Value (brightness)
+        lambda: v,
+        # 3. Saturation as separate feature
+        lambda: s,
+        # 4. Higher harmonics of hue for more complex color patterns
+        # This allows capturing more nuanced color variations
+        lambda: s * np.cos(4 * np.pi * h) + 1,
+        lambda: s * np.sin(4 * np.pi * h) + 1,
+        # 5. Interaction features
+        lambda: s * v,  # Saturation-value interaction
+        lambda: v * v,  # Value squared (for highlights/shadows)
+        # 6. Color "purity" features
+        lambda: s * s,  # Saturation squared (color intensity)
+    ]
+    max_features = min(len(feature_builders), max(num_factors, 3))
+    
+    # Convert to numpy array and transpose
+    features = np.column_stack([build() for build in feature_builders[:max_features]])
+    
+    return features, a
+
+
+def load_pixels(image_path):
+    """Loads an image as an (N, 4) uint8 array of RGBA rows. Returns (pixels, width, height)."""
+    img = image_path if isinstance(image_path, Image.Image) else Image.open(image_path)
+    img = img.convert('RGBA')
+    width, height = img.size
+    
+    # Convert to numpy array and reshape
+    img_array = np.array(img)
+    return img_array.reshape(-1, 4), width, height
+
+
+def load_hsv_pixels(image_path):
+    """Loads an image as an (N, 4) array of HSV + alpha rows. Returns (hsv_pixels, width, height)."""
+    pixels, width, height = load_pixels(image_path)
+    return rgb_to_hsv_vectorized(pixels), width, height
+
+
+def unique_colors(pixels, quantize=None):
+    """
+    Finds the distinct colors of (N, 4) uint8 RGBA pixels. Fully transparent pixels all count as one color, since
+    their factor alphas are 0 whatever their RGB.
+
+    Args:
+        pixels (np.ndarray): RGBA rows.
+        quantize (int): If given, first round R, G and B to the middle of buckets of this size (lossy).
+
+    Returns:
+        tuple: (colors as (M, 4) uint8 rows, inverse index so that colors[inverse] gives the pixels, pixel count per color)
+    """
+    pixels = pixels.copy()
+    pixels[pixels[:, 3] == 0] = 0
+    if quantize and quantize > 1:
+        rgb = pixels[:, :3]
+        np.minimum(rgb // quantize * quantize + quantize // 2, 255, out=rgb)
+    # View each RGBA row as one 32-bit key, so np.unique works on a flat array.
+    keys = np.ascontiguousarray(pixels).view(np.uint32).ravel()
+    unique_keys, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    return unique_keys.view(np.uint8).reshape(-1, 4), inverse.ravel(), counts
+
+
+def fit_features(hsv_pixels, num_factors, counts=None):
+    """
+    Returns the feature rows the model is fitted on: those of non-transparent pixels, weighted by alpha.
+    If hsv_pixels are distinct colors with pixel counts, each row is also scaled by sqrt(count): for NMF's squared
+    error, that's the same as repeating the row count times, since each row's coefficients are free to scale with it.
+    """
+    # Get non-transparent pixels for analysis
+    alpha_mask = hsv_pixels[:, 3] > 0.01  # Pixels with some opacity
+    non_transparent_pixels = hsv_pixels[alpha_mask]
+    
+    # Prepare features with number of factors considered
+    features, alphas = prepare_color_features(non_transparent_pixels, num_factors)
+    
+    # Weight features by alpha to give less importance to semi-transparent pixels
+    weights = alphas if counts is None else alphas * np.sqrt(counts[alpha_mask])
+    return features * weights[:, np.newaxis]
+
+
+def fit_shared_model(image_paths, num_factors, sample_pixels=None, random_state=42):
+    """
+    Fits one NMF basis for a family of images, by stacking their feature rows. Passing the result as the model to
+    factorize_colors then only transforms each image, and factor N means the same color component in every image.
+
+    Args:
+        image_paths (list): Paths or PIL images.
+        num_factors (int): Number of components.
+        sample_pixels (int): If given, fit on at most this many randomly chosen pixels per image, to bound memory.
+        random_state (int): Seed for the pixel sampling.
+
+    Raises:
+        ValueError: If every image is completely transparent.
+    """
+    rng = np.random.default_rng(random_state)
+    rows = []
+    for image_path in image_paths:
+        hsv_pixels, _, _ = load_hsv_pixels(image_path)
+        features = fit_features(hsv_pixels, num_factors)
+        if sample_pixels is not None and len(features) > sample_pixels:
+            features = features[rng.choice(len(features), sample_pixels, replace=False)]
+        rows.append(features)
+    stacked = np.vstack(rows) if rows else np.empty((0, 0))
+    if len(stacked) == 0:
+        raise ValueError("All images are completely transparent")
+    model = make_model(num_factors)
+    model.fit(stacked)
+    return model
+
+
+def transform_colors(model, hsv_colors, num_factors, counts=None):
+    """
+    Transforms HSV + alpha rows with a fitted model, in the model's float type (scikit-learn requires it).
+    If the rows are distinct colors, passing their pixel counts gives the same proportions as transforming every pixel:
+    each row is scaled by its count first. The (default, coordinate descent) solver's iterates and its stopping test are
+    linear in each row, so this stops at the same iteration as the per-pixel transform, and the scale cancels out when
+    the coefficients are normalized.
+
+    Returns:
+        tuple: (each row's factor proportions, summing to 1, as an (N, num_factors) array of hsv_colors' dtype, alphas)
+    """
+    features, alphas = prepare_color_features(hsv_colors, num_factors)
+    if counts is not None:
+        features *= counts[:, np.newaxis]
+    coefficients = model.transform(features.astype(model.components_.dtype, copy=False))
+    coefficients = coefficients.astype(hsv_colors.dtype, copy=False)
+    del features
+    
+    # Normalize coefficients to get proportions
+    coeff_sums = coefficients.sum(axis=1, keepdims=True)
+    coeff_sums[coeff_sums == 0] = 1  # Avoid division by zero
+    coefficients /= coeff_sums
+    return coefficients, alphas
+
+
+def hsv_to_hex(hsv):
+    """Converts an HSV color (0-1 components) to a #rrggbb string."""
+    # Convert back to RGB
+    rgb = colorsys.hsv_to_rgb(hsv[0], hsv[1], hsv[2])
+    
+    # Convert to hex
+    r, g, b = int(rgb[0] * 255), int(rgb[1] * 255), int(rgb[2] * 255)
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def factorize_alphas(image_path, num_factors, model=None, histogram=False, quantize=None, dtype=np.float32):
+    """
+    Factorize an image into color components, as alpha planes.
+    The model is fitted on the non-transparent pixels as before (on distinct colors with quantize), but only pixels
+    that aren't fully transparent are transformed (the others get alpha 0 in every factor anyway), the rest of the
+    pipeline runs in dtype, and every factor's alpha is written straight into one uint8 buffer, so memory stays at a
+    few bytes per pixel.
+
+    Args:
+        image_path: Path to the image, or an already opened PIL image.
+        num_factors (int): Number of components.
+        model: Optional NMF model to reuse. If it's already fitted (e.g. on another image of the same family), it's only
+            used to transform this image; otherwise it's fitted here, and can be passed on to later calls.
+        histogram (bool): Transform each distinct color once instead of every pixel (see unique_colors); same output.
+        quantize (int): Quantize colors into buckets of this size first, and fit on the distinct colors weighted by
+            their pixel counts too (lossy).
+        dtype: Float type for transforming and normalizing (np.float64 for full precision).
+
+    Returns:
+        tuple: (factor alphas as a (num_factors, height, width) uint8 array, factor hex colors), or None if the image
+            is completely transparent.
+    """
+    # Load image
+    pixels, width, height = load_pixels(image_path)
+    visible = np.flatnonzero(pixels[:, 3])
+    pixels = pixels[visible]
+    if quantize:
+        colors, inverse, counts = unique_colors(pixels, quantize)
+        hsv_colors = rgb_to_hsv_vectorized(colors)
+    else:
+        hsv_colors = rgb_to_hsv_vectorized(pixels)
+        inverse = counts = None
+    
+    weighted_features = fit_features(hsv_colors, num_factors, counts).astype(dtype, copy=False)
+    if len(weighted_features) == 0:
+        print("Error: Image is completely transparent")
+        return None
+    
+    # Use Non-negative Matrix Factorization (NMF) for better interpretability
+    # NMF ensures non-negative components which makes more sense for colors
+    nmf = model if model is not None else make_model(num_factors)
+    
+    # Fit on non-transparent pixels
+    if not is_fitted(nmf):
+        nmf.fit(weighted_features)
+    del weighted_features
+    
+    if histogram and not quantize:
+        # The fit above saw every pixel; only the transform runs once per distinct color
+        colors, inverse, counts = unique_colors(pixels)
+        hsv_colors = rgb_to_hsv_vectorized(colors)
+    del pixels
+    
+    # Transform the visible pixels
+    hsv_colors = hsv_colors.astype(dtype)
+    normalized_coeffs, all_alphas = transform_colors(nmf, hsv_colors, num_factors, counts)
+    
+    # Create factor alphas and analyze colors
+    factor_alphas = np.zeros((num_factors, height * width), dtype=np.uint8)
+    factor_colors = []
+    opaque_colors = all_alphas > 0.5
+    
+    for factor_idx in range(num_factors):
+        # Get the coefficient for this factor for each pixel
+        factor_strengths = normalized_coeffs[:, factor_idx]
+        
+        # Multiply by original alpha to maintain transparency; scatter distinct colors back to their pixels
+        strengths = factor_strengths * all_alphas
+        strengths *= 255
+        if inverse is not None:
+            strengths = strengths[inverse]
+        factor_alphas[factor_idx, visible] = strengths
+        
+        # Determine representative color for this factor
+        # Find pixels where this factor is dominant
+        factor_mask = (factor_strengths > 0.5) & opaque_colors
+        
+        if np.any(factor_mask):
+            # Get the average HSV values for pixels where this factor dominates
+            weights = None if counts is None else counts[factor_mask]
+            dominant_hsv = np.average(hsv_colors[factor_mask].astype(np.float64), axis=0, weights=weights)
+            factor_colors.append(hsv_to_hex(dominant_hsv))
+        else:
+            factor_colors.append("#808080")  # Gray if no dominant pixels
+    
+    return factor_alphas.reshape(num_factors, height, width), factor_colors
+
+
+def alpha_image(alpha):
+    """Makes a white RGBA image with the given (height, width) uint8 alpha plane."""
+    image = Image.new('RGBA', (alpha.shape[1], alpha.shape[0]), (255, 255, 255, 0))
+    image.putalpha(Image.fromarray(alpha, mode='L'))
+    return image
+
+
+def factorize_colors(image_path, num_factors, model=None, histogram=False, quantize=None):
+    """
+    Factorize an image into color components.
+
+    Args:
+        image_path: Path to the image, or an already opened PIL image.
+        num_factors (int): Number of components.
+        model: Optional NMF model to reuse. If it's already fitted (e.g. on another image of the same family), it's only
+            used to transform this image; otherwise it's fitted here, and can be passed on to later calls.
+        histogram, quantize: See factorize_alphas.
+
+    Returns:
+        tuple: (factor images, factor hex colors), or None if the image is completely transparent.
+    """
+    result = factorize_alphas(image_path, num_factors, model, histogram, quantize)
+    if result is None:
+        return None
+    factor_alphas, factor_colors = result
+    return [alpha_image(alpha) for alpha in factor_alphas], factor_colors
@@ -0,0 +1,163 @@
+"""
+PCA-based factorization (the method of factorizeColorsB.py): PCA on the hue/saturation plane of the opaque pixels,
+giving one white image per factor whose alpha is that factor's min-max normalized strength.
+"""
+
+import numpy as np
+from PIL import Image
+from sklearn.decomposition import PCA
+
+from factorization.hsv import rgb_to_hsv
+
+
+def make_model(num_components):
+    """Returns the (unfitted) PCA model used by factorize_image."""
+    return PCA(n_components=num_components, random_state=42, svd_solver='full')
+
+
+def is_fitted(model):
+    """Whether a scikit-learn decomposition model has been fitted."""
+    return hasattr(model, 'components_')
+
+
+def hue_saturation_features(rgb):
+    """Converts (N, 3) 0-255 RGB values to (N, 2) cartesian hue/saturation coordinates."""
+    hsv_data = rgb_to_hsv(rgb)
+    h_angles = hsv_data[:, 0] * 2.0 * np.pi
+    s_values = hsv_data[:, 1]
+    return np.stack((s_values * np.cos(h_angles), s_values * np.sin(h_angles)), axis=-1)
+
+
+def opaque_pixels(image):
+    """Loads an image and returns the (N, 4) RGBA rows of its non-fully-transparent pixels."""
+    img = image if isinstance(image, Image.Image) else Image.open(image)
+    pixels_rgba_flat = np.array(img.convert('RGBA')).reshape(-1, 4)
+    return pixels_rgba_flat[pixels_rgba_flat[:, 3] / 255.0 > 1e-5]
+
+
+def fit_shared_model(images, num_factors, sample_pixels=None, random_state=42):
+    """
+    Fits one PCA basis for a family of images, by stacking their hue/saturation rows. Passing the result as the model
+    to factorize_image then only transforms each image, and factor N means the same color component in every image.
+    The range of each component over the whole family is stored on the model as strength_ranges_ (mins, maxs), and
+    factorize_image normalizes with it, so strengths are comparable between images too.
+
+    Args:
+        images (list): Paths or PIL images.
+        num_factors (int): Number of factor images wanted; PCA computes at most 2 components.
+        sample_pixels (int): If given, fit on at most this many randomly chosen pixels per image, to bound memory.
+        random_state (int): Seed for the pixel sampling.
+
+    Raises:
+        ValueError: If no image has opaque pixels.
+    """
+    rng = np.random.default_rng(random_state)
+    rows = []
+    for image in images:
+        features = hue_saturation_features(opaque_pixels(image)[:, :3])
+        if sample_pixels is not None and len(features) > sample_pixels:
+            features = features[rng.choice(len(features), sample_pixels, replace=False)]
+        rows.append(features)
+    stacked = np.vstack(rows) if rows else np.empty((0, 2))
+    if len(stacked) == 0:
+        raise ValueError("No image has opaque pixels")
+    model = make_model(min(num_factors, stacked.shape[1], len(stacked)))
+    strengths = model.fit_transform(stacked)
+    model.strength_ranges_ = (strengths.min(axis=0), strengths.max(axis=0))
+    return model
+
+
+def factorize_image(image, num_factors_requested, model=None):
+    """
+    Factorizes an image into component images based on HSV colors using PCA.
+    Each output image is white with an alpha channel representing the factor's strength.
+
+    Args:
+        image: Path to the image, or an already opened PIL image.
+        num_factors_requested (int): Number of output images. PCA on 2D hue/saturation data gives at most 2 components;
+            extra factor images are transparent.
+        model: Optional PCA model to reuse. If it's already fitted (e.g. on another image of the same family), it's
+            only used to transform this image; otherwise it's fitted here, and can be passed on to later calls.
+            Models from fit_shared_model also fix the strength normalization (see there).
+
+    Returns:
+        list: num_factors_requested RGBA PIL images.
+    """
+    img = image if isinstance(image, Image.Image) else Image.open(image)
+    img_rgba = img.convert('RGBA') # Ensure image is in RGBA format
+    width, height = img_rgba.size
+    pixels_rgba_flat = np.array(img_rgba).reshape(-1, 4) # Shape: (num_pixels, 4)
+
+    original_alphas_flat = pixels_rgba_flat[:, 3] / 255.0
+
+    # Identify non-fully-transparent pixels (where original alpha > a tiny threshold)
+    opaque_mask_flat = original_alphas_flat > 1e-5
+    num_opaque_pixels = np.sum(opaque_mask_flat)
+
+    pca_n_components_computed = 0
+    normalized_factor_alphas_opaque = np.array([]).reshape(num_opaque_pixels, 0) # Default for no opaque pixels
+
+    if num_opaque_pixels > 0:
+        hs_cartesian_data_opaque = hue_saturation_features(pixels_rgba_flat[opaque_mask_flat, :3]) # Shape: (num_opaque_pixels, 2)
+
+        n_features_in_data = hs_cartesian_data_opaque.shape[1] # Should be 2
+
+        # Effective number of components PCA will compute.
+        if model is not None and is_fitted(model):
+            pca_n_components_computed = min(num_factors_requested, model.n_components_)
+        else:
+            pca_n_components_computed = min(num_factors_requested, n_features_in_data, num_opaque_pixels)
+
+        if pca_n_components_computed > 0:
+            pca = model if model is not None else make_model(pca_n_components_computed)
+            try:
+                if is_fitted(pca):
+                    factor_strengths_opaque = pca.transform(hs_cartesian_data_opaque)
+                else:
+                    factor_strengths_opaque = pca.fit_transform(hs_cartesian_data_opaque)
+            except Exception as e:
+                print(f"PCA computation failed: {e}. Treating opaque pixels as having zero factor strength.")
+                factor_strengths_opaque = np.zeros((num_opaque_pixels, pca_n_components_computed))
+
+            strength_ranges = getattr(pca, 'strength_ranges_', None)
+            normalized_factor_alphas_opaque = np.zeros((num_opaque_pixels, pca_n_components_computed))
+            for k_pca_comp in range(pca_n_components_computed):
+                component_values = factor_strengths_opaque[:, k_pca_comp]
+                if strength_ranges is not None:
+                    # Family-wide range; pixels outside the sampled range are clipped to it.
+                    min_val = strength_ranges[0][k_pca_comp]
+                    max_val = strength_ranges[1][k_pca_comp]
+                    component_values = np.clip(component_values, min_val, max_val)
+                else:
+                    min_val = np.min(component_values)
+                    max_val = np.max(component_values)
+
+                if max_val == min_val:
+                    normalized_factor_alphas_opaque[:, k_pca_comp] = 1.0
+                else:
+                    normalized_factor_alphas_opaque[:, k_pca_comp] = (component_values - min_val) / (max_val - min_val)
+        else:
+            # This case means pca_n_components_computed is 0 (e.g. num_factors_requested led to this)
+            print(f"Effective PCA components to compute is {pca_n_components_computed}. Opaque areas in factor images will be transparent.")
+
+    else: # num_opaque_pixels == 0
+        print(f"Input image has no opaque pixels. Creating {num_factors_requested} transparent output images.")
+
+    factor_images = []
+    for k_output_factor_idx in range(num_factors_requested):
+        factor_image_data = np.full((height, width, 4), [255, 255, 255, 0], dtype=np.uint8) # White, fully transparent
+
+        current_factor_strengths_for_opaque_pixels = np.zeros(num_opaque_pixels, dtype=float)
+
+        if k_output_factor_idx < pca_n_components_computed and num_opaque_pixels > 0 :
+            current_factor_strengths_for_opaque_pixels = normalized_factor_alphas_opaque[:, k_output_factor_idx]
+
+        factor_alphas_flat = np.zeros(width * height, dtype=float)
+        if num_opaque_pixels > 0: # Only assign if there were opaque pixels and components
+             factor_alphas_flat[opaque_mask_flat] = current_factor_strengths_for_opaque_pixels
+
+        final_pixel_alphas_flat = factor_alphas_flat * original_alphas_flat
+
+        factor_image_data[:, :, 3] = (final_pixel_alphas_flat.reshape(height, width) * 255).astype(np.uint8)
+        factor_images.append(Image.fromarray(factor_image_data, 'RGBA'))
+    return factor_images
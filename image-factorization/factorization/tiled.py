@@ -0,0 +1,316 @@
+"""
+Tiled factorization, for spritesheets and atlases too big to factorize in one go. The image is processed in blocks of
+rows: the model is fitted on a random sample of pixels (nmf) or incrementally block by block (pca, whose covariance
+is exact that way), then each block is transformed and appended to the factor PNGs, which are written as a stream.
+Float working memory is bounded by the block size instead of the image size. The decoded RGBA image itself (4 bytes
+per pixel) is still held whole, since PIL can't decode a PNG in parts.
+"""
+
+import os
+import zlib
+import struct
+
+import numpy as np
+from PIL import Image
+from sklearn.decomposition import IncrementalPCA
+
+from factorization import nmf, pca
+from factorization.hsv import rgb_to_hsv_vectorized
+
+DEFAULT_BLOCK_ROWS = 256
+DEFAULT_SAMPLE_PIXELS = 200000 # Pixels the nmf model is fitted on; plenty for its 3-9 features
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+class PNGStreamWriter:
+    """
+    Writes an 8-bit RGBA PNG a block of rows at a time, so the whole image never has to be in memory.
+    Each row gets the PNG filter that minimizes the sum of its absolute filtered bytes (the usual libpng heuristic),
+    chosen for a whole block at once with NumPy.
+    Rows go to <path>.tmp, which close() renames to path once the image is complete; abort() deletes it instead, so a
+    failed run never leaves a truncated PNG at the output path.
+    """
+
+    def __init__(self, path, width, height, compress_level=6):
+        self.path = path
+        self.temp_path = path + '.tmp'
+        self.file = open(self.temp_path, 'wb')
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self.previous_row = np.zeros(width * 4, dtype=np.uint8)
+        self.compressor = zlib.compressobj(compress_level)
+        self.file.write(PNG_SIGNATURE)
+        self._write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+
+    def _write_chunk(self, chunk_type, data):
+        self.file.write(struct.pack('>I', len(data)))
+        self.file.write(chunk_type)
+        self.file.write(data)
+        self.file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type))))
+
+    def write_rows(self, rows):
+        """Appends a (rows, width, 4) uint8 block."""
+        raw = rows.reshape(len(rows), self.width * 4)
+        above = np.vstack([self.previous_row[np.newaxis], raw[:-1]])
+        left = np.zeros_like(raw)
+        left[:, 4:] = raw[:, :-4]
+        upper_left = np.zeros_like(raw)
+        upper_left[:, 4:] = above[:, :-4]
+
+        # Paeth predictor: whichever of left, above and upper left is closest to left + above - upper left
+        a, b, c = left.astype(np.int16), above.astype(np.int16), upper_left.astype(np.int16)
+        pa, pb, pc = np.abs(b - c), np.abs(a - c), np.abs(a + b - 2 * c)
+        paeth = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, above, upper_left))
+        average = ((a + b) >> 1).astype(np.uint8)
+        candidates = np.stack([raw, raw - left, raw - above, raw - average, raw - paeth]) # Filter types 0-4
+
+        # Score filtered bytes as signed values
+        scores = np.minimum(candidates, 256 - candidates.astype(np.int16)).sum(axis=2, dtype=np.int64)
+        filter_types = scores.argmin(axis=0)
+        filtered = candidates[filter_types, np.arange(len(raw))]
+        data = np.column_stack([filter_types.astype(np.uint8), filtered])
+        compressed = self.compressor.compress(data.tobytes())
+        if compressed:
+            self._write_chunk(b'IDAT', compressed)
+        self.previous_row = raw[-1].copy()
+        self.rows_written += len(raw)
+
+    def close(self):
+        """Finishes the PNG and moves it to its output path."""
+        if self.rows_written != self.height:
+            self.abort()
+            raise ValueError(f"PNG has {self.height} rows but {self.rows_written} were written")
+        self._write_chunk(b'IDAT', self.compressor.flush())
+        self._write_chunk(b'IEND', b'')
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        """Closes and deletes the unfinished PNG."""
+        self.file.close()
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+def open_rgba(image_path):
+    """Opens an image as RGBA, without copying it if it already is."""
+    image = image_path if isinstance(image_path, Image.Image) else Image.open(image_path)
+    return image if image.mode == 'RGBA' else image.convert('RGBA')
+
+
+def row_blocks(image, block_rows=DEFAULT_BLOCK_ROWS):
+    """Yields (first row, (rows, width, 4) uint8 block) for each block of rows of an RGBA PIL image."""
+    width, height = image.size
+    for top in range(0, height, block_rows):
+        yield top, np.asarray(image.crop((0, top, width, min(top + block_rows, height))))
+
+
+def white_rows(alpha):
+    """Makes a (rows, width, 4) white RGBA block with the given alpha plane."""
+    rows = np.full(alpha.shape + (4,), 255, dtype=np.uint8)
+    rows[..., 3] = alpha
+    return rows
+
+
+def open_writers(output_paths, width, height):
+    writers = []
+    try:
+        for output_path in output_paths:
+            writers.append(PNGStreamWriter(output_path, width, height))
+    except OSError:
+        abort_writers(writers)
+        raise
+    return writers
+
+
+def abort_writers(writers):
+    for writer in writers:
+        writer.abort()
+
+
+def close_writers(writers):
+    """Closes every writer, or on failure deletes the outputs that aren't finished yet."""
+    for index, writer in enumerate(writers):
+        try:
+            writer.close()
+        except BaseException:
+            abort_writers(writers[index + 1:])
+            raise
+
+
+def sample_nmf_features(image, num_factors, sample_pixels, block_rows, random_state=42):
+    """Collects nmf fit rows (see nmf.fit_features) from a random sample of about sample_pixels pixels."""
+    # Count the pixels nmf fits on (alpha > 0.01) to get the sampling rate.
+    alpha_counts = np.bincount(np.asarray(image.getchannel('A')).ravel(), minlength=256)
+    fit_count = int(alpha_counts[3:].sum()) # alpha 3/255 is the first above 0.01
+    rate = 1.0 if sample_pixels is None or fit_count <= sample_pixels else sample_pixels / fit_count
+    rng = np.random.default_rng(random_state)
+    rows = []
+    for _, block in row_blocks(image, block_rows):
+        pixels = block.reshape(-1, 4)
+        keep = pixels[:, 3] >= 3
+        if rate < 1.0:
+            keep &= rng.random(len(pixels)) < rate
+        if np.any(keep):
+            rows.append(nmf.fit_features(rgb_to_hsv_vectorized(pixels[keep]), num_factors))
+    return np.vstack(rows) if rows else np.empty((0, 0))
+
+
+def factorize_colors_tiled(image_path, num_factors, output_paths, model=None, block_rows=DEFAULT_BLOCK_ROWS,
+                           sample_pixels=DEFAULT_SAMPLE_PIXELS, dtype=np.float32):
+    """
+    Tiled version of nmf.factorize_colors, writing the factor images to output_paths as it goes.
+
+    Args:
+        image_path: Path to the image, or an already opened PIL image.
+        num_factors (int): Number of components.
+        output_paths (list): One PNG path per factor.
+        model: Optional NMF model; fitted on a sample of the image if it isn't already.
+        block_rows (int): Rows per block.
+        sample_pixels (int): Pixels to fit on, or None for all of them.
+        dtype: Float type for transforming.
+
+    Returns:
+        list: Factor hex colors, or None if the image is completely transparent (nothing is written then).
+    """
+    image = open_rgba(image_path)
+    width, height = image.size
+    model = model if model is not None else nmf.make_model(num_factors)
+    if not nmf.is_fitted(model):
+        features = sample_nmf_features(image, num_factors, sample_pixels, block_rows).astype(dtype, copy=False)
+        if len(features) == 0:
+            print("Error: Image is completely transparent")
+            return None
+        model.fit(features)
+        del features
+
+    # Sums and counts of dominant pixels' HSV, for the factor colors
+    hsv_sums = np.zeros((num_factors, 3))
+    dominant_counts = np.zeros(num_factors, dtype=np.int64)
+    writers = open_writers(output_paths, width, height)
+    try:
+        for _, block in row_blocks(image, block_rows):
+            pixels = block.reshape(-1, 4)
+            visible = np.flatnonzero(pixels[:, 3])
+            alphas = np.zeros((num_factors, len(pixels)), dtype=np.uint8)
+            if len(visible):
+                hsv_colors = rgb_to_hsv_vectorized(pixels[visible]).astype(dtype)
+                normalized_coeffs, visible_alphas = nmf.transform_colors(model, hsv_colors, num_factors)
+                opaque_colors = visible_alphas > 0.5
+                for factor_idx in range(num_factors):
+                    factor_strengths = normalized_coeffs[:, factor_idx]
+                    strengths = factor_strengths * visible_alphas
+                    strengths *= 255
+                    alphas[factor_idx, visible] = strengths
+                    factor_mask = (factor_strengths > 0.5) & opaque_colors
+                    hsv_sums[factor_idx] += hsv_colors[factor_mask, :3].sum(axis=0, dtype=np.float64)
+                    dominant_counts[factor_idx] += np.count_nonzero(factor_mask)
+            for writer, alpha in zip(writers, alphas):
+                writer.write_rows(white_rows(alpha.reshape(block.shape[:2])))
+    except BaseException:
+        abort_writers(writers)
+        raise
+    close_writers(writers)
+
+    return [
+        nmf.hsv_to_hex(hsv_sums[factor_idx] / dominant_counts[factor_idx]) if dominant_counts[factor_idx] else "#808080"
+        for factor_idx in range(num_factors)
+    ]
+
+
+def opaque_hue_saturation(block):
+    """Returns (mask of the block's non-fully-transparent pixels, their alphas, their hue/saturation features)."""
+    pixels = block.reshape(-1, 4)
+    alphas = pixels[:, 3] / 255.0
+    opaque_mask = alphas > 1e-5
+    return opaque_mask, alphas, pca.hue_saturation_features(pixels[opaque_mask, :3])
+
+
+def fit_incremental_pca(image, num_components, block_rows):
+    """
+    Fits a PCA of the hue/saturation features of all opaque pixels, one block at a time. IncrementalPCA needs at least
+    num_components rows per batch, so small blocks are merged into the next one.
+    """
+    model = IncrementalPCA(n_components=num_components)
+    pending = None
+    for _, block in row_blocks(image, block_rows):
+        _, _, features = opaque_hue_saturation(block)
+        if pending is not None and len(pending) >= num_components and len(features) >= num_components:
+            model.partial_fit(pending)
+            pending = features
+        else:
+            pending = features if pending is None else np.vstack([pending, features])
+    model.partial_fit(pending)
+    return model
+
+
+def factorize_image_tiled(image_path, num_factors_requested, output_paths, model=None, block_rows=DEFAULT_BLOCK_ROWS):
+    """
+    Tiled version of pca.factorize_image, writing the factor images to output_paths as it goes.
+    Without a model, PCA is fitted over all opaque pixels with IncrementalPCA. Strengths are min-max normalized over
+    the whole image (an extra pass), or with the model's strength_ranges_ if it has them (see pca.fit_shared_model).
+
+    Args:
+        image_path: Path to the image, or an already opened PIL image.
+        num_factors_requested (int): Number of output images; factors PCA doesn't compute are transparent.
+        output_paths (list): One PNG path per factor.
+        model: Optional fitted PCA model (e.g. from pca.fit_shared_model); otherwise one is fitted here.
+        block_rows (int): Rows per block.
+    """
+    image = open_rgba(image_path)
+    width, height = image.size
+    alpha_counts = np.bincount(np.asarray(image.getchannel('A')).ravel(), minlength=256)
+    num_opaque_pixels = int(alpha_counts[1:].sum())
+
+    num_components = 0
+    if num_opaque_pixels > 0:
+        if model is not None and pca.is_fitted(model):
+            num_components = min(num_factors_requested, model.n_components_)
+        else:
+            num_components = min(num_factors_requested, 2, num_opaque_pixels)
+            if num_components > 0:
+                model = fit_incremental_pca(image, num_components, block_rows)
+    else:
+        print(f"Input image has no opaque pixels. Creating {num_factors_requested} transparent output images.")
+
+    strength_ranges = getattr(model, 'strength_ranges_', None) if num_components else None
+    if num_components and strength_ranges is None:
+        mins = np.full(num_components, np.inf)
+        maxs = np.full(num_components, -np.inf)
+        for _, block in row_blocks(image, block_rows):
+            _, _, features = opaque_hue_saturation(block)
+            if len(features):
+                strengths = model.transform(features)[:, :num_components]
+                mins = np.minimum(mins, strengths.min(axis=0))
+                maxs = np.maximum(maxs, strengths.max(axis=0))
+        strength_ranges = (mins, maxs)
+        clip = False
+    else:
+        clip = True # Family-wide range; pixels outside the sampled range are clipped to it.
+
+    writers = open_writers(output_paths, width, height)
+    try:
+        for _, block in row_blocks(image, block_rows):
+            opaque_mask, alphas, features = opaque_hue_saturation(block)
+            factor_alphas = np.zeros((num_factors_requested, len(alphas)))
+            if num_components and len(features):
+                strengths = model.transform(features)
+                for k in range(num_components):
+                    component_values = strengths[:, k]
+                    min_val, max_val = strength_ranges[0][k], strength_ranges[1][k]
+                    if clip:
+                        component_values = np.clip(component_values, min_val, max_val)
+                    if max_val == min_val:
+                        factor_alphas[k, opaque_mask] = 1.0
+                    else:
+                        factor_alphas[k, opaque_mask] = (component_values - min_val) / (max_val - min_val)
+            for writer, factor_alpha in zip(writers, factor_alphas):
+                alpha = ((factor_alpha * alphas).reshape(block.shape[:2]) * 255).astype(np.uint8)
+                writer.write_rows(white_rows(alpha))
+    except BaseException:
+        abort_writers(writers)
+        raise
+    close_writers(writers)
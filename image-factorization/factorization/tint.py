@@ -0,0 +1,198 @@
+"""
+Tint compositor: recolors factor images (e.g. from factorizeColorsA.py or python -m factorization) and recombines them
+into compound icons, for every set of tint colors in a table at once.
+Tints are opaque, so each factor's contribution to the result depends only on the alpha planes, and is computed once.
+Every variant's color is then a weighted sum of its tints, so all variants come out of one matrix product.
+Modes:
+    over: factors are stacked in order, each drawn over the previous ones, like layers in ItemPrototype.icons
+    add: premultiplied colors are added up (alpha capped at 1), so overlapping factors mix instead of covering each
+        other; NMF factor alphas add up to the original alpha, so this keeps the icon's outline intact
+
+Usage (from the image-factorization folder):
+    python -m factorization.tint icon_1.png icon_2.png --tint hot=#e04020,#40c0e0 --tint cold=#2040e0,#a0e0ff -o variants/
+    python -m factorization.tint icon_1.png icon_2.png --tints tints.txt --mode add -o variants/
+A tints file has one variant per line: a name, then one color per factor image, as #rrggbb or r,g,b (0-255).
+Blank lines and lines starting with // are skipped.
+"""
+
+import os
+import sys
+import argparse
+
+import numpy as np
+from PIL import Image
+
+MODES = ('over', 'add')
+BATCH_VALUES = 1 << 24 # Variants are composited in batches of about this many output color values, to bound memory
+
+
+def parse_color(text):
+    """
+    Parses #rrggbb, rrggbb or r,g,b (0-255) into an (r, g, b) tuple.
+
+    Raises:
+        ValueError: If the text isn't a color.
+    """
+    text = text.strip()
+    try:
+        if ',' in text:
+            channels = tuple(int(channel) for channel in text.split(','))
+        else:
+            hex_text = text[1:] if text.startswith('#') else text
+            channels = tuple(int(hex_text[i:i + 2], 16) for i in (0, 2, 4)) if len(hex_text) == 6 else ()
+    except ValueError:
+        channels = ()
+    if len(channels) != 3 or not all(0 <= channel <= 255 for channel in channels):
+        raise ValueError(f"Invalid color: {text!r}")
+    return channels
+
+
+def parse_tint(text):
+    """Parses a NAME=COLOR,COLOR... command-line argument (colors as #rrggbb) into (name, [colors])."""
+    name, separator, colors = text.partition('=')
+    if not separator or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=COLOR,COLOR..., got {text!r}")
+    try:
+        return name.strip(), [parse_color(color) for color in colors.split(',')]
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def read_tints(path):
+    """
+    Reads a tints file (see the module docstring).
+
+    Returns:
+        list: (name, [colors]) per variant.
+
+    Raises:
+        ValueError: On a malformed line.
+    """
+    tints = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            fields = line.split()
+            if not fields or fields[0].startswith('//'):
+                continue
+            try:
+                tints.append((fields[0], [parse_color(field) for field in fields[1:]]))
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_number}: {e}")
+    return tints
+
+
+def load_factor_alphas(image_paths):
+    """
+    Loads the alpha channels of factor images (their color is ignored).
+
+    Returns:
+        np.ndarray: (num_factors, height, width) uint8 alpha planes.
+
+    Raises:
+        ValueError: If the images have different sizes.
+    """
+    images = [Image.open(path) for path in image_paths]
+    sizes = {image.size for image in images}
+    if len(sizes) > 1:
+        raise ValueError(f"Factor images have different sizes: {', '.join(f'{w}x{h}' for w, h in sorted(sizes))}")
+    return np.stack([np.asarray(image.convert('RGBA').getchannel('A')) for image in images])
+
+
+def layer_weights(factor_alphas, mode='over'):
+    """
+    Works out how much each factor's tint contributes to each pixel.
+
+    Args:
+        factor_alphas (np.ndarray): (k, height, width) uint8 alpha planes, bottom layer first.
+        mode (str): 'over' or 'add' (see the module docstring).
+
+    Returns:
+        tuple: ((k, height * width) float32 premultiplied weights, (height * width) float32 result alpha)
+    """
+    alphas = factor_alphas.reshape(len(factor_alphas), -1).astype(np.float32) / 255
+    if mode == 'add':
+        return alphas, np.minimum(alphas.sum(axis=0), 1.0)
+    # Over: a layer shows through every layer above it, each letting (1 - its alpha) through.
+    weights = np.empty_like(alphas)
+    transmitted = np.ones(alphas.shape[1], dtype=np.float32)
+    for layer in range(len(alphas) - 1, -1, -1):
+        weights[layer] = alphas[layer] * transmitted
+        transmitted *= 1 - alphas[layer]
+    return weights, 1 - transmitted
+
+
+def composite_tints(factor_alphas, tints, mode='over', weights=None):
+    """
+    Recolors and combines factor alpha planes with every set of tints in one batched pass.
+
+    Args:
+        factor_alphas (np.ndarray): (k, height, width) uint8 alpha planes, e.g. from nmf.factorize_alphas.
+        tints: (num_variants, k, 3) 0-255 RGB tint per variant and factor.
+        mode (str): 'over' or 'add' (see the module docstring).
+        weights (tuple): layer_weights(factor_alphas, mode), to reuse across batches of variants.
+
+    Returns:
+        np.ndarray: (num_variants, height, width, 4) uint8 RGBA images.
+    """
+    num_factors, height, width = factor_alphas.shape
+    tints = np.asarray(tints, dtype=np.float32)
+    if tints.ndim != 3 or tints.shape[1:] != (num_factors, 3):
+        raise ValueError(f"Expected tints of shape (variants, {num_factors}, 3), got {tints.shape}")
+    layer_weight, result_alpha = weights if weights is not None else layer_weights(factor_alphas, mode)
+
+    # (variants * 3, k) @ (k, pixels): every variant's premultiplied color in one product
+    num_variants = len(tints)
+    premultiplied = tints.transpose(0, 2, 1).reshape(num_variants * 3, num_factors) @ layer_weight
+    premultiplied = premultiplied.reshape(num_variants, 3, -1)
+    colors = np.zeros_like(premultiplied)
+    np.divide(premultiplied, result_alpha, out=colors, where=result_alpha > 0)
+
+    variants = np.empty((num_variants, height * width, 4), dtype=np.uint8)
+    variants[..., :3] = np.clip(np.rint(colors.transpose(0, 2, 1)), 0, 255)
+    variants[..., 3] = np.rint(result_alpha * 255)
+    return variants.reshape(num_variants, height, width, 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tint factor images with sets of colors and combine them into compound icons.')
+    parser.add_argument('factor_images', nargs='+', help='Factor images, bottom layer first. Only their alpha is used.')
+    parser.add_argument('--tint', action='append', default=[], type=parse_tint, metavar='NAME=COLOR,COLOR...', help='A variant: its name and one #rrggbb color per factor image. Can be repeated.')
+    parser.add_argument('--tints', metavar='FILE', help='File of variants, one "name color color..." per line.')
+    parser.add_argument('--mode', choices=MODES, default='over', help='over: stack the tinted factors like icon layers (default); add: add them up.')
+    parser.add_argument('-o', '--output-dir', default='.', help='Directory for the <name>.png outputs (default: current directory).')
+    args = parser.parse_args()
+
+    tints = list(args.tint)
+    if args.tints:
+        try:
+            tints += read_tints(args.tints)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    if not tints:
+        print("Error: No tints given; use --tint or --tints.", file=sys.stderr)
+        sys.exit(1)
+    wrong_counts = [name for name, colors in tints if len(colors) != len(args.factor_images)]
+    if wrong_counts:
+        print(f"Error: These variants don't have {len(args.factor_images)} colors (one per factor image): {', '.join(wrong_counts)}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        factor_alphas = load_factor_alphas(args.factor_images)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    weights = layer_weights(factor_alphas, args.mode)
+    batch_size = max(1, BATCH_VALUES // (factor_alphas[0].size * 3))
+    for start in range(0, len(tints), batch_size):
+        batch = tints[start:start + batch_size]
+        variants = composite_tints(factor_alphas, [colors for _, colors in batch], args.mode, weights)
+        for (name, _), variant in zip(batch, variants):
+            Image.fromarray(variant, 'RGBA').save(os.path.join(args.output_dir, f"{name}.png"))
+    print(f"Saved {len(tints)} variant(s) to {args.output_dir}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 #!/bin/bash
 
 # Given PNG image files, resizes them to 256x256 and makes 4 mipmaps. Use this for images for Factorio techs.
+# make_mipmaps.py --size 256 gives the same 480x256 strips (levels halved from each other, so not bit-identical),
+# skipping images that are already strips: python make_mipmaps.py --size 256 technology/
 
 for f in "$@"; do
   base="${f%.png}"
@@ -1,6 +1,9 @@
 #!/bin/bash
 # Usage: black_to_alpha.sh ./*.png
 # Converts darker parts of images to transparency. For making sprites from images of semi-transparent objects against dark backgrounds.
+# Chainable Python version (without --suffix it would overwrite the inputs, unlike this script):
+#   python image_pipeline.py -s black_to_alpha --suffix _translucent ./*.png
+# It takes gray as Rec. 709 luma, so alpha can be a level or two off this script's.
 
 # Check if ImageMagick is installed
 if ! command -v convert &> /dev/null; then
@@ -1,5 +1,9 @@
 #!/bin/bash
 
+# Trims away borders of the corner color, in place, with ImageMagick's -trim.
+# image_pipeline.py's crop_to_content stage also works in place; it trims borders matching the top-left pixel exactly
+# and leaves images with no other pixels unchanged: python image_pipeline.py -s crop_to_content ./*.png
+
 if [ $# -eq 0 ]; then
     echo "Usage: $0 image_file [image_file2 ...]"
     exit 1
@@ -1,6 +1,8 @@
 #!/bin/bash
 
 # This script removes every 2nd frame from an animation spritesheet, to reduce file size.
+# spritesheet.py writes the same <name>_HALVED.png without the frames/ directory, but doesn't run optipng:
+#   python spritesheet.py pack sheet.png --grid COLSxROWS --every 2
 
 if [ "$#" -ne 3 ]; then
   echo "Usage: $0 input_image num_columns num_rows"
@@ -48,6 +50,8 @@ echo "Removing temporary folder"
 rm -rf frames
 
 # Optimize PNG filesize
+# (python optimize_pngs.py --optimizer optipng --level 7 does this with a cache, so re-runs skip unchanged outputs,
+# but it needs Pillow and NumPy and drops metadata chunks)
 echo "Created output image, now optimizing..."
 optipng -o7 "$OUTPUT"
 
@@ -1,5 +1,9 @@
 #!/bin/bash
 
+# Converts images to grayscale in place, with ImageMagick's -colorspace gray.
+# The desaturate stage of image_pipeline.py also works in place, but uses Rec. 709 luma of the stored values and saves
+# RGBA rather than a grayscale PNG: python image_pipeline.py -s desaturate ./*.png
+
 # Function to print usage information
 print_usage() {
     echo "Usage: $(basename "$0") <image_files...>"
@@ -8,6 +8,9 @@
 #   optional trailing arguments. If not provided, the script defaults
 #   to a 2x2 grid (quartering the image), e.g. for images generated
 #   by Midjourney.
+#   spritesheet.py split writes the same base1.png, base2.png, ... names while
+#   decoding each image only once; the grid is given as --grid COLSxROWS:
+#   python spritesheet.py split ./*.png --grid 3x2
 #
 # Examples:
 #   # Cut all PNGs in the current directory into quarters (2x2 grid)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+# Shared helpers for the Python image scripts in this folder: collecting PNGs from files and directories, and running a
+# per-file function over them on a process pool.
+# Per-file functions take one path (plus fixed options) and return None on success or an error message on failure
+# (or a tuple starting with one, if they have more to report), so one bad file doesn't stop the batch and errors can be
+# reported in input order.
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+
+def iter_pngs(inputs):
+    """
+    Yields (path, relative path) for the PNG files in a list of paths, without duplicates. The relative path is the
+    file's path under the directory it was found in, or its file name if it was given directly.
+
+    Args:
+        inputs (list): File paths (used as given) and directories (searched recursively for *.png, sorted).
+    """
+    seen = set()
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    file_path = os.path.join(root, name)
+                    if name.lower().endswith('.png') and file_path not in seen:
+                        seen.add(file_path)
+                        yield file_path, os.path.relpath(file_path, path)
+        elif path not in seen:
+            seen.add(path)
+            yield path, os.path.basename(path)
+
+
+def find_pngs(inputs):
+    """
+    Collects PNG files from a list of paths (see iter_pngs).
+
+    Returns:
+        list: PNG paths, directory contents sorted, without duplicates.
+    """
+    return [path for path, _ in iter_pngs(inputs)]
+
+
+def plan_outputs(inputs, output_dir=None, suffix=''):
+    """
+    Collects PNG files (see iter_pngs) and works out where each one's result goes: in output_dir at the same path
+    relative to the directory it was found in (so subfolders are kept), or next to the input if output_dir is None.
+    The suffix is added before the extension; with neither, results replace their inputs.
+
+    Returns:
+        list: (input path, output path) pairs.
+
+    Raises:
+        ValueError: If two inputs would be written to the same output path.
+    """
+    jobs = []
+    destinations = {}
+    for path, relative_path in iter_pngs(inputs):
+        base, ext = os.path.splitext(relative_path if output_dir else path)
+        output_path = os.path.join(output_dir, base + suffix + ext) if output_dir else base + suffix + ext
+        key = os.path.normcase(os.path.abspath(output_path))
+        if key in destinations:
+            raise ValueError(f"{destinations[key]} and {path} would both be written to {output_path}")
+        destinations[key] = path
+        jobs.append((path, output_path))
+    return jobs
+
+
+def make_output_dirs(jobs):
+    """Creates the directories for the output paths of plan_outputs' jobs."""
+    for directory in {os.path.dirname(output_path) for _, output_path in jobs}:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+
+def run_parallel(function, items, jobs=None, **options):
+    """
+    Calls function(item, **options) for every item, on a process pool unless jobs is 1.
+
+    Args:
+        function: Module-level function (so it can be pickled), returning None or an error message (see above).
+        items (list): Arguments for each call, usually file paths or plan_outputs jobs.
+        jobs (int): Number of worker processes; None for one per CPU.
+        **options: Keyword arguments passed to every call.
+
+    Returns:
+        list: (item, result) pairs in input order.
+    """
+    items = list(items)
+    call = partial(function, **options)
+    jobs = min(jobs or os.cpu_count() or 1, len(items))
+    if jobs <= 1:
+        return [(item, call(item)) for item in items]
+    # Chunks amortize inter-process overhead over many small files, while leaving a few chunks per worker for balance
+    chunksize = max(1, len(items) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(zip(items, executor.map(call, items, chunksize=chunksize)))
+
+
+def report_errors(results):
+    """
+    Prints the error messages from run_parallel's results to stderr.
+
+    Returns:
+        int: Number of failed items.
+    """
+    failures = 0
+    for item, error in results:
+        if error is not None:
+            # plan_outputs jobs are reported by their input path
+            print(f"Error: {item[0] if isinstance(item, tuple) else item}: {error}", file=sys.stderr)
+            failures += 1
+    return failures
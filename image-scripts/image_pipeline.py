@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+# Runs a chain of per-image operations in one pass: each image is decoded once, every stage transforms the pixels in
+# memory, and the result is encoded once. Replaces chaining white_to_alpha.sh, black_to_alpha.sh, desaturate.sh,
+# make_black_keeping_alpha.sh, transparent_background.sh, crop_to_content.sh and remove_base_alpha.sh, which each decode
+# and re-encode the file (and some of which leave _translucent/_gray intermediates).
+# Stages work on (height, width, 4) float32 straight RGBA arrays with values 0-1, and run in the order given.
+# Results replace the input files, unless -o (keeping the subfolders of input directories) or --suffix is given. The
+# scripts differ here: white_to_alpha.sh and black_to_alpha.sh write <name>_translucent.png to the current directory,
+# and transparent_background.sh writes to output/; use --suffix _translucent or -o output/ to keep the originals.
+# "Gray" below is Rec. 709 luma of the stored (gamma-encoded) RGB values.
+#
+# Stages (parameters as NAME:KEY=VALUE:KEY=VALUE):
+#   white_to_alpha              lighter pixels become more transparent (alpha *= 1 - gray), like white_to_alpha.sh
+#   black_to_alpha              darker pixels become more transparent (alpha *= gray), like black_to_alpha.sh
+#   desaturate                  replaces color with gray, like desaturate.sh
+#   make_black                  makes every pixel black, keeping alpha, like make_black_keeping_alpha.sh
+#   transparent_background      clears the areas connected to each corner that are within fuzz (default 0.05) of that
+#                               corner's color, like transparent_background.sh
+#   crop_to_content             crops away borders of the top-left pixel's color, like crop_to_content.sh
+#   remove_base_alpha           removes the background alpha found in the corners (corner: size of the sampled squares,
+#                               default 10; buffer: added to their highest mean alpha, default 0.05), like
+#                               remove_base_alpha.sh
+#
+# Usage:
+#   python image_pipeline.py -s white_to_alpha -s desaturate -s crop_to_content icons/ other.png
+#   python image_pipeline.py -s transparent_background:fuzz=0.1 -s crop_to_content renders/ -o output/
+#   python image_pipeline.py -s black_to_alpha ./*.png --suffix _translucent
+#   python image_pipeline.py -s remove_base_alpha:corner=16:buffer=0.03 decoratives/
+
+import os
+import sys
+import inspect
+import argparse
+
+import numpy as np
+from PIL import Image
+from scipy import ndimage
+
+from image_batch import plan_outputs, make_output_dirs, run_parallel, report_errors
+
+LUMA_WEIGHTS = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+HALF_LEVEL = 0.5 / 255 # Differences below this vanish when the result is stored as 8 bits
+MAX_BASE_ALPHA = 0.95 # remove_base_alpha never removes more than this, so legitimate alpha survives
+
+
+def gray(rgba):
+    """Returns the (height, width) luma of an RGBA array."""
+    return rgba[..., :3] @ LUMA_WEIGHTS
+
+
+def white_to_alpha(rgba):
+    rgba[..., 3] *= 1 - gray(rgba)
+    return rgba
+
+
+def black_to_alpha(rgba):
+    rgba[..., 3] *= gray(rgba)
+    return rgba
+
+
+def desaturate(rgba):
+    rgba[..., :3] = gray(rgba)[..., np.newaxis]
+    return rgba
+
+
+def make_black(rgba):
+    rgba[..., :3] = 0
+    return rgba
+
+
+def transparent_background(rgba, fuzz=0.05):
+    """
+    Flood-fills from each corner with transparency: a pixel is cleared if it's within fuzz of the corner's color (as
+    root-mean-square difference over RGBA) and connected to the corner through such pixels, horizontally or vertically.
+    """
+    height, width = rgba.shape[:2]
+    background = np.zeros((height, width), dtype=bool)
+    for y, x in {(0, 0), (0, width - 1), (height - 1, 0), (height - 1, width - 1)}:
+        if background[y, x]:
+            continue
+        similar = np.mean((rgba - rgba[y, x]) ** 2, axis=-1) <= fuzz ** 2
+        regions, _ = ndimage.label(similar)
+        background |= regions == regions[y, x]
+    rgba[background] = 0
+    return rgba
+
+
+def crop_to_content(rgba):
+    """
+    Crops to the bounding box of the pixels that differ from the top-left pixel. Differences in the color of fully
+    transparent pixels don't count. An image with no such pixels is left as it is.
+    """
+    corner = rgba[0, 0]
+    if corner[3] < HALF_LEVEL:
+        content = rgba[..., 3] >= HALF_LEVEL
+    else:
+        content = np.any(np.abs(rgba - corner) >= HALF_LEVEL, axis=-1)
+    rows = np.flatnonzero(content.any(axis=1))
+    if len(rows) == 0:
+        return rgba
+    cols = np.flatnonzero(content.any(axis=0))
+    return rgba[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+
+
+def remove_base_alpha(rgba, corner=10, buffer=0.05):
+    """
+    Removes a uniform background alpha, e.g. the faint rectangle around a render of a crater: the highest mean alpha of
+    the four corner squares, plus buffer (capped at MAX_BASE_ALPHA), becomes 0, and alpha above it is stretched so
+    1 stays 1.
+    """
+    if corner < 1:
+        raise ValueError(f"remove_base_alpha corner must be at least 1, got {corner}")
+    alpha = rgba[..., 3]
+    corners = (alpha[:corner, :corner], alpha[:corner, -corner:], alpha[-corner:, :corner], alpha[-corner:, -corner:])
+    base_alpha = min(max(float(square.mean()) for square in corners) + buffer, MAX_BASE_ALPHA)
+    np.clip((alpha - base_alpha) / (1 - base_alpha), 0, 1, out=alpha)
+    return rgba
+
+
+STAGES = {function.__name__: function for function in
+          (white_to_alpha, black_to_alpha, desaturate, make_black, transparent_background, crop_to_content, remove_base_alpha)}
+
+
+def parse_stage(text):
+    """
+    Parses NAME or NAME:KEY=VALUE:KEY=VALUE into (name, {key: value}), checking the name and parameter names.
+    Values are converted to the type of the parameter's default.
+    """
+    name, *assignments = text.split(':')
+    if name not in STAGES:
+        raise argparse.ArgumentTypeError(f"unknown stage {name!r}; choose from {', '.join(STAGES)}")
+    defaults = {parameter.name: parameter.default for parameter in list(inspect.signature(STAGES[name]).parameters.values())[1:]}
+    params = {}
+    for assignment in assignments:
+        key, separator, value = assignment.partition('=')
+        if not separator or key not in defaults:
+            raise argparse.ArgumentTypeError(f"stage {name} takes {', '.join(defaults) or 'no parameters'}, got {assignment!r}")
+        try:
+            params[key] = type(defaults[key])(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid value for {name} {key}: {value!r}")
+    return name, params
+
+
+def run_stages(image, stages):
+    """
+    Applies stages to an image.
+
+    Args:
+        image (PIL.Image): Source image, any mode.
+        stages (list): (name, params) pairs from parse_stage, in order.
+
+    Returns:
+        PIL.Image: RGBA result.
+    """
+    rgba = np.asarray(image.convert('RGBA'), dtype=np.float32) / 255
+    for name, params in stages:
+        rgba = STAGES[name](rgba, **params)
+    return Image.fromarray(np.rint(np.clip(rgba, 0, 1) * 255).astype(np.uint8), 'RGBA')
+
+
+def process_file(job, stages):
+    """
+    Runs stages on one file (a run_parallel worker).
+
+    Args:
+        job (tuple): (input path, output path) from image_batch.plan_outputs; the paths are the same to replace the original.
+        stages (list): See run_stages.
+
+    Returns:
+        str: Error message, or None on success.
+    """
+    path, output_path = job
+    try:
+        with Image.open(path) as image:
+            result = run_stages(image, stages)
+        temp_path = output_path + '.tmp'
+        result.save(temp_path, format='PNG')
+        os.replace(temp_path, output_path)
+    except (OSError, ValueError) as e:
+        return str(e)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply a chain of image operations to PNGs, decoding and encoding each file once.')
+    parser.add_argument('inputs', nargs='+', help='PNG files, or directories to search recursively for PNGs.')
+    parser.add_argument('-s', '--stage', dest='stages', action='append', type=parse_stage, required=True, metavar='NAME[:KEY=VALUE...]', help=f"Stage to apply; repeat for a chain, applied in order. One of: {', '.join(STAGES)}.")
+    parser.add_argument('-o', '--output-dir', help='Save results here instead of replacing the originals, keeping the subfolders of directory inputs.')
+    parser.add_argument('--suffix', default='', help='Add this to output file names, e.g. _translucent; without -o, results are saved next to the originals.')
+    parser.add_argument('-j', '--jobs', type=int, help='Number of worker processes (default: one per CPU).')
+    args = parser.parse_args()
+
+    try:
+        jobs = plan_outputs(args.inputs, args.output_dir, args.suffix)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not jobs:
+        print("Error: No PNG files found", file=sys.stderr)
+        sys.exit(1)
+    make_output_dirs(jobs)
+
+    results = run_parallel(process_file, jobs, args.jobs, stages=args.stages)
+    failures = report_errors(results)
+    print(f"Processed {len(jobs) - failures} of {len(jobs)} image(s)", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
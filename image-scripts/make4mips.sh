@@ -1,6 +1,9 @@
 #!/bin/bash
 
 # Given PNG images, scales them to 64x64 and makes 4 mipmaps. Use this for icon graphics.
+# For whole folders, python make_mipmaps.py icons/ also works in place but decodes each icon once. Its smaller levels
+# are halved from the previous level rather than resized from the original, so they can differ slightly, and icons
+# that are already 120x64 strips are skipped.
 
 for f in "$@"; do
   base="${f%.png}"
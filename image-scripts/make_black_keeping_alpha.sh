@@ -1,6 +1,7 @@
 #!/bin/bash
 
 # This file changes all pixels of an image to be black, while preserving alpha value. So it changes half-transparent red/white/gray to half-transparent black.
+# Same result in place, without the temporary alpha file: python image_pipeline.py -s make_black ./*.png
 
 # Note that you can reduce the filesize of resulting images by like 40% by running optipng on them afterwards, since they don't actually need RGB color data.
 
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+# Makes mipmap strips for icons, like make4mips.sh / 256make4mips.sh, without running ImageMagick per step.
+# Each image is decoded once, padded to a centered transparent square, and scaled to the full size (e.g. 64x64). The
+# smaller levels are then made by halving the previous level in NumPy, on premultiplied alpha so transparent pixels
+# don't bleed their color into the edges. The levels are packed side by side (64+32+16+8 = 120x64, top-aligned) and
+# encoded once, replacing the original unless an output directory is given (where subfolders of input directories are kept).
+# Images that are already mipmap strips of the requested size are skipped, so re-running over a folder is safe.
+#
+# Usage:
+#   python make_mipmaps.py icons/ other-icon.png            # 64x64 icons with 4 levels, in place
+#   python make_mipmaps.py --size 256 technology/           # like 256make4mips.sh
+#   python make_mipmaps.py icons/ -o out/ --filter box -j 8
+
+import os
+import sys
+import argparse
+
+import numpy as np
+from PIL import Image
+
+from image_batch import plan_outputs, make_output_dirs, run_parallel, report_errors
+
+FILTERS = ('lanczos', 'box')
+
+
+def lanczos_halving_kernel(lobes=3):
+    """
+    Returns the weights for halving with a Lanczos filter: taps at half-pixel offsets +-0.5, +-1.5, ... in the source,
+    stretched by 2 in the output's pixel spacing, normalized to sum to 1.
+    """
+    offsets = np.arange(-2 * lobes, 2 * lobes) + 0.5
+    kernel = np.sinc(offsets / 2) * np.sinc(offsets / (2 * lobes))
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+HALVING_KERNEL = lanczos_halving_kernel()
+
+
+def halve(premultiplied, filter='lanczos'):
+    """
+    Halves a premultiplied RGBA image in both dimensions.
+
+    Args:
+        premultiplied (np.ndarray): (height, width, 4) float32 premultiplied RGBA, 0-1, with even height and width.
+        filter (str): 'box' (mean of each 2x2 block) or 'lanczos' (separable Lanczos3, sharper).
+
+    Returns:
+        np.ndarray: (height / 2, width / 2, 4) float32 premultiplied RGBA.
+    """
+    height, width, channels = premultiplied.shape
+    if filter == 'box':
+        return premultiplied.reshape(height // 2, 2, width // 2, 2, channels).mean(axis=(1, 3))
+    pad = len(HALVING_KERNEL) // 2 - 1
+    result = premultiplied
+    for axis in (0, 1):
+        # Edge pixels are repeated past the border; each output pixel is the kernel over the 12 source pixels around it
+        pad_width = [(0, 0)] * 3
+        pad_width[axis] = (pad, pad)
+        padded = np.pad(result, pad_width, mode='edge')
+        size = result.shape[axis] // 2
+        halved = 0
+        for tap, weight in enumerate(HALVING_KERNEL):
+            taps = [slice(None)] * 3
+            taps[axis] = slice(tap, tap + 2 * size, 2)
+            halved = halved + weight * padded[tuple(taps)]
+        result = halved
+    # Lanczos overshoots at sharp edges; keep color within [0, alpha] so it stays valid premultiplied RGBA
+    alpha = np.clip(result[..., 3:], 0, 1)
+    return np.concatenate([np.clip(result[..., :3], 0, alpha), alpha], axis=-1)
+
+
+def premultiply(image):
+    """Converts an RGBA image to (height, width, 4) float32 premultiplied RGBA, 0-1."""
+    rgba = np.asarray(image, dtype=np.float32) / 255
+    rgba[..., :3] *= rgba[..., 3:]
+    return rgba
+
+
+def unpremultiply(premultiplied):
+    """Converts float32 premultiplied RGBA back to (height, width, 4) uint8 straight RGBA."""
+    alpha = premultiplied[..., 3:]
+    color = np.divide(premultiplied[..., :3], alpha, out=np.zeros_like(premultiplied[..., :3]), where=alpha > 0)
+    return np.rint(np.clip(np.concatenate([color, alpha], axis=-1), 0, 1) * 255).astype(np.uint8)
+
+
+def strip_width(size, levels):
+    """Width of a mipmap strip: size + size/2 + ... for the given number of levels."""
+    return sum(size >> level for level in range(levels))
+
+
+def make_mipmaps(image, size=64, levels=4, filter='lanczos'):
+    """
+    Makes a mipmap strip from an image.
+
+    Args:
+        image (PIL.Image): Source image, any size and mode.
+        size (int): Side of the largest level; must be divisible by 2 ** (levels - 1).
+        levels (int): Number of levels, each half the size of the previous one.
+        filter (str): 'lanczos' or 'box', used for the first scaling and for every halving.
+
+    Returns:
+        PIL.Image: RGBA strip of strip_width(size, levels) x size, levels left to right, top-aligned.
+    """
+    image = image.convert('RGBA')
+    side = max(image.size)
+    if image.size != (side, side):
+        square = Image.new('RGBA', (side, side), (0, 0, 0, 0))
+        square.paste(image, ((side - image.width) // 2, (side - image.height) // 2))
+        image = square
+    if side != size:
+        # Pillow premultiplies RGBA internally when resampling, so this matches the halving below
+        resample = Image.Resampling.LANCZOS if filter == 'lanczos' else Image.Resampling.BOX
+        image = image.resize((size, size), resample)
+
+    strip = np.zeros((size, strip_width(size, levels), 4), dtype=np.uint8)
+    level = premultiply(image)
+    strip[:, :size] = np.asarray(image)
+    x = size
+    for _ in range(1, levels):
+        level = halve(level, filter)
+        level_size = len(level)
+        strip[:level_size, x:x + level_size] = unpremultiply(level)
+        x += level_size
+    return Image.fromarray(strip, 'RGBA')
+
+
+def mipmap_file(job, size=64, levels=4, filter='lanczos', force=False):
+    """
+    Makes a mipmap strip for one PNG file (a run_parallel worker).
+
+    Args:
+        job (tuple): (input path, output path) from image_batch.plan_outputs; the paths are the same to replace the original.
+        size, levels, filter: See make_mipmaps.
+        force (bool): Also process images that already look like mipmap strips.
+
+    Returns:
+        str: Error message, or None on success or when skipped.
+    """
+    path, output_path = job
+    try:
+        with Image.open(path) as image:
+            if not force and image.size == (strip_width(size, levels), size):
+                return None
+            strip = make_mipmaps(image, size, levels, filter)
+        # Write next to the target and rename, so an interrupted run never leaves a truncated icon behind
+        temp_path = output_path + '.tmp'
+        strip.save(temp_path, format='PNG')
+        os.replace(temp_path, output_path)
+    except (OSError, ValueError) as e:
+        return str(e)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pad PNG images to squares and replace them with strips of mipmaps.')
+    parser.add_argument('inputs', nargs='+', help='PNG files, or directories to search recursively for PNGs.')
+    parser.add_argument('--size', type=int, default=64, help='Size of the largest level (default: 64; use 256 for technology icons).')
+    parser.add_argument('--levels', type=int, default=4, help='Number of levels, each half the previous size (default: 4).')
+    parser.add_argument('--filter', choices=FILTERS, default='lanczos', help='Downscaling filter (default: lanczos).')
+    parser.add_argument('-o', '--output-dir', help='Save strips here instead of replacing the originals, keeping the subfolders of directory inputs.')
+    parser.add_argument('--force', action='store_true', help="Also process images that are already mipmap strips of this size.")
+    parser.add_argument('-j', '--jobs', type=int, help='Number of worker processes (default: one per CPU).')
+    args = parser.parse_args()
+
+    if args.levels < 1 or args.size < 1 or args.size % (1 << (args.levels - 1)):
+        print(f"Error: --size must be divisible by 2^(levels-1) = {1 << max(args.levels - 1, 0)}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        jobs = plan_outputs(args.inputs, args.output_dir)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not jobs:
+        print("Error: No PNG files found", file=sys.stderr)
+        sys.exit(1)
+    make_output_dirs(jobs)
+
+    results = run_parallel(mipmap_file, jobs, args.jobs, size=args.size, levels=args.levels, filter=args.filter,
+                           force=args.force)
+    failures = report_errors(results)
+    print(f"Processed {len(jobs) - failures} of {len(jobs)} image(s)", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+# Losslessly shrinks PNG files, caching the results so unchanged images are never re-optimized.
+# Each file is decoded and looked up in a local cache (see png_cache.py) by its pixels and the optimizer settings; on a
+# hit the cached bytes are written without running the optimizer. On a miss the image is re-encoded in every smaller
+# color type that holds its pixels exactly (RGB without alpha, grayscale, palette with transparency) at the chosen zlib
+# level, the smallest is kept, and optionally optipng or oxipng (if installed) runs on that. The result is checked to
+# decode to the same pixels, and only replaces the file if it's smaller. Metadata chunks (text, gamma, etc.) aren't kept.
+# Files are processed on a process pool.
+#
+# Usage:
+#   python optimize_pngs.py graphics/                           # Pillow only, zlib level 9
+#   python optimize_pngs.py sheet.png --optimizer optipng --level 7
+#   python optimize_pngs.py graphics/ --cache-dir build/png-cache --cache-size 2000 -j 8
+
+import io
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+from PIL import Image
+
+from image_batch import find_pngs, run_parallel, report_errors
+from png_cache import PNGCache, pixel_key, default_cache_dir, DEFAULT_MAX_BYTES, RGBA_EXACT_MODES
+
+OPTIMIZER_VERSION = 1 # Bump when the output for the same pixels and settings changes, to invalidate cached entries
+# Optimizer name -> (default level, highest level); Pillow levels are zlib levels
+OPTIMIZERS = {'pillow': (9, 9), 'optipng': (2, 7), 'oxipng': (2, 6)}
+
+
+def palette_image(rgba):
+    """
+    Builds a palette image from (height, width, 4) uint8 RGBA pixels with at most 256 colors, or returns None.
+    Translucent colors come first in the palette, so the transparency chunk only needs to cover them.
+    """
+    colors, indices = np.unique(np.ascontiguousarray(rgba).view(np.uint32).ravel(), return_inverse=True)
+    if len(colors) > 256:
+        return None
+    palette = colors.view(np.uint8).reshape(-1, 4)
+    order = np.argsort(palette[:, 3] == 255, kind='stable')
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    image = Image.fromarray(remap[indices].reshape(rgba.shape[:2]).astype(np.uint8), 'P')
+    image.putpalette(palette[order].tobytes(), 'RGBA')
+    return image
+
+
+def smallest_encoding(image, level=9):
+    """
+    Encodes an image in each exactly equivalent, smaller color type, and returns the smallest PNG.
+
+    Args:
+        image (PIL.Image): Decoded image.
+        level (int): zlib compression level, 0-9.
+
+    Returns:
+        bytes: PNG file contents.
+    """
+    if image.mode in RGBA_EXACT_MODES:
+        rgba = np.asarray(image.convert('RGBA'))
+        opaque = bool((rgba[..., 3] == 255).all())
+        is_gray = bool(((rgba[..., 0] == rgba[..., 1]) & (rgba[..., 1] == rgba[..., 2])).all())
+        if is_gray:
+            candidates = [Image.fromarray(rgba[..., 0], 'L') if opaque else Image.fromarray(rgba[..., [0, 3]], 'LA')]
+        else:
+            candidates = [Image.fromarray(rgba[..., :3], 'RGB') if opaque else Image.fromarray(rgba, 'RGBA')]
+        palette = palette_image(rgba)
+        if palette is not None:
+            candidates.append(palette)
+    else:
+        candidates = [image]
+
+    best = None
+    for candidate in candidates:
+        buffer = io.BytesIO()
+        candidate.save(buffer, format='PNG', compress_level=level)
+        if best is None or buffer.tell() < len(best):
+            best = buffer.getvalue()
+    return best
+
+
+def run_external_optimizer(data, optimizer, level):
+    """Runs optipng or oxipng on PNG bytes (through a temporary file) and returns the result."""
+    fd, temp_path = tempfile.mkstemp(suffix='.png')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if optimizer == 'optipng':
+            command = ['optipng', '-quiet', f'-o{level}', temp_path]
+        else:
+            command = ['oxipng', '--quiet', '--opt', str(level), temp_path]
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        with open(temp_path, 'rb') as f:
+            return f.read()
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"{optimizer} failed: {e.stderr.decode(errors='replace').strip()}")
+    finally:
+        os.remove(temp_path)
+
+
+def same_pixels(image, data):
+    """Checks that PNG bytes decode to the same pixels as an image."""
+    with Image.open(io.BytesIO(data)) as decoded:
+        if image.mode in RGBA_EXACT_MODES:
+            return decoded.size == image.size and decoded.convert('RGBA').tobytes() == image.convert('RGBA').tobytes()
+        return decoded.mode == image.mode and decoded.size == image.size and decoded.tobytes() == image.tobytes()
+
+
+def optimize_png(image, optimizer='pillow', level=None):
+    """
+    Losslessly optimizes a decoded image.
+
+    Args:
+        image (PIL.Image): Decoded image.
+        optimizer (str): 'pillow', or 'optipng'/'oxipng' to also run that tool on Pillow's result.
+        level (int): Optimization level (see OPTIMIZERS); None for the optimizer's default.
+
+    Returns:
+        bytes: Optimized PNG file contents.
+
+    Raises:
+        ValueError: If the optimizer fails, or its output doesn't decode to the same pixels.
+    """
+    default_level, _ = OPTIMIZERS[optimizer]
+    level = default_level if level is None else level
+    data = smallest_encoding(image, level if optimizer == 'pillow' else 9)
+    if optimizer != 'pillow':
+        data = run_external_optimizer(data, optimizer, level)
+    if not same_pixels(image, data):
+        raise ValueError(f"{optimizer} output doesn't match the original pixels")
+    return data
+
+
+def optimize_file(path, optimizer='pillow', level=None, cache_dir=None):
+    """
+    Optimizes one PNG file in place, through the cache (a run_parallel worker).
+
+    Args:
+        path (str): PNG file.
+        optimizer, level: See optimize_png.
+        cache_dir (str): Cache directory; None to not use a cache.
+
+    Returns:
+        tuple: (error, cache_hit, bytes_saved): error message or None, whether the cache had the result, and how much
+            smaller the file got.
+    """
+    try:
+        with open(path, 'rb') as f:
+            original = f.read()
+        with Image.open(io.BytesIO(original)) as image:
+            image.load()
+            cache = PNGCache(cache_dir) if cache_dir else None
+            key = pixel_key(image, optimizer, OPTIMIZER_VERSION, {'level': level}) if cache else None
+            data = cache.get(key) if cache else None
+            cache_hit = data is not None
+            if not cache_hit:
+                data = optimize_png(image, optimizer, level)
+                if len(original) < len(data):
+                    data = original
+                if cache:
+                    cache.put(key, data)
+        if len(data) < len(original):
+            temp_path = path + '.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            return None, cache_hit, len(original) - len(data)
+        return None, cache_hit, 0
+    except (OSError, ValueError) as e:
+        return str(e), False, 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Losslessly shrink PNG files in place, caching results by pixel content.')
+    parser.add_argument('inputs', nargs='+', help='PNG files, or directories to search recursively for PNGs.')
+    parser.add_argument('--optimizer', choices=OPTIMIZERS, default='pillow', help='pillow (default), or also run optipng/oxipng if installed.')
+    parser.add_argument('--level', type=int, help='Optimization level: zlib level 0-9 for pillow (default 9), -o level for optipng (0-7) or oxipng (0-6), default 2.')
+    parser.add_argument('--cache-dir', default=default_cache_dir(), help='Cache directory (default: %(default)s).')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help='Cache size limit in MB (default: %(default)s).')
+    parser.add_argument('--no-cache', action='store_true', help="Don't read or write the cache.")
+    parser.add_argument('-j', '--jobs', type=int, help='Number of worker processes (default: one per CPU).')
+    args = parser.parse_args()
+
+    default_level, max_level = OPTIMIZERS[args.optimizer]
+    level = default_level if args.level is None else args.level
+    if not 0 <= level <= max_level:
+        print(f"Error: --level for {args.optimizer} must be 0-{max_level}", file=sys.stderr)
+        sys.exit(1)
+    if args.optimizer != 'pillow' and shutil.which(args.optimizer) is None:
+        print(f"Error: {args.optimizer} not found; install it or use --optimizer pillow", file=sys.stderr)
+        sys.exit(1)
+    paths = find_pngs(args.inputs)
+    if not paths:
+        print("Error: No PNG files found", file=sys.stderr)
+        sys.exit(1)
+
+    cache = None if args.no_cache else PNGCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    results = run_parallel(optimize_file, paths, args.jobs, optimizer=args.optimizer, level=level,
+                           cache_dir=cache.cache_dir if cache else None)
+    failures = report_errors([(path, error) for path, (error, _, _) in results])
+    if cache:
+        cache.hits = sum(cache_hit for _, (error, cache_hit, _) in results if error is None)
+        cache.misses = len(paths) - failures - cache.hits
+        cache.evict()
+        cache.report()
+    saved = sum(bytes_saved for _, (_, _, bytes_saved) in results)
+    print(f"Optimized {len(paths) - failures} of {len(paths)} image(s), saving {saved / 1024:.1f} KiB", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+# On-disk cache of optimized PNGs, so re-optimizing unchanged images only costs decoding and hashing them.
+# Entries are keyed by a SHA-256 of the optimizer's name, version and settings, and the image's decoded pixels. Keying on
+# pixels rather than file bytes means an already optimized file (which decodes to the same pixels) hits the same entry as
+# the file it was made from.
+# Each entry is a <key>.png file; reading one touches its mtime, and evict() deletes the least recently used entries
+# once the directory is over its size limit. Writes are atomic renames, so parallel workers can share the directory.
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Modes that convert to RGBA without losing anything, so their pixels can be hashed as RGBA whatever the encoding
+RGBA_EXACT_MODES = ('1', 'L', 'LA', 'P', 'PA', 'RGB', 'RGBA')
+
+
+def default_cache_dir():
+    """Returns the default cache directory, under $XDG_CACHE_HOME (or ~/.cache)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "factorio-mod-scripts", "png-optimize")
+
+
+def pixel_key(image, optimizer, version, options=None):
+    """
+    Hashes an image's pixels together with everything that affects its optimized encoding.
+
+    Args:
+        image (PIL.Image): Decoded image. Images in RGBA_EXACT_MODES are hashed as RGBA, so the same pixels stored as
+            palette, grayscale or RGB give the same key; other modes (e.g. 16-bit) are hashed as they are.
+        optimizer (str): Name of the optimizer, e.g. "pillow" or "optipng".
+        version (int): The optimizer's version; bump it whenever its output changes.
+        options (dict): Settings that affect the output, e.g. {"level": 7}.
+
+    Returns:
+        str: Hex digest to use as the cache key.
+    """
+    pixels = image.convert('RGBA') if image.mode in RGBA_EXACT_MODES else image
+    header = json.dumps([optimizer, version, options or {}, pixels.mode, pixels.size], sort_keys=True)
+    digest = hashlib.sha256(header.encode("utf-8") + b"\0")
+    digest.update(pixels.tobytes())
+    return digest.hexdigest()
+
+
+class PNGCache:
+    """Size-bounded LRU cache of optimized PNG bytes. hits and misses are for report(); the caller counts them."""
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, key):
+        """Returns the cached bytes for key, or None, marking hits as recently used."""
+        path = os.path.join(self.cache_dir, key + ".png")
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, key, data):
+        """Stores bytes under key. Doesn't evict, so parallel workers don't each scan the directory; call evict() once."""
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, os.path.join(self.cache_dir, key + ".png"))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".png") and not entry.name.startswith(".tmp-"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError: # Evicted by another process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def report(self, file=sys.stderr):
+        """Prints hit/miss counts."""
+        print(f"Cache: {self.hits} hit(s), {self.misses} miss(es) in {self.cache_dir}", file=file)
@@ -1,6 +1,7 @@
 #!/bin/bash
 
 # This file removes the background alpha value, found by sampling the 4 corners of the image. For example if you have pics of craters for decoratives, and the pictures are mostly transparent around the edges but they still have non-zero alpha, then you get rectangles around the decoratives in-game. This script removes those rectangles.
+# image_pipeline.py does this in one NumPy pass per image, for whole folders in parallel: python image_pipeline.py -s remove_base_alpha:corner=10:buffer=0.05 renders/
 
 # Check if ImageMagick is installed
 if ! command -v convert &> /dev/null; then
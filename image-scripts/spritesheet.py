@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+# Slices and rearranges spritesheets in memory, replacing divide_image.sh and cut_frames.sh.
+# Each sheet is decoded once into a NumPy array, and its grid of frames is a (rows, cols, frame_height, frame_width,
+# channels) view of that array, so splitting and selecting frames copies nothing until the outputs are assembled.
+# Frames are numbered from 0 in row-major order (left to right, then top to bottom), like the frames/ files of cut_frames.sh.
+# If the sheet's size isn't a multiple of the grid, the leftover pixels on the right and bottom are dropped.
+#
+# Usage:
+#   python spritesheet.py split sheet.png other.png --grid 3x2         # sheet1.png ... sheet6.png, like divide_image.sh
+#   python spritesheet.py pack sheet.png --grid 8x8 --every 2          # every 2nd frame of each row, like cut_frames.sh
+#   python spritesheet.py pack sheet.png --grid 8x8 --frames 0-31:2,63 --columns 4 -o out.png
+
+import os
+import re
+import sys
+import argparse
+
+import numpy as np
+from PIL import Image
+
+
+def parse_grid(text):
+    """Parses COLSxROWS into (cols, rows)."""
+    match = re.fullmatch(r"(\d+)x(\d+)", text.strip())
+    if not match or int(match.group(1)) < 1 or int(match.group(2)) < 1:
+        raise argparse.ArgumentTypeError(f"expected COLSxROWS, e.g. 8x4, got {text!r}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def parse_frames(text, num_frames):
+    """
+    Parses a frame list like "0-7,12,20-30:2" (inclusive ranges, optional step) into frame indices.
+
+    Raises:
+        ValueError: On malformed parts or frames outside 0 to num_frames - 1.
+    """
+    indices = []
+    for part in text.split(','):
+        match = re.fullmatch(r"(\d+)(?:-(\d+))?(?::(\d+))?", part.strip())
+        if not match or match.group(3) == '0':
+            raise ValueError(f"Invalid frame list part: {part!r}")
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) is not None else start
+        step = int(match.group(3) or 1)
+        if max(start, end) >= num_frames:
+            raise ValueError(f"Frame {max(start, end)} out of range; the sheet has {num_frames} frames (0-{num_frames - 1})")
+        indices.extend(range(start, end + 1, step) if end >= start else range(start, end - 1, -step))
+    return indices
+
+
+def load_sheet(path):
+    """
+    Decodes a sheet once.
+
+    Returns:
+        tuple: (pixels, mode): (height, width, channels) uint8 array, and its PIL mode. Palette and other modes are
+            converted to RGBA; L, LA, RGB and RGBA are kept.
+    """
+    with Image.open(path) as image:
+        if image.mode not in ('L', 'LA', 'RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        pixels = np.asarray(image)
+        mode = image.mode
+    return (pixels if pixels.ndim == 3 else pixels[..., np.newaxis]), mode
+
+
+def frame_grid(pixels, cols, rows):
+    """
+    Views a sheet as a grid of frames, without copying.
+
+    Args:
+        pixels (np.ndarray): (height, width, channels) sheet.
+        cols, rows (int): Grid size.
+
+    Returns:
+        np.ndarray: (rows, cols, frame_height, frame_width, channels) view; grid[r, c] is a frame.
+
+    Raises:
+        ValueError: If the sheet is smaller than the grid.
+    """
+    height, width, channels = pixels.shape
+    frame_height, frame_width = height // rows, width // cols
+    if frame_height == 0 or frame_width == 0:
+        raise ValueError(f"A {width}x{height} sheet is too small for a {cols}x{rows} grid")
+    used = pixels[:rows * frame_height, :cols * frame_width]
+    return used.reshape(rows, frame_height, cols, frame_width, channels).transpose(0, 2, 1, 3, 4)
+
+
+def every_nth_frame(cols, rows, step, offset=0):
+    """Frame indices keeping every step-th column of each row, starting at column offset (cut_frames.sh uses step 2)."""
+    return [row * cols + col for row in range(rows) for col in range(offset, cols, step)]
+
+
+def pack_frames(grid, indices, columns):
+    """
+    Assembles selected frames into a new sheet, copying each one once, straight into its place.
+
+    Args:
+        grid (np.ndarray): Frame grid from frame_grid.
+        indices (list): Frame indices (row-major in the grid), in output order; frames can repeat.
+        columns (int): Columns of the output sheet; rows are added as needed and unused cells are left empty (zero).
+
+    Returns:
+        np.ndarray: (out_rows * frame_height, columns * frame_width, channels) sheet.
+    """
+    rows, cols, frame_height, frame_width, channels = grid.shape
+    out_rows = -(-len(indices) // columns)
+    sheet = np.zeros((out_rows * frame_height, columns * frame_width, channels), dtype=grid.dtype)
+    cells = sheet.reshape(out_rows, frame_height, columns, frame_width, channels).transpose(0, 2, 1, 3, 4)
+    for position, index in enumerate(indices):
+        # Basic indexing on both sides: a view of the source frame copied straight into a view of its cell
+        cells[position // columns, position % columns] = grid[index // cols, index % cols]
+    return sheet
+
+
+def save_pixels(pixels, mode, path):
+    """Encodes an array (as returned by load_sheet, or a view into one) as a PNG."""
+    Image.fromarray(np.ascontiguousarray(pixels if pixels.shape[-1] > 1 else pixels[..., 0]), mode).save(path)
+
+
+def split_sheet(path, cols, rows):
+    """
+    Saves every frame of a sheet as its own file, named like divide_image.sh: sheet1.png, sheet2.png, ...
+
+    Returns:
+        list: Output paths.
+    """
+    pixels, mode = load_sheet(path)
+    grid = frame_grid(pixels, cols, rows)
+    base, ext = os.path.splitext(path)
+    output_paths = []
+    for row in range(rows):
+        for col in range(cols):
+            output_path = f"{base}{len(output_paths) + 1}{ext}"
+            save_pixels(grid[row, col], mode, output_path)
+            output_paths.append(output_path)
+    return output_paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Split spritesheets into frames, or drop, reorder and repack their frames.')
+    parser.add_argument('command', choices=('split', 'pack'), help='split: save every frame as a file; pack: assemble selected frames into a new sheet.')
+    parser.add_argument('sheets', nargs='+', help='Spritesheet images.')
+    parser.add_argument('--grid', type=parse_grid, default=(2, 2), metavar='COLSxROWS', help='Frame grid of the sheets (default: 2x2).')
+    parser.add_argument('--every', type=int, metavar='N', help='pack: keep every Nth frame of each row (2 halves the frame count, like cut_frames.sh).')
+    parser.add_argument('--offset', type=int, default=0, help='pack: with --every, the first column to keep (default: 0).')
+    parser.add_argument('--frames', metavar='LIST', help='pack: frames to keep, in output order, e.g. 0-31:2,40,35 (0-based, row-major).')
+    parser.add_argument('--columns', type=int, help='pack: columns of the output sheet (default: kept frames per row with --every, else the input columns).')
+    parser.add_argument('-o', '--output', help='pack: output file (default: <name>_HALVED.png with --every 2, else <name>_packed.png). Only with one sheet.')
+    args = parser.parse_args()
+
+    cols, rows = args.grid
+    if args.command == 'pack':
+        if (args.every is None) == (args.frames is None):
+            print("Error: pack needs exactly one of --every or --frames", file=sys.stderr)
+            sys.exit(1)
+        if args.every is not None and (args.every < 1 or not 0 <= args.offset < cols):
+            print("Error: --every must be at least 1 and --offset a column of the grid", file=sys.stderr)
+            sys.exit(1)
+        if args.columns is not None and args.columns < 1:
+            print("Error: --columns must be at least 1", file=sys.stderr)
+            sys.exit(1)
+        if args.output and len(args.sheets) > 1:
+            print("Error: --output can only be used with one sheet", file=sys.stderr)
+            sys.exit(1)
+
+    failures = 0
+    for path in args.sheets:
+        try:
+            if args.command == 'split':
+                output_paths = split_sheet(path, cols, rows)
+                print(f"{path}: saved {len(output_paths)} frames ({output_paths[0]} to {output_paths[-1]})")
+                continue
+            pixels, mode = load_sheet(path)
+            grid = frame_grid(pixels, cols, rows)
+            if args.every is not None:
+                indices = every_nth_frame(cols, rows, args.every, args.offset)
+                columns = args.columns or len(range(args.offset, cols, args.every))
+            else:
+                indices = parse_frames(args.frames, cols * rows)
+                columns = args.columns or cols
+            base, ext = os.path.splitext(path)
+            output_path = args.output or f"{base}_{'HALVED' if args.every == 2 else 'packed'}{ext}"
+            sheet = pack_frames(grid, indices, columns)
+            save_pixels(sheet, mode, output_path)
+            print(f"{path}: packed {len(indices)} of {cols * rows} frames into {output_path} ({sheet.shape[1]}x{sheet.shape[0]})")
+        except (OSError, ValueError) as e:
+            print(f"Error: {path}: {e}", file=sys.stderr)
+            failures += 1
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 #!/usr/bin/env bash
 # Attempts to remove background from images.
 # Usage: transparent_background.sh file1.png file2.png ...
+# The transparent_background stage of image_pipeline.py approximates these flood fills: its fuzz (default 0.05) is an
+# RMS RGBA distance, not ImageMagick's metric. Give -o output/ to write to output/ like this script does, instead of
+# overwriting the inputs: python image_pipeline.py -s transparent_background -o output/ ./*.png
 
 fuzz="5%"
 
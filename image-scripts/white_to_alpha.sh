@@ -1,6 +1,9 @@
 #!/bin/bash
 # Usage: white_to_alpha.sh ./*.png
 # Converts lighter parts of images to transparency. For making sprites from images of semi-transparent objects against white backgrounds.
+# image_pipeline.py can chain this with other steps in one pass. Its gray is Rec. 709 luma, which can differ slightly from
+# ImageMagick's, and --suffix saves next to each input rather than in the current directory:
+#   python image_pipeline.py -s white_to_alpha --suffix _translucent ./*.png
 
 # Check if ImageMagick is installed
 if ! command -v convert &> /dev/null; then